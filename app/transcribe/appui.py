@@ -1,16 +1,15 @@
 import datetime
-import queue
 import tkinter as tk
 import customtkinter as ctk
 
 from .desktop import DesktopCommandBinder, DesktopController, DesktopDisplayManager, DesktopViewBuilder
+from .desktop.dispatcher import UIDispatcher
 from .global_vars import AppRuntime, create_app_runtime
 from tsutils import app_logging as al
 
 
 logger = al.get_module_logger(al.UI_LOGGER)
 UI_FONT_SIZE = 20
-UI_POLL_INTERVAL_MS = 50
 
 
 class AppUI(ctk.CTk):
@@ -34,14 +33,13 @@ class AppUI(ctk.CTk):
         self.view_builder = view_builder or DesktopViewBuilder()
         self.command_binder = command_binder or DesktopCommandBinder()
         self.display_manager = display_manager or DesktopDisplayManager(ui_font_size=self.ui_font_size)
-        self._ui_action_queue: queue.Queue = queue.Queue()
+        self.ui_dispatcher = UIDispatcher(self)
 
         self.global_vars.main_window = self
         self.controller.bind_ui(self)
         self.display_manager.bind_ui(self)
         self.create_ui_components(config=config)
         self.set_audio_device_menus(config=config)
-        self.after(UI_POLL_INTERVAL_MS, self.process_ui_actions)
 
     def start(self):
         """Start showing the UI
@@ -50,21 +48,15 @@ class AppUI(ctk.CTk):
 
     def enqueue_ui_action(self, callback, *args, **kwargs):
         """Queue UI work for the Tk main loop."""
-        self._ui_action_queue.put((callback, args, kwargs))
+        self.ui_dispatcher.post(callback, args, kwargs)
+
+    def enqueue_keyed_ui_action(self, key, callback, *args, **kwargs):
+        """Queue UI work for the Tk main loop, replacing queued work with the same key."""
+        self.ui_dispatcher.post(callback, args, kwargs, key=key)
 
     def process_ui_actions(self):
         """Run queued UI actions on the Tk main loop."""
-        try:
-            while True:
-                callback, args, kwargs = self._ui_action_queue.get_nowait()
-                try:
-                    callback(*args, **kwargs)
-                except Exception as exception:
-                    logger.error(f"Error processing queued UI action: {exception}")
-        except queue.Empty:
-            pass
-
-        self.after(UI_POLL_INTERVAL_MS, self.process_ui_actions)
+        self.ui_dispatcher.dispatch()
 
     def update_last_row(self, speaker: str, input_text: str):
         """Replace the latest transcript row for a speaker."""
@@ -98,6 +90,10 @@ class AppUI(ctk.CTk):
         """Create a word cloud popup on the UI thread."""
         return self.display_manager.show_word_cloud_popup(title, word_cloud)
 
+    def select_transcript_row(self, input_text: str):
+        """Show the response of the selected transcript row."""
+        return self.display_manager.select_transcript_row(input_text)
+
     def update_initial_transcripts(self):
         """Set initial transcript in UI.
         """
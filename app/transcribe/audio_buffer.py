@@ -0,0 +1,133 @@
+"""Preallocated PCM storage for rolling live transcription windows."""
+
+from __future__ import annotations
+
+
+class AudioRingBuffer:
+    """Frame-aligned PCM store that retains at most ``max_seconds`` of audio.
+
+    Audio is kept contiguous in a preallocated ``bytearray`` twice the window
+    size, so appends write only the new chunk and dropping audio from the head
+    is a pointer move. The retained window is compacted to the front of the
+    storage once the free space at the tail runs out, at most once per window
+    of appended audio.
+
+    ``view`` returns a zero-copy ``memoryview`` of the retained window. A view
+    is valid until the next ``append`` on the buffer; callers that append and
+    read from the same thread can hand it directly to a transcription model.
+    """
+
+    def __init__(self, sample_rate: int, sample_width: int, channels: int, max_seconds: float = 0.0):
+        self._data = bytearray()
+        self._start = 0
+        self._end = 0
+        self._dropped_bytes = 0
+        self.configure(sample_rate, sample_width, channels, max_seconds)
+
+    def configure(self, sample_rate: int, sample_width: int, channels: int, max_seconds: float | None = None):
+        """Set the audio format and window length. Retained audio is discarded."""
+        self.sample_rate = max(int(sample_rate), 0)
+        self.sample_width = max(int(sample_width), 1)
+        self.channels = max(int(channels), 1)
+        if max_seconds is not None:
+            self.max_seconds = float(max_seconds)
+        self.frame_size = self.sample_width * self.channels
+        self.bytes_per_second = self.frame_size * self.sample_rate
+        capacity = int(self.max_seconds * self.bytes_per_second)
+        # A capacity of 0 means the window is unbounded and storage grows on demand
+        self.capacity = max(capacity - capacity % self.frame_size, 0)
+        self._data = bytearray(2 * self.capacity)
+        self.clear()
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def buffer_start_seconds(self) -> float:
+        """Position of the first retained byte, relative to the last clear."""
+        if self.bytes_per_second <= 0:
+            return 0.0
+        return self._dropped_bytes / self.bytes_per_second
+
+    @property
+    def duration_seconds(self) -> float:
+        """Duration of the retained audio."""
+        if self.bytes_per_second <= 0:
+            return 0.0
+        return len(self) / self.bytes_per_second
+
+    @property
+    def buffer_end_seconds(self) -> float:
+        """Position just after the last retained byte, relative to the last clear."""
+        return self.buffer_start_seconds + self.duration_seconds
+
+    def append(self, data) -> int:
+        """Append PCM audio and return the number of bytes dropped from the head."""
+        chunk = memoryview(data).cast("B")
+        chunk_size = len(chunk)
+        if chunk_size == 0:
+            return 0
+
+        if self.capacity and chunk_size >= self.capacity:
+            # The chunk alone fills the window, keep its newest frames only
+            dropped = len(self) + chunk_size - self.capacity
+            self._data[0:self.capacity] = chunk[chunk_size - self.capacity:]
+            self._start = 0
+            self._end = self.capacity
+            self._dropped_bytes += dropped
+            return dropped
+
+        dropped = 0
+        if self.capacity:
+            excess = len(self) + chunk_size - self.capacity
+            if excess > 0:
+                dropped = self.drop_head(excess + (-excess) % self.frame_size)
+
+        if self._end + chunk_size > len(self._data):
+            self._make_room(chunk_size)
+        self._data[self._end:self._end + chunk_size] = chunk
+        self._end += chunk_size
+        return dropped
+
+    def view(self) -> memoryview:
+        """Zero-copy view of the retained audio."""
+        return memoryview(self._data)[self._start:self._end]
+
+    def tobytes(self) -> bytes:
+        """Copy of the retained audio."""
+        return bytes(self._data[self._start:self._end])
+
+    def drop_head(self, num_bytes: int) -> int:
+        """Drop whole frames from the head of the window and return bytes dropped."""
+        num_bytes = min(max(int(num_bytes), 0), len(self))
+        num_bytes -= num_bytes % self.frame_size
+        self._start += num_bytes
+        self._dropped_bytes += num_bytes
+        if self._start == self._end:
+            self._start = self._end = 0
+        return num_bytes
+
+    def drop_fraction(self, fraction: float) -> int:
+        """Drop the oldest ``fraction`` of the retained audio and return bytes dropped."""
+        return self.drop_head(int(len(self) * min(max(float(fraction), 0.0), 1.0)))
+
+    def clear(self):
+        """Discard all retained audio and restart the window timeline at zero."""
+        self._start = 0
+        self._end = 0
+        self._dropped_bytes = 0
+
+    def _make_room(self, chunk_size: int):
+        retained = len(self)
+        if retained + chunk_size <= len(self._data):
+            # Compact the window to the front of the preallocated storage
+            storage = memoryview(self._data)
+            storage[0:retained] = storage[self._start:self._end]
+            storage.release()
+        else:
+            # Unbounded window: grow into new storage so outstanding views stay intact
+            data = bytearray(max(2 * (retained + chunk_size), 4096))
+            data[0:retained] = self._data[self._start:self._end]
+            self._data = data
+        self._start = 0
+        self._end = retained
@@ -4,22 +4,25 @@ import os
 import queue
 import time
 import threading
-import io
 import datetime
+import contextlib
 from abc import abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 # import pprint
 import wave
 import tempfile
-import pyaudiowpatch as pyaudio
 # from db import AppDB as appdb
 from . import constants, conversation
+from .audio_buffer import AudioRingBuffer
 from .live_transcription import (
     DEFAULT_AUDIO_CONTEXT_SECONDS,
     DEFAULT_WINDOW_SECONDS,
     LiveTranscriptManager,
 )
 from .transcriber import TranscriberInterface
-import custom_speech_recognition as sr
+from .voice_activity import create_voice_activity_gate
 from tsutils import app_logging as al
 from tsutils import duration
 
@@ -34,6 +37,37 @@ logger = al.get_module_logger(al.TRANSCRIBER_LOGGER)
 WHISPER_SEGMENT_PRUNE_THRESHOLD = 6
 # Duration of audio (seconds) after which force pruning
 AUDIO_LENGTH_PRUNE_THRESHOLD_SECONDS = 45
+# Default number of threads used to transcribe audio sources in parallel
+DEFAULT_TRANSCRIPTION_WORKERS = 2
+# Transcribe queued audio of a source as one window instead of once per chunk
+DEFAULT_COALESCE_BACKLOG = True
+# Queued audio older than this is dropped when transcription falls behind. 0 disables dropping.
+DEFAULT_MAX_LAG_SECONDS = 0
+
+
+@dataclass
+class TranscriptionLaneMetrics:
+    """Counters describing how queued audio of a single source was transcribed."""
+    chunks_received: int = 0
+    transcriptions: int = 0
+    # Chunks transcribed as part of a newer window instead of in a window of their own
+    windows_skipped: int = 0
+    # Chunks older than the window of newer queued audio. These are never appended.
+    chunks_outside_window: int = 0
+    # Chunks dropped because they were older than the configured maximum lag
+    stale_chunks_dropped: int = 0
+    stale_seconds_dropped: float = 0.0
+    # Audio of committed text dropped from the window, except for the audio context
+    committed_seconds_dropped: float = 0.0
+
+
+@dataclass
+class _SourceLane:
+    """Audio chunks waiting to be transcribed for a single audio source."""
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    pending: deque = field(default_factory=deque)
+    # True while a worker owns the lane. A lane is processed by one worker at a time.
+    active: bool = False
 
 
 class AudioTranscriber(TranscriberInterface):   # pylint: disable=C0115, R0902
@@ -48,9 +82,12 @@ class AudioTranscriber(TranscriberInterface):   # pylint: disable=C0115, R0902
         # self.transcript_data = {"You": [], "Speaker": []}
         self.transcript_changed_event = threading.Event()
         self.stt_model = model
-        # Same mutex is used for all audio sources. In case locking becomes an issue, can consider
-        # using separate mutex for each audio source
+        # Serializes clearing of the transcriber context. Audio data of each source is
+        # protected by the mutex of that source.
         self.mutex = threading.Lock()
+        # Models that are not safe to call from multiple threads are invoked one request at a time
+        self._stt_lock = contextlib.nullcontext() \
+            if getattr(model, "supports_concurrent_requests", False) else threading.Lock()
         self.config = config
         self.audio_chunk_preprocessor = audio_chunk_preprocessor
         general_config = self.config.get("General", {})
@@ -67,6 +104,23 @@ class AudioTranscriber(TranscriberInterface):   # pylint: disable=C0115, R0902
             self.config['General']['clear_transcript_interval_seconds']
         # Determines if transcription is enabled for the application. By default it is enabled.
         self.transcribe = True
+        self._stop_event = threading.Event()
+        max_workers = max(int(general_config.get("live_transcription_max_workers",
+                                                 DEFAULT_TRANSCRIPTION_WORKERS)), 1)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="TranscribeLane")
+        self._lanes = {constants.PERSONA_YOU: _SourceLane(),
+                       constants.PERSONA_SPEAKER: _SourceLane()}
+        self._lane_metrics = {constants.PERSONA_YOU: TranscriptionLaneMetrics(),
+                              constants.PERSONA_SPEAKER: TranscriptionLaneMetrics()}
+        self.coalesce_backlog = bool(
+            general_config.get("live_transcription_coalesce_backlog", DEFAULT_COALESCE_BACKLOG)
+        )
+        self.max_lag_seconds = float(
+            general_config.get("live_transcription_max_lag_seconds", DEFAULT_MAX_LAG_SECONDS)
+        )
+        # Drops audio without speech before it reaches the STT model. None when disabled.
+        self.voice_activity_gate = create_voice_activity_gate(config)
         self.audio_sources_properties = {
             "You": {
                 # int
@@ -75,16 +129,16 @@ class AudioTranscriber(TranscriberInterface):   # pylint: disable=C0115, R0902
                 "sample_width": mic_source.SAMPLE_WIDTH,
                 # int
                 "channels": mic_source.channels,
-                "last_sample": bytes(),  # Raw bytes for wav format data
-                "buffer_start_seconds": 0.0,
+                # Rolling window of raw PCM audio pending transcription
+                "audio_buffer": AudioRingBuffer(mic_source.SAMPLE_RATE, mic_source.SAMPLE_WIDTH,
+                                                mic_source.channels,
+                                                self.live_transcription_window_seconds),
                 # Timestamp (UTC) for when the last transcribed audio record was put in queue
                 "last_spoken": None,
                 # bool
                 "new_phrase": True,
-                # function pointer
-                "process_data_func": self.process_mic_data,
                 # mutex
-                "mutex": self.mutex
+                "mutex": threading.Lock()
             },
             "Speaker": {
                 # int
@@ -93,16 +147,16 @@ class AudioTranscriber(TranscriberInterface):   # pylint: disable=C0115, R0902
                 "sample_width": speaker_source.SAMPLE_WIDTH,
                 # int
                 "channels": speaker_source.channels,
-                "last_sample": bytes(),  # Raw bytes for wav format data
-                "buffer_start_seconds": 0.0,
+                # Rolling window of raw PCM audio pending transcription
+                "audio_buffer": AudioRingBuffer(speaker_source.SAMPLE_RATE, speaker_source.SAMPLE_WIDTH,
+                                                speaker_source.channels,
+                                                self.live_transcription_window_seconds),
                 # Timestamp (UTC) for when the last transcribed audio record was put in queue
                 "last_spoken": None,
                 # bool
                 "new_phrase": True,
-                # function pointer
-                "process_data_func": self.process_speaker_data,
                 # mutex
-                "mutex": self.mutex
+                "mutex": threading.Lock()
             }
         }
         self.conversation = convo
@@ -120,9 +174,25 @@ class AudioTranscriber(TranscriberInterface):   # pylint: disable=C0115, R0902
             self.audio_sources_properties['Speaker']['sample_width'] = speaker_source.SAMPLE_WIDTH
             self.audio_sources_properties['Speaker']['channels'] = speaker_source.channels
 
+        self._configure_audio_buffers()
+
+    def _configure_audio_buffers(self):
+        """Match each audio buffer to the format of the audio retained for its source."""
+        for source_info in self.audio_sources_properties.values():
+            with source_info["mutex"]:
+                sample_rate, sample_width, channels = self._audio_format(source_info)
+                source_info["audio_buffer"].configure(sample_rate, sample_width, channels)
+
     def set_source_enabled(self, source_name: str, enabled: bool):
-        """File/window providers do not own source capture resources."""
-        del source_name, enabled
+        """File/window providers do not own source capture resources.
+        Audio of the source restarts with a gap, so its preprocessing state is discarded."""
+        del enabled
+        self._reset_audio_chunk_preprocessor(source_name)
+
+    def _reset_audio_chunk_preprocessor(self, source_name: str | None = None):
+        reset = getattr(self.audio_chunk_preprocessor, "reset", None)
+        if reset is not None:
+            reset(source_name)
 
     def set_transcription_enabled(self, enabled: bool):
         """Pause or resume transcription without changing capture resources."""
@@ -133,84 +203,300 @@ class AudioTranscriber(TranscriberInterface):   # pylint: disable=C0115, R0902
         self.stt_model.set_lang(lang)
 
     def stop(self):
-        """File/window transcribers own no persistent provider resources."""
+        """Stop dispatching audio and release the transcription worker threads
+        and any processes owned by the STT model."""
+        self._stop_event.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        stop_model = getattr(self.stt_model, "stop", None)
+        if callable(stop_model):
+            stop_model()
 
     def transcribe_audio_queue(self, audio_queue: queue.Queue):
         """Transcribe data from audio sources. In this case we have 2 sources, microphone, speaker.
+        Audio for each source is routed to its own lane, so a slow transcription of one
+        source does not delay the other.
         Args:
-          audio_queue: queue object with reference to audio files
+          audio_queue: queue object with raw audio data from each source
         """
         logger.info(self.__class__.__name__)
-        while True:
-            who_spoke, data, time_spoken = audio_queue.get()
+        while not self._stop_event.is_set():
+            try:
+                who_spoke, data, time_spoken = audio_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
             logger.info(f'Transcribe Audio Queue. Current time: {datetime.datetime.utcnow()} '
                         f'- Time Spoken: {time_spoken} by : {who_spoke}, queue_backlog - '
                         f'{audio_queue.qsize()}')
-            self._update_last_sample_and_phrase_status(who_spoke, data, time_spoken)
-            source_info = self.audio_sources_properties[who_spoke]
-
-            text = ''
-            update_previous = None
+            self._submit_audio(who_spoke, data, time_spoken)
+
+    def _submit_audio(self, who_spoke: str, data, time_spoken):
+        """Add audio to the lane of the source and schedule the lane if it is idle."""
+        lane = self._lanes[who_spoke]
+        with lane.lock:
+            lane.pending.append((data, time_spoken))
+            if lane.active:
+                return
+            lane.active = True
+        try:
+            self._executor.submit(self._process_lane, who_spoke)
+        except RuntimeError:
+            # Executor was shut down
+            with lane.lock:
+                lane.active = False
+
+    def _process_lane(self, who_spoke: str):
+        """Transcribe pending audio of a source until its lane is empty."""
+        lane = self._lanes[who_spoke]
+        while True:
+            with lane.lock:
+                if not lane.pending or self._stop_event.is_set():
+                    lane.active = False
+                    return
+                pending = list(lane.pending)
+                lane.pending.clear()
+            if len(pending) > 1:
+                logger.info(f'Coalescing {len(pending)} queued audio chunks for {who_spoke}.')
             try:
-                file_descritor, path = tempfile.mkstemp(suffix=".wav")
-                os.close(file_descritor)
-                source_info["process_data_func"](source_info["last_sample"], path)
-                if self.transcribe:
-                    with duration.Duration('Transcription (Speech to Text)', screen=False):
-                        logger.info(f'{datetime.datetime.now()} - Begin transcription')
-                        response = self.stt_model.get_transcription(path)
-                        raw_text = self.stt_model.process_response(response)
-                        if raw_text != '':
-                            audio_start_seconds, audio_end_seconds = \
-                                self._get_audio_window_seconds(source_info)
-                            hypothesis = self.stt_model.normalize_response(
-                                response,
-                                audio_start_seconds=audio_start_seconds,
-                                audio_end_seconds=audio_end_seconds,
-                            )
-                            live_update = self.live_transcript_manager.process_hypothesis(
-                                speaker=who_spoke,
-                                hypothesis=hypothesis,
-                                new_phrase=source_info["new_phrase"],
-                            )
-                            text = live_update.text if live_update.changed else ''
-                            update_previous = live_update.update_previous
-
-                        logger.info(f'{datetime.datetime.utcnow()} = Transcribed text: {text}')
-                        logger.info(f'{datetime.datetime.utcnow()} - End transcription')
-
+                self._transcribe_pending_audio(who_spoke, pending)
             except Exception as exception:
                 print(exception)
-            finally:
-                # print(f'transcribe_audio_queue: file: {path} filesize: {os.path.getsize(path)}')
-                os.unlink(path)
-
-            if text != '' and text.lower() != 'you':
-                self.update_transcript(
-                    who_spoke,
-                    text,
-                    time_spoken,
-                    update_previous=update_previous,
-                )
-                self.transcript_changed_event.set()
-
-    def _prune_audio_file(self, results, who_spoke, time_spoken, path):
+
+    def _transcribe_pending_audio(self, who_spoke: str, pending: list):
+        """Append queued chunks of a source to its audio window and transcribe the newest
+        window once per phrase, instead of once per chunk.
+        """
+        source_info = self.audio_sources_properties[who_spoke]
+        metrics = self._lane_metrics[who_spoke]
+        metrics.chunks_received += len(pending)
+        pending = self._drop_non_speech_audio(who_spoke, pending)
+        if not pending:
+            return
+        if not self.coalesce_backlog:
+            for data, time_spoken in pending:
+                self._update_last_sample_and_phrase_status(who_spoke, data, time_spoken)
+                self._transcribe_source(who_spoke, time_spoken)
+            return
+
+        pending, stale = self._split_stale_audio(pending)
+        if stale:
+            stale_seconds = sum(len(data) for data, _ in stale) / max(
+                self._source_bytes_per_second(source_info), 1)
+            metrics.stale_chunks_dropped += len(stale)
+            metrics.stale_seconds_dropped += stale_seconds
+            logger.info(f'Dropped {len(stale)} stale audio chunks ({stale_seconds:.2f} seconds) '
+                        f'for {who_spoke}. Transcription is more than {self.max_lag_seconds} '
+                        f'seconds behind.')
+            # Audio after the gap starts a new phrase and window
+            with source_info["mutex"]:
+                source_info["audio_buffer"].clear()
+
+        for phrase in self._split_phrases(pending):
+            first_in_window = self._window_start_index(source_info, phrase)
+            new_phrase = None
+            for index, (data, time_spoken) in enumerate(phrase):
+                # Audio that falls outside the window of newer audio only updates phrase timing
+                self._update_last_sample_and_phrase_status(
+                    who_spoke, data if index >= first_in_window else b"", time_spoken)
+                if new_phrase is None:
+                    new_phrase = source_info["new_phrase"] or bool(stale)
+            self._restore_phrase_status(source_info, new_phrase)
+            stale = []
+
+            metrics.windows_skipped += len(phrase) - 1
+            metrics.chunks_outside_window += first_in_window
+            if len(phrase) > 1:
+                logger.info(f'Skipped {len(phrase) - 1} intermediate windows for {who_spoke}.')
+            self._transcribe_source(who_spoke, phrase[-1][1])
+
+    def get_lane_metrics(self) -> dict[str, TranscriptionLaneMetrics]:
+        """Snapshot of the transcription queue counters for each audio source."""
+        return {who_spoke: replace(metrics) for who_spoke, metrics in self._lane_metrics.items()}
+
+    def get_voice_activity_metrics(self) -> dict:
+        """Snapshot of the voice activity counters for each audio source.
+        Empty when voice activity detection is disabled."""
+        if self.voice_activity_gate is None:
+            return {}
+        return self.voice_activity_gate.get_metrics()
+
+    def _drop_non_speech_audio(self, who_spoke: str, pending: list) -> list:
+        """Remove queued chunks that contain no speech."""
+        if self.voice_activity_gate is None:
+            return pending
+        source_info = self.audio_sources_properties[who_spoke]
+        sample_rate = int(source_info["sample_rate"])
+        sample_width = int(source_info["sample_width"])
+        channels = int(source_info["channels"])
+        speech = [(data, time_spoken) for data, time_spoken in pending
+                  if self.voice_activity_gate.accept_chunk(who_spoke, data, sample_rate,
+                                                           sample_width, channels)]
+        if len(speech) < len(pending):
+            logger.info(f'Dropped {len(pending) - len(speech)} audio chunks without speech '
+                        f'for {who_spoke}.')
+        return speech
+
+    def _trim_silence(self, who_spoke: str, pcm, audio_start_seconds: float,
+                      audio_end_seconds: float, audio_format: tuple[int, int, int]):
+        """Remove leading and trailing silence from an audio window.
+        Returns None when the window contains no speech."""
+        if self.voice_activity_gate is None:
+            return pcm, audio_start_seconds, audio_end_seconds
+        bounds = self.voice_activity_gate.speech_bounds(who_spoke, pcm, *audio_format)
+        if bounds is None:
+            return None
+        start, end = bounds
+        sample_rate, sample_width, channels = audio_format
+        bytes_per_second = sample_rate * sample_width * channels
+        if bytes_per_second <= 0:
+            return pcm, audio_start_seconds, audio_end_seconds
+        return (pcm[start:end],
+                audio_start_seconds + start / bytes_per_second,
+                audio_end_seconds - (len(pcm) - end) / bytes_per_second)
+
+    def _drop_committed_audio(self, who_spoke: str):
+        """Shrink the audio window of a source to the audio context before its committed
+        text, so committed audio is not transcribed again."""
+        source_info = self.audio_sources_properties[who_spoke]
+        retained_start = self.live_transcript_manager.retained_audio_start_seconds(who_spoke)
+        with source_info["mutex"]:
+            audio_buffer = source_info["audio_buffer"]
+            committed_seconds = retained_start - audio_buffer.buffer_start_seconds
+            if committed_seconds <= 0 or audio_buffer.bytes_per_second <= 0:
+                return
+            dropped = audio_buffer.drop_head(int(committed_seconds * audio_buffer.bytes_per_second))
+            dropped_seconds = dropped / audio_buffer.bytes_per_second
+        self._lane_metrics[who_spoke].committed_seconds_dropped += dropped_seconds
+        logger.info(f'Dropped {dropped_seconds:.2f} seconds of committed audio for {who_spoke}.')
+
+    def _split_stale_audio(self, pending: list) -> tuple[list, list]:
+        """Split queued chunks into current and stale chunks based on the maximum lag.
+        The newest chunk is never stale.
+        """
+        if self.max_lag_seconds <= 0 or len(pending) < 2:
+            return pending, []
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=self.max_lag_seconds)
+        first_current = len(pending) - 1
+        while first_current > 0 and pending[first_current - 1][1] >= cutoff:
+            first_current -= 1
+        return pending[first_current:], pending[:first_current]
+
+    @staticmethod
+    def _split_phrases(pending: list) -> list[list]:
+        """Group queued chunks into runs that belong to the same phrase."""
+        phrases = []
+        previous_time_spoken = None
+        for data, time_spoken in pending:
+            if previous_time_spoken is None or time_spoken - previous_time_spoken \
+                    > datetime.timedelta(seconds=PHRASE_TIMEOUT):
+                phrases.append([])
+            phrases[-1].append((data, time_spoken))
+            previous_time_spoken = time_spoken
+        return phrases
+
+    def _window_start_index(self, source_info: dict, phrase: list) -> int:
+        """Index of the oldest chunk of the phrase that fits in the live transcription window."""
+        bytes_per_second = self._source_bytes_per_second(source_info)
+        if bytes_per_second <= 0 or self.live_transcription_window_seconds <= 0:
+            return 0
+        retained_seconds = 0.0
+        for index in range(len(phrase) - 1, -1, -1):
+            if retained_seconds >= self.live_transcription_window_seconds:
+                return index + 1
+            retained_seconds += len(phrase[index][0]) / bytes_per_second
+        return 0
+
+    @staticmethod
+    def _source_bytes_per_second(source_info: dict) -> int:
+        """Data rate of audio as captured, before any preprocessing."""
+        return max(int(source_info.get("sample_rate", 0)) * int(source_info.get("sample_width", 2))
+                   * int(source_info.get("channels", 1)), 0)
+
+    @staticmethod
+    def _restore_phrase_status(source_info: dict, new_phrase: bool):
+        with source_info["mutex"]:
+            source_info["new_phrase"] = new_phrase
+
+    def _transcribe_source(self, who_spoke: str, time_spoken):
+        """Transcribe the retained audio window of a source and update the transcript."""
+        source_info = self.audio_sources_properties[who_spoke]
+        text = ''
+        update_previous = None
+        try:
+            if self.transcribe:
+                with duration.Duration('Transcription (Speech to Text)', screen=False):
+                    logger.info(f'{datetime.datetime.now()} - Begin transcription')
+                    pcm, audio_start_seconds, audio_end_seconds = \
+                        self._get_audio_window_snapshot(source_info)
+                    sample_rate, sample_width, channels = self._audio_format(source_info)
+                    if source_info["new_phrase"]:
+                        self.live_transcript_manager.restart_audio_timeline(who_spoke)
+                    trimmed = self._trim_silence(who_spoke, pcm, audio_start_seconds,
+                                                 audio_end_seconds,
+                                                 (sample_rate, sample_width, channels))
+                    if trimmed is None:
+                        logger.info(f'No speech in the audio window of {who_spoke}. '
+                                    'Skipped transcription.')
+                        return
+                    pcm, audio_start_seconds, audio_end_seconds = trimmed
+                    with self._stt_lock:
+                        response = self.stt_model.get_transcription_from_pcm(
+                            pcm,
+                            sample_rate=sample_rate,
+                            width=sample_width,
+                            channels=channels,
+                        )
+                    self._lane_metrics[who_spoke].transcriptions += 1
+                    raw_text = self.stt_model.process_response(response)
+                    if raw_text != '':
+                        hypothesis = self.stt_model.normalize_response(
+                            response,
+                            audio_start_seconds=audio_start_seconds,
+                            audio_end_seconds=audio_end_seconds,
+                        )
+                        live_update = self.live_transcript_manager.process_hypothesis(
+                            speaker=who_spoke,
+                            hypothesis=hypothesis,
+                            new_phrase=source_info["new_phrase"],
+                        )
+                        text = live_update.text if live_update.changed else ''
+                        update_previous = live_update.update_previous
+                        self._drop_committed_audio(who_spoke)
+
+                    logger.info(f'{datetime.datetime.utcnow()} = Transcribed text: {text}')
+                    logger.info(f'{datetime.datetime.utcnow()} - End transcription')
+
+        except Exception as exception:
+            print(exception)
+
+        if text != '' and text.lower() != 'you':
+            self.update_transcript(
+                who_spoke,
+                text,
+                time_spoken,
+                update_previous=update_previous,
+            )
+            self.transcript_changed_event.set()
+
+    def _prune_audio_buffer(self, results, who_spoke, time_spoken):
         """Checks if pruning of Audio Source is required based on transcriber
         parameters, and prunes appropriately."""
         source_info = self.audio_sources_properties[who_spoke]
         with source_info["mutex"]:
-            original_data_size = len(source_info["last_sample"])
+            original_data_size = len(source_info["audio_buffer"])
 
         prune, prune_id, prune_percent = self.check_for_latency(results)
         # print(f'Prune: {prune}. prune_id: {prune_id}. prune_percent: {prune_percent}')
         if prune:
             logger.info(f'{datetime.datetime.utcnow()} - Attempted to prune.')
-            first, second = self.prune_for_latency(who_spoke=who_spoke,
-                                                   original_data_size=original_data_size,
-                                                   prune_percent=prune_percent,
-                                                   results=results,
-                                                   prune_id=prune_id,
-                                                   file_path=path)
+            pruned = self.prune_for_latency(who_spoke=who_spoke,
+                                            original_data_size=original_data_size,
+                                            prune_percent=prune_percent,
+                                            results=results,
+                                            prune_id=prune_id)
+            if pruned is None:
+                # Audio changed while the results were being checked
+                return
+            first, second = pruned
             self.conversation.update_conversation(persona=who_spoke,
                                                   time_spoken=time_spoken,
                                                   text=first,
@@ -235,7 +521,7 @@ class AudioTranscriber(TranscriberInterface):   # pylint: disable=C0115, R0902
     @abstractmethod
     def prune_for_latency(self, who_spoke: str, original_data_size: int,
                           results: dict, prune_id: int,
-                          file_path: str, prune_percent: int) -> tuple[str, str]:
+                          prune_percent: int) -> tuple[str, str]:
         """Very long audio clips can result in latency of transcription.
         Prune long audio clips based on number of segments, audio duration.
         Latency check is specific to each transcriber because of the difference
@@ -270,103 +556,41 @@ class AudioTranscriber(TranscriberInterface):   # pylint: disable=C0115, R0902
             # time_spoken - when current audio record was put into the queue (utc)
             if source_info["last_spoken"] and time_spoken - source_info["last_spoken"] \
                     > datetime.timedelta(seconds=PHRASE_TIMEOUT):
-                source_info["last_sample"] = bytes()
-                source_info["buffer_start_seconds"] = 0.0
+                source_info["audio_buffer"].clear()
                 source_info["new_phrase"] = True
             else:
                 source_info["new_phrase"] = False
 
-            if self.audio_chunk_preprocessor is not None:
-                data = self.audio_chunk_preprocessor(
-                    who_spoke=who_spoke,
-                    data=data,
-                    source_info=source_info,
-                )
-
-            source_info["last_sample"] += data
-            self._trim_audio_buffer_locked(source_info)
+            if data:
+                if self.audio_chunk_preprocessor is not None:
+                    data = self.audio_chunk_preprocessor(
+                        who_spoke=who_spoke,
+                        data=data,
+                        source_info=source_info,
+                    )
+                source_info["audio_buffer"].append(data)
             source_info["last_spoken"] = time_spoken
 
-    def _trim_audio_buffer_locked(self, source_info: dict):
-        """Trim retained audio to the configured rolling live transcription window."""
-        bytes_per_second = self._bytes_per_second(source_info)
-        if bytes_per_second <= 0:
-            return
-
-        frame_size = self._frame_size(source_info)
-        max_bytes = int(self.live_transcription_window_seconds * bytes_per_second)
-        max_bytes -= max_bytes % frame_size
-        if max_bytes <= 0 or len(source_info["last_sample"]) <= max_bytes:
-            return
-
-        trim_bytes = len(source_info["last_sample"]) - max_bytes
-        trim_bytes -= trim_bytes % frame_size
-        if trim_bytes <= 0:
-            return
-
-        source_info["last_sample"] = source_info["last_sample"][trim_bytes:]
-        source_info["buffer_start_seconds"] += trim_bytes / bytes_per_second
-
     def _get_audio_window_seconds(self, source_info: dict) -> tuple[float, float]:
         """Return the retained audio window boundaries in source-relative seconds."""
         with source_info["mutex"]:
-            start_seconds = float(source_info.get("buffer_start_seconds", 0.0))
-            duration_seconds = self._audio_duration_seconds(source_info)
-            return start_seconds, start_seconds + duration_seconds
+            audio_buffer = source_info["audio_buffer"]
+            return audio_buffer.buffer_start_seconds, audio_buffer.buffer_end_seconds
 
-    def _audio_duration_seconds(self, source_info: dict) -> float:
-        bytes_per_second = self._bytes_per_second(source_info)
-        if bytes_per_second <= 0:
-            return 0.0
-        return len(source_info["last_sample"]) / bytes_per_second
+    def _get_audio_window_snapshot(self, source_info: dict) -> tuple[memoryview, float, float]:
+        """Return a read-only view of the retained audio and its window boundaries."""
+        with source_info["mutex"]:
+            audio_buffer = source_info["audio_buffer"]
+            return (audio_buffer.view().toreadonly(), audio_buffer.buffer_start_seconds,
+                    audio_buffer.buffer_end_seconds)
 
     @staticmethod
-    def _frame_size(source_info: dict) -> int:
-        sample_width = int(source_info.get("sample_width", 2))
-        channels = int(source_info.get("target_channels", source_info.get("channels", 1)))
-        return max(sample_width * channels, 1)
-
-    @classmethod
-    def _bytes_per_second(cls, source_info: dict) -> int:
+    def _audio_format(source_info: dict) -> tuple[int, int, int]:
+        """Sample rate, sample width and channels of the retained audio."""
+        sample_rate = int(source_info.get("target_sample_rate", source_info.get("sample_rate", 0)))
         sample_width = int(source_info.get("sample_width", 2))
         channels = int(source_info.get("target_channels", source_info.get("channels", 1)))
-        sample_rate = int(source_info.get("target_sample_rate", source_info.get("sample_rate", 0)))
-        return max(sample_width * channels * sample_rate, 0)
-
-    def process_mic_data(self, data, temp_file_name):
-        """Processes audio data received from the microphone
-        Args:
-            temp_file_name: Name of .wav file to store the data
-        """
-        logger.info(AudioTranscriber.process_mic_data.__name__)
-        if not self.transcribe:
-            return
-
-        p = pyaudio.PyAudio()
-        sample_width = p.get_sample_size(pyaudio.paInt16)
-        frame_rate = int(self.audio_sources_properties["You"]["sample_rate"])
-        audio_data = sr.AudioData(data, frame_rate, sample_width)
-        with open(temp_file_name, 'w+b') as file_handle:
-            file_handle.write(audio_data.get_wav_data())
-        # print(f'filesize: {os.path.getsize(temp_file_name)}')
-
-    def process_speaker_data(self, data, temp_file_name):
-        """Processes audio data received from the speaker
-        Args:
-            temp_file_name: Name of .wav file to store the data
-        """
-        logger.info(AudioTranscriber.process_speaker_data.__name__)
-        if not self.transcribe:
-            return
-        channels = int(self.audio_sources_properties["Speaker"]["channels"])
-        p = pyaudio.PyAudio()
-        sample_width = p.get_sample_size(pyaudio.paInt16)
-        frame_rate = self.audio_sources_properties["Speaker"]["sample_rate"]
-        self.write_wav_data_to_file(data,
-                                    channels=channels,
-                                    sample_width=sample_width,
-                                    frame_rate=frame_rate,
-                                    file_path=temp_file_name)
+        return sample_rate, sample_width, channels
 
     def update_transcript(self, who_spoke, text, time_spoken, update_previous=None):
         """Update transcript with new data
@@ -427,18 +651,21 @@ class AudioTranscriber(TranscriberInterface):   # pylint: disable=C0115, R0902
             self.clear_transcript_data()
             with audio_queue.mutex:
                 audio_queue.queue.clear()
+            for lane in self._lanes.values():
+                with lane.lock:
+                    lane.pending.clear()
 
     def clear_transcript_data(self):
         """Clears all internal data associated with the transcript
         """
-        self.audio_sources_properties["You"]["last_sample"] = bytes()
-        self.audio_sources_properties["Speaker"]["last_sample"] = bytes()
-        self.audio_sources_properties["You"]["buffer_start_seconds"] = 0.0
-        self.audio_sources_properties["Speaker"]["buffer_start_seconds"] = 0.0
-
-        self.audio_sources_properties["You"]["new_phrase"] = True
-        self.audio_sources_properties["Speaker"]["new_phrase"] = True
+        for source_info in self.audio_sources_properties.values():
+            with source_info["mutex"]:
+                source_info["audio_buffer"].clear()
+                source_info["new_phrase"] = True
         self.live_transcript_manager.clear()
+        if self.voice_activity_gate is not None:
+            self.voice_activity_gate.reset()
+        self._reset_audio_chunk_preprocessor()
 
         self.conversation.clear_conversation_data()
 
@@ -544,7 +771,7 @@ class WhisperTranscriber(AudioTranscriber):
 
     def prune_for_latency(self, who_spoke: str, original_data_size: int,
                           results: dict, prune_id: int,
-                          file_path: str, prune_percent: int):
+                          prune_percent: int):
         """Prune Audio clip to a smaller size based on size.
         Adjusts the application context based on pruning to reflect pruning.
         """
@@ -556,34 +783,18 @@ class WhisperTranscriber(AudioTranscriber):
         source_info = self.audio_sources_properties[who_spoke]
 
         with source_info["mutex"]:
+            audio_buffer = source_info["audio_buffer"]
             # Concurrency check
-            if len(source_info["last_sample"]) != original_data_size:
+            if len(audio_buffer) != original_data_size:
                 logger.info(f'Aborting pruning. Data Size has changed from '
-                                 f'{original_data_size} to '
-                                 f'{len(source_info["last_sample"])}')
+                            f'{original_data_size} to '
+                            f'{len(audio_buffer)}')
                 return
 
-            # Open the wav file
-            with wave.open(file_path, 'rb') as wavfile:
-
-                # Get the number of frames
-                num_frames = wavfile.getnframes()
-                save_frames = int(num_frames * prune_percent)
-                logger.info(f'File {file_path} has {num_frames} frames.'
-                                 f' We will save the last {save_frames} frames.')
-                new_data = b""
-
-                with io.BytesIO() as temp_wav_file:
-                    with wave.open(temp_wav_file, "wb") as wav_writer:
-                        wav_writer.setnchannels(wavfile.getnchannels())  # pylint: disable=E1101
-                        wav_writer.setsampwidth(wavfile.getsampwidth())  # pylint: disable=E1101
-                        wav_writer.setframerate(wavfile.getframerate())  # pylint: disable=E1101
-                        wavfile.setpos(save_frames)
-                        data = wavfile.readframes(num_frames - int(save_frames))
-                        new_data = new_data + data
-                        wav_writer.writeframes(data)  # pylint: disable=E1101
-
-            source_info["last_sample"] = new_data
+            # Pruning moves the head of the window, retained audio is not copied
+            dropped_bytes = audio_buffer.drop_fraction(prune_percent)
+            logger.info(f'Dropped the first {dropped_bytes} of {original_data_size} bytes '
+                        f'of audio.')
 
         logger.info(f'Prune convo object until prune id: {prune_id}')
         try:
@@ -628,40 +839,7 @@ class WhisperCPPTranscriber(AudioTranscriber):
         self.audio_sources_properties["You"]["target_channels"] = 1
         self.audio_sources_properties["Speaker"]["target_sample_rate"] = 16000
         self.audio_sources_properties["Speaker"]["target_channels"] = 1
-
-    def process_speaker_data(self, data, temp_file_name):
-        """Processes audio data received from the speaker.
-        Args:
-            temp_file_name: Name of .wav file to store the data
-        """
-        logger.info(AudioTranscriber.process_speaker_data.__name__)
-        if not self.transcribe:
-            return
-        # print(f'filesize: {os.path.getsize(temp_file_name)}')
-        with wave.open(temp_file_name, 'wb') as wf:
-            # print(f'{datetime.datetime.now()} - Writing speaker data into file: {temp_file_name}')
-            wf.setnchannels(self.audio_sources_properties["Speaker"]["target_channels"])    # pylint: disable=E1101
-            p = pyaudio.PyAudio()
-            wf.setsampwidth(p.get_sample_size(pyaudio.paInt16))    # pylint: disable=E1101
-            wf.setframerate(self.audio_sources_properties["Speaker"]["target_sample_rate"])    # pylint: disable=E1101
-            wf.writeframes(data)    # pylint: disable=E1101
-            # print(f'datasize: {len(data)}')
-        # print(f'filesize: {os.path.getsize(temp_file_name)}')
-
-    def process_mic_data(self, data, temp_file_name):
-        """Processes audio data received from the microphone
-        Args:
-            temp_file_name: Name of .wav file to store the data
-        """
-        logger.info(AudioTranscriber.process_mic_data.__name__)
-        if not self.transcribe:
-            return
-
-        audio_data = sr.AudioData(data, self.audio_sources_properties["You"]["target_sample_rate"],
-                                  self.audio_sources_properties["You"]["sample_width"])
-        with open(temp_file_name, 'w+b') as file_handle:
-            file_handle.write(audio_data.get_wav_data())
-        # print(f'filesize: {os.path.getsize(temp_file_name)}')
+        self._configure_audio_buffers()
 
     def check_for_latency(self, results: dict) -> tuple[bool, int, float]:
         """Very long audio clips can result in latency of transcription.
@@ -744,7 +922,7 @@ class WhisperCPPTranscriber(AudioTranscriber):
 
     def prune_for_latency(self, who_spoke: str, original_data_size: int,
                           results: dict, prune_id: int,
-                          file_path: str, prune_percent: int) -> tuple[str, str]:
+                          prune_percent: int) -> tuple[str, str]:
         """Prune Audio clip to a smaller size based on size.
         Adjusts the application context based on pruning to reflect pruning.
         """
@@ -756,34 +934,19 @@ class WhisperCPPTranscriber(AudioTranscriber):
         logger.info(f'prune_for_latency: Prune source data by {prune_percent}%. ')
         source_info = self.audio_sources_properties[who_spoke]
 
-        with source_info['mutex']:
+        with source_info["mutex"]:
+            audio_buffer = source_info["audio_buffer"]
             # Concurrency check
-            if len(source_info['last_sample']) != original_data_size:
+            if len(audio_buffer) != original_data_size:
                 logger.info(f'Aborting pruning. Data Size has changed from '
-                                 f'{original_data_size} to '
-                                 f'{len(source_info["last_sample"])}')
+                            f'{original_data_size} to '
+                            f'{len(audio_buffer)}')
                 return
 
-            # Open the wav file
-            with wave.open(file_path, 'rb') as wavfile:
-                # Get the number of frames
-                num_frames = wavfile.getnframes()
-                save_frames = int(num_frames * prune_percent)
-                logger.info(f'File {file_path} has {num_frames} frames.'
-                                 f' We will save the last {save_frames} frames.')
-                new_data = b""
-
-                with io.BytesIO() as temp_wav_file:
-                    with wave.open(temp_wav_file, "wb") as wav_writer:
-                        wav_writer.setnchannels(wavfile.getnchannels())  # pylint: disable=E1101
-                        wav_writer.setsampwidth(wavfile.getsampwidth())  # pylint: disable=E1101
-                        wav_writer.setframerate(wavfile.getframerate())  # pylint: disable=E1101
-                        wavfile.setpos(save_frames)
-                        data = wavfile.readframes(num_frames - int(save_frames))
-                        new_data = new_data + data
-                        wav_writer.writeframes(data)  # pylint: disable=E1101
-
-            source_info['last_sample'] = new_data
+            # Pruning moves the head of the window, retained audio is not copied
+            dropped_bytes = audio_buffer.drop_fraction(prune_percent)
+            logger.info(f'Dropped the first {dropped_bytes} of {original_data_size} bytes '
+                        f'of audio.')
 
         logger.info(f'Prune convo object until prune id: {prune_id}')
         try:
@@ -867,7 +1030,7 @@ class DeepgramTranscriber(AudioTranscriber):
 
     def prune_for_latency(self, who_spoke: str, original_data_size: int,
                           results: dict, prune_id: int,
-                          file_path: str, prune_percent: int):
+                          prune_percent: int):
         """Prune Audio clip to a smaller size based on size.
         Adjusts the application context based on pruning to reflect pruning.
         """
@@ -876,35 +1039,19 @@ class DeepgramTranscriber(AudioTranscriber):
         logger.info(f'prune_for_latency: Prune source data by {prune_percent}%. ')
         source_info = self.audio_sources_properties[who_spoke]
 
-        with source_info['mutex']:
+        with source_info["mutex"]:
+            audio_buffer = source_info["audio_buffer"]
             # Concurrency check
-            if len(source_info['last_sample']) != original_data_size:
+            if len(audio_buffer) != original_data_size:
                 logger.info(f'Aborting pruning. Data Size has changed from '
-                                 f'{original_data_size} to '
-                                 f'{len(source_info["last_sample"])}')
+                            f'{original_data_size} to '
+                            f'{len(audio_buffer)}')
                 return
 
-            # Open the wav file
-            with wave.open(file_path, 'rb') as wavfile:
-
-                # Get the number of frames
-                num_frames = wavfile.getnframes()
-                save_frames = int(num_frames * prune_percent)
-                logger.info(f'File {file_path} has {num_frames} frames.'
-                                 f' We will save the last {save_frames} frames.')
-                new_data = b""
-
-                with io.BytesIO() as temp_wav_file:
-                    with wave.open(temp_wav_file, "wb") as wav_writer:
-                        wav_writer.setnchannels(wavfile.getnchannels())  # pylint: disable=E1101
-                        wav_writer.setsampwidth(wavfile.getsampwidth())  # pylint: disable=E1101
-                        wav_writer.setframerate(wavfile.getframerate())  # pylint: disable=E1101
-                        wavfile.setpos(save_frames)
-                        data = wavfile.readframes(num_frames - int(save_frames))
-                        new_data = new_data + data
-                        wav_writer.writeframes(data)  # pylint: disable=E1101
-
-            source_info['last_sample'] = new_data
+            # Pruning moves the head of the window, retained audio is not copied
+            dropped_bytes = audio_buffer.drop_fraction(prune_percent)
+            logger.info(f'Dropped the first {dropped_bytes} of {original_data_size} bytes '
+                        f'of audio.')
 
         try:
             logger.info(f'Prune convo object until prune id: {prune_id}')
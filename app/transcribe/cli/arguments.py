@@ -66,12 +66,28 @@ def create_args() -> argparse.Namespace:
         default=None,
         help="Transcribe the given audio file to generate text.\nThis option respects the -m (model) option.\nOutput is produced in transcription.txt or file specified using the -o option.",
     )
+    cmd_args.add_argument(
+        "-td",
+        "--transcribe-dir",
+        dest="transcribe_dir",
+        action="store",
+        default=None,
+        help="Transcribe all audio files in the given directory and its subdirectories.\nThe model is loaded once for all files. Output is produced in the transcripts\nsubdirectory or the directory specified using the -o option.\nFiles completed by an earlier run are skipped.",
+    )
+    cmd_args.add_argument(
+        "-tw",
+        "--transcribe_workers",
+        action="store",
+        default=None,
+        type=int,
+        help="Number of workers used by the -t and -td options.\nDefault is batch_transcription_workers in parameters.yaml.",
+    )
     cmd_args.add_argument(
         "-o",
         "--output_file",
         action="store",
         default=None,
-        help="Generate output in this file.\nThis option is valid only for the -t (transcribe) option.",
+        help="Generate output in this file.\nThis option is valid only for the -t (transcribe) option.\nFor the -td option this is the output directory.",
     )
     cmd_args.add_argument(
         "-m",
@@ -137,3 +153,6 @@ def update_args_config(args: argparse.Namespace, config: dict):
 
     if args.speech_to_text is not None:
         config["General"]["stt"] = args.speech_to_text
+
+    if args.transcribe_workers is not None:
+        config["General"]["batch_transcription_workers"] = int(args.transcribe_workers)
@@ -11,6 +11,8 @@ from sdk import audio_recorder as ar
 
 from .. import interactions
 from ..providers.stt import convert_audio_to_16khz, create_stt_model
+from .chunked import DEFAULT_CHUNK_SECONDS, transcribe_file_in_chunks
+from .directory import transcribe_directory
 
 from tsutils import configuration, duration, utilities
 
@@ -36,6 +38,10 @@ def handle_batch_tasks(args, config: dict) -> bool:
         transcribe_audio_file(args=args, config=config)
         return True
 
+    if args.transcribe_dir is not None:
+        transcribe_audio_directory(args=args, config=config)
+        return True
+
     return False
 
 
@@ -72,6 +78,22 @@ def transcribe_audio_file(args, config: dict):
         print(f"{args.transcribe} file size {utilities.naturalsize(os.path.getsize(args.transcribe))}.")
         print(f"Text output will be produced in {safe_filename}.")
 
+        chunk_seconds = float(config["General"].get("batch_transcription_chunk_seconds", DEFAULT_CHUNK_SECONDS))
+        if chunk_seconds > 0:
+            result = transcribe_file_in_chunks(
+                file_path=args.transcribe,
+                output_file=safe_filename,
+                stt_name=stt_name,
+                config=config,
+                use_api=use_api,
+            )
+            if result.sentences > 0:
+                print("Complete!")
+                return
+            print("Error during Transcription!")
+            print(f"Please ensure {args.transcribe} is an audio file.")
+            raise SystemExit(1)
+
         file_path = args.transcribe
         temp_file_path = None
         try:
@@ -97,6 +119,24 @@ def transcribe_audio_file(args, config: dict):
         raise SystemExit(1)
 
 
+def transcribe_audio_directory(args, config: dict):
+    """Transcribe every audio file in a directory without starting the desktop runtime."""
+    if not os.path.isdir(args.transcribe_dir):
+        print(f"{args.transcribe_dir} is not a directory.")
+        raise SystemExit(1)
+
+    with duration.Duration(name="Transcription", log=False, screen=True):
+        counts = transcribe_directory(
+            directory=args.transcribe_dir,
+            output_directory=args.output_file,
+            stt_name=config["General"]["stt"],
+            config=config,
+            use_api=bool(config["General"]["use_api"]),
+        )
+    if counts["failed"] > 0:
+        raise SystemExit(1)
+
+
 def save_api_key(api_key: str):
     """Persist the API key to the override configuration."""
     yml = configuration.Config()
@@ -0,0 +1,303 @@
+"""Chunked parallel transcription of long audio files for the batch CLI."""
+
+from __future__ import annotations
+
+import datetime
+import math
+import os
+import wave
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+import numpy as np
+
+from ..live_transcription import LiveTranscriptManager
+from ..providers.stt import convert_audio_to_16khz, create_stt_model
+from sdk.transcription_result import TranscriptSegment
+
+
+DEFAULT_CHUNK_SECONDS = 30
+DEFAULT_OVERLAP_SECONDS = 1.0
+# Cut points are placed at the quietest frame within this many seconds before the target length
+DEFAULT_SILENCE_SEARCH_SECONDS = 5.0
+DEFAULT_BATCH_WORKERS = 2
+ENERGY_FRAME_SECONDS = 0.03
+READ_BLOCK_FRAMES = 65536
+
+# Model of the current pool worker process
+_worker_model = None
+
+
+@dataclass(frozen=True)
+class AudioChunk:
+    """A slice of the input file. Neighbouring chunks share overlap_seconds of audio
+    on either side of the cut between their cores."""
+
+    index: int
+    start_seconds: float
+    end_seconds: float
+    core_start_seconds: float
+    core_end_seconds: float
+
+
+def frame_energies(wav_path: str, frame_seconds: float = ENERGY_FRAME_SECONDS) -> tuple[np.ndarray, float]:
+    """RMS energy of consecutive frames of a 16 bit mono wav file and the file duration.
+    The file is read in blocks, so only the energies are held in memory."""
+    energies = []
+    with wave.open(wav_path, "rb") as wav_reader:
+        if wav_reader.getsampwidth() != 2 or wav_reader.getnchannels() != 1:
+            raise ValueError("Chunked transcription requires 16 bit mono audio")
+        sample_rate = wav_reader.getframerate()
+        frame_size = max(int(sample_rate * frame_seconds), 1)
+        duration_seconds = wav_reader.getnframes() / sample_rate
+        remainder = np.zeros(0, dtype=np.int16)
+        while True:
+            block = wav_reader.readframes(READ_BLOCK_FRAMES)
+            if not block:
+                break
+            samples = np.concatenate((remainder, np.frombuffer(block, dtype="<i2")))
+            count = len(samples) // frame_size
+            frames = samples[:count * frame_size].reshape(count, frame_size).astype(np.float32)
+            energies.append(np.sqrt(np.mean(frames * frames, axis=1)))
+            remainder = samples[count * frame_size:]
+    if not energies:
+        return np.zeros(0, dtype=np.float32), duration_seconds
+    return np.concatenate(energies), duration_seconds
+
+
+def plan_chunks(energies: np.ndarray, frame_seconds: float, duration_seconds: float,
+                chunk_seconds: float = DEFAULT_CHUNK_SECONDS,
+                overlap_seconds: float = DEFAULT_OVERLAP_SECONDS,
+                search_seconds: float = DEFAULT_SILENCE_SEARCH_SECONDS) -> list[AudioChunk]:
+    """Split the file at the quietest point before every chunk_seconds of audio."""
+    chunk_seconds = max(float(chunk_seconds), 1.0)
+    cuts = [0.0]
+    while duration_seconds - cuts[-1] > chunk_seconds:
+        target = cuts[-1] + chunk_seconds
+        earliest = cuts[-1] + max(chunk_seconds - search_seconds, chunk_seconds / 2)
+        first_frame = int(earliest / frame_seconds)
+        window = energies[first_frame:int(target / frame_seconds) + 1]
+        cut = (first_frame + int(np.argmin(window))) * frame_seconds if len(window) else target
+        cuts.append(cut)
+    cuts.append(duration_seconds)
+    return [
+        AudioChunk(
+            index=index,
+            start_seconds=max(core_start - overlap_seconds, 0.0),
+            end_seconds=min(core_end + overlap_seconds, duration_seconds),
+            core_start_seconds=core_start,
+            core_end_seconds=core_end,
+        )
+        for index, (core_start, core_end) in enumerate(zip(cuts, cuts[1:]))
+    ]
+
+
+def read_chunk_pcm(wav_path: str, chunk: AudioChunk) -> tuple[bytes, int]:
+    """Read the audio of a single chunk. Returns the PCM data and its sample rate."""
+    with wave.open(wav_path, "rb") as wav_reader:
+        sample_rate = wav_reader.getframerate()
+        first_frame = int(round(chunk.start_seconds * sample_rate))
+        wav_reader.setpos(min(first_frame, wav_reader.getnframes()))
+        frame_count = int(round(chunk.end_seconds * sample_rate)) - first_frame
+        return wav_reader.readframes(max(frame_count, 0)), sample_rate
+
+
+def transcribe_chunk(model, wav_path: str, chunk: AudioChunk) -> list:
+    """Transcribe one chunk. Returns its segments with timestamps relative to the file."""
+    pcm, sample_rate = read_chunk_pcm(wav_path, chunk)
+    response = model.get_transcription_from_pcm(memoryview(pcm), sample_rate=sample_rate,
+                                                width=2, channels=1)
+    if not response or model.process_response(response) == "":
+        return []
+    hypothesis = model.normalize_response(response, audio_start_seconds=chunk.start_seconds,
+                                          audio_end_seconds=chunk.end_seconds)
+    return sorted(hypothesis.segments, key=lambda segment: segment.start_seconds)
+
+
+def _init_process_worker(stt_name: str, config: dict, use_api: bool):
+    global _worker_model  # pylint: disable=global-statement
+    _worker_model = create_stt_model(name=stt_name, config=config, api=use_api)
+
+
+def _transcribe_chunk_in_process(wav_path: str, chunk: AudioChunk) -> list:
+    return transcribe_chunk(_worker_model, wav_path, chunk)
+
+
+def format_sentence(start_seconds: float, end_seconds: float, text: str) -> str:
+    """Format a sentence like the batch output of WhisperSTTModel.get_sentences."""
+    start = str(datetime.timedelta(seconds=int(start_seconds)))
+    end = str(datetime.timedelta(seconds=int(end_seconds)))
+    return f"{start} - {end}: {text}"
+
+
+class ChunkStitcher:
+    """Write chunk results in file order as soon as all earlier chunks are complete.
+
+    Segments in the audio shared by two neighbouring chunks are transcribed
+    twice. They are held back until the next chunk completes and merged with
+    the same overlap logic used for live transcription windows.
+    """
+
+    def __init__(self, chunks: list[AudioChunk], overlap_seconds: float, write_sentence):
+        self._chunks = chunks
+        self.overlap_seconds = float(overlap_seconds)
+        self._write_sentence = write_sentence
+        self._results = {}
+        self._next_index = 0
+        self._tail = []
+        self.sentences_written = 0
+
+    def add(self, index: int, segments: list):
+        """Add the segments of a completed chunk."""
+        self._results[index] = segments
+        while self._next_index in self._results:
+            self._emit(self._chunks[self._next_index], self._results.pop(self._next_index))
+            self._next_index += 1
+
+    def finish(self):
+        """Write segments still held back from the last chunk."""
+        for segment in self._tail:
+            self._write(segment.start_seconds, segment.end_seconds, segment.text)
+        self._tail = []
+
+    def _emit(self, chunk: AudioChunk, segments: list):
+        segments = [segment for segment in segments if segment.text.strip()]
+        if chunk.index > 0:
+            head_end = chunk.core_start_seconds + self.overlap_seconds
+            head_count = 0
+            while head_count < len(segments) and segments[head_count].start_seconds < head_end:
+                head_count += 1
+            merged = self._merge(self._tail, segments[:head_count])
+            segments = ([merged] if merged else []) + segments[head_count:]
+
+        tail_start = len(segments)
+        if chunk.index < len(self._chunks) - 1:
+            tail_after = chunk.core_end_seconds - self.overlap_seconds
+            while tail_start > 0 and segments[tail_start - 1].end_seconds > tail_after:
+                tail_start -= 1
+        for segment in segments[:tail_start]:
+            self._write(segment.start_seconds, segment.end_seconds, segment.text)
+        self._tail = segments[tail_start:]
+
+    @staticmethod
+    def _merge(tail: list, head: list) -> TranscriptSegment | None:
+        """Merge segments transcribed twice from the audio shared by two chunks."""
+        segments = tail + head
+        if not segments:
+            return None
+        text = LiveTranscriptManager._merge_text(  # pylint: disable=protected-access
+            " ".join(segment.text for segment in tail),
+            " ".join(segment.text for segment in head),
+        )
+        return TranscriptSegment(
+            id=segments[0].id,
+            start_seconds=min(segment.start_seconds for segment in segments),
+            end_seconds=max(segment.end_seconds for segment in segments),
+            text=text,
+        )
+
+    def _write(self, start_seconds: float, end_seconds: float, text: str):
+        if text:
+            self._write_sentence(format_sentence(start_seconds, end_seconds, text.strip()))
+            self.sentences_written += 1
+
+
+def uses_process_pool(stt_name: str, use_api: bool) -> bool:
+    """Local models run in separate processes. API and server based models take
+    concurrent requests from threads."""
+    return not use_api and stt_name.lower() in ("whisper", "sensevoice")
+
+
+@dataclass(frozen=True)
+class ChunkedTranscriptionResult:
+    """Outcome of transcribing one file in chunks."""
+
+    sentences: int
+    audio_seconds: float
+    chunks: int
+    chunks_failed: int
+
+
+class ChunkTranscriptionPool:
+    """Workers that transcribe chunks. The STT model is loaded once per pool,
+    or once per worker process for local models, and reused for every file."""
+
+    def __init__(self, stt_name: str, config: dict, use_api: bool, workers: int | None = None):
+        general = config.get("General", {})
+        if workers is None:
+            workers = general.get("batch_transcription_workers", DEFAULT_BATCH_WORKERS)
+        self.workers = max(int(workers), 1)
+        self._model = None
+        if uses_process_pool(stt_name, use_api):
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 initializer=_init_process_worker,
+                                                 initargs=(stt_name, config, use_api))
+        else:
+            self._model = create_stt_model(name=stt_name, config=config, api=use_api)
+            self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                thread_name_prefix="BatchTranscribe")
+
+    def submit(self, wav_path: str, chunk: AudioChunk):
+        if self._model is None:
+            return self._executor.submit(_transcribe_chunk_in_process, wav_path, chunk)
+        return self._executor.submit(transcribe_chunk, self._model, wav_path, chunk)
+
+    def shutdown(self):
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+
+def transcribe_file_in_chunks(file_path: str, output_file: str, stt_name: str,
+                              config: dict, use_api: bool,
+                              pool: ChunkTranscriptionPool | None = None) -> ChunkedTranscriptionResult:
+    """Transcribe a long audio file in parallel chunks and stream sentences to output_file.
+    A pool is created for the file when none is given."""
+    general = config.get("General", {})
+    chunk_seconds = float(general.get("batch_transcription_chunk_seconds", DEFAULT_CHUNK_SECONDS))
+    overlap_seconds = float(general.get("batch_transcription_overlap_seconds", DEFAULT_OVERLAP_SECONDS))
+    if chunk_seconds <= 0:
+        # Whole file as a single chunk
+        chunk_seconds = math.inf
+
+    owns_pool = pool is None
+    wav_path = convert_audio_to_16khz(file_path)
+    try:
+        if owns_pool:
+            pool = ChunkTranscriptionPool(stt_name, config, use_api)
+        energies, duration_seconds = frame_energies(wav_path)
+        chunks = plan_chunks(energies, ENERGY_FRAME_SECONDS, duration_seconds,
+                             chunk_seconds=chunk_seconds, overlap_seconds=overlap_seconds)
+        print(f"Transcribing {file_path} in {len(chunks)} chunks using {pool.workers} workers.")
+
+        chunks_failed = 0
+        with open(output_file, encoding="utf-8", mode="w") as file_handle:
+            def write_sentence(sentence: str):
+                file_handle.write(f"{sentence}\n")
+                file_handle.flush()
+
+            stitcher = ChunkStitcher(chunks, overlap_seconds, write_sentence)
+            futures = {pool.submit(wav_path, chunk): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    segments = future.result()
+                except Exception as exception:
+                    print(f"[ERROR] Failed to transcribe audio from {chunk.start_seconds:.1f} to "
+                          f"{chunk.end_seconds:.1f} seconds: {exception}")
+                    segments = []
+                    chunks_failed += 1
+                stitcher.add(chunk.index, segments)
+            stitcher.finish()
+        return ChunkedTranscriptionResult(sentences=stitcher.sentences_written,
+                                          audio_seconds=duration_seconds,
+                                          chunks=len(chunks), chunks_failed=chunks_failed)
+    finally:
+        if owns_pool and pool is not None:
+            pool.shutdown()
+        if os.path.exists(wav_path):
+            os.unlink(wav_path)
@@ -0,0 +1,125 @@
+"""Transcription of every audio file in a directory with a resumable manifest."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .chunked import ChunkTranscriptionPool, transcribe_file_in_chunks
+
+
+AUDIO_FILE_EXTENSIONS = (".wav", ".mp3", ".m4a", ".flac", ".ogg", ".opus", ".aac", ".wma",
+                         ".aif", ".aiff", ".webm", ".mp4")
+MANIFEST_FILE_NAME = "transcription_manifest.json"
+MANIFEST_VERSION = 1
+CHECKSUM_BLOCK_BYTES = 1024 * 1024
+
+
+def find_audio_files(directory: str) -> list[str]:
+    """Audio files in directory and its subdirectories, relative to directory."""
+    audio_files = []
+    for root, _, file_names in os.walk(directory):
+        for file_name in file_names:
+            if file_name.lower().endswith(AUDIO_FILE_EXTENSIONS):
+                audio_files.append(os.path.relpath(os.path.join(root, file_name), directory))
+    return sorted(audio_files)
+
+
+def file_checksum(file_path: str) -> str:
+    """SHA-256 of the file contents."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file_handle:
+        for block in iter(lambda: file_handle.read(CHECKSUM_BLOCK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class TranscriptionManifest:
+    """JSON record of transcribed files. Every update is written to disk, so an
+    interrupted run can be resumed."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.files = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file_handle:
+                self.files = json.load(file_handle).get("files", {})
+
+    def is_completed(self, relative_path: str, checksum: str, output_file: str) -> bool:
+        with self._lock:
+            entry = self.files.get(relative_path, {})
+        return (entry.get("status") == "completed" and entry.get("sha256") == checksum
+                and os.path.exists(output_file))
+
+    def record(self, relative_path: str, entry: dict):
+        with self._lock:
+            self.files[relative_path] = entry
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, encoding="utf-8", mode="w") as file_handle:
+                json.dump({"version": MANIFEST_VERSION, "files": self.files}, file_handle, indent=2)
+            os.replace(temp_path, self.path)
+
+
+def transcribe_directory(directory: str, output_directory: str | None, stt_name: str,
+                         config: dict, use_api: bool, workers: int | None = None) -> dict:
+    """Transcribe all audio files in directory. Files completed by an earlier run with
+    the same contents are skipped. Returns counts of completed, skipped and failed files."""
+    if output_directory is None:
+        output_directory = os.path.join(directory, "transcripts")
+    os.makedirs(output_directory, exist_ok=True)
+    manifest = TranscriptionManifest(os.path.join(output_directory, MANIFEST_FILE_NAME))
+    audio_files = find_audio_files(directory)
+    counts = {"completed": 0, "skipped": 0, "failed": 0}
+    counts_lock = threading.Lock()
+    print(f"Found {len(audio_files)} audio files in {directory}.")
+
+    with ChunkTranscriptionPool(stt_name, config, use_api, workers) as pool:
+        def transcribe_one(relative_path: str):
+            input_file = os.path.join(directory, relative_path)
+            output_file = os.path.join(output_directory, relative_path + ".txt")
+            # The checksum is unknown when the file cannot be read
+            entry = {"sha256": None, "output": os.path.relpath(output_file, output_directory)}
+            started = time.monotonic()
+            try:
+                entry["sha256"] = file_checksum(input_file)
+                if manifest.is_completed(relative_path, entry["sha256"], output_file):
+                    with counts_lock:
+                        counts["skipped"] += 1
+                    return
+
+                os.makedirs(os.path.dirname(output_file), exist_ok=True)
+                result = transcribe_file_in_chunks(input_file, output_file, stt_name, config,
+                                                   use_api, pool=pool)
+                elapsed_seconds = time.monotonic() - started
+                real_time_factor = elapsed_seconds / result.audio_seconds if result.audio_seconds else 0.0
+                entry.update(
+                    status="failed" if result.chunks_failed else "completed",
+                    audio_seconds=round(result.audio_seconds, 3),
+                    elapsed_seconds=round(elapsed_seconds, 3),
+                    real_time_factor=round(real_time_factor, 4),
+                    sentences=result.sentences,
+                )
+                if result.chunks_failed:
+                    entry["error"] = f"{result.chunks_failed} of {result.chunks} chunks failed"
+                print(f"{relative_path}: {result.audio_seconds:.1f} seconds of audio in "
+                      f"{elapsed_seconds:.1f} seconds. Real time factor {real_time_factor:.3f}.")
+            except Exception as exception:
+                entry.update(status="failed", error=str(exception),
+                             elapsed_seconds=round(time.monotonic() - started, 3))
+                print(f"[ERROR] Failed to transcribe {relative_path}: {exception}")
+            manifest.record(relative_path, entry)
+            with counts_lock:
+                counts[entry["status"]] += 1
+
+        # Files are started in parallel so the chunk workers stay busy between files
+        with ThreadPoolExecutor(max_workers=pool.workers, thread_name_prefix="TranscribeFile") as executor:
+            list(executor.map(transcribe_one, audio_files))
+
+    print(f"Completed {counts['completed']}, skipped {counts['skipped']} and "
+          f"failed {counts['failed']} files. Manifest: {manifest.path}")
+    return counts
@@ -2,12 +2,14 @@
 
 from __future__ import annotations
 
-from heapq import merge
 import datetime
 import threading
+from collections import deque
+from dataclasses import dataclass
 from pathlib import Path
 
 from .. import constants
+from .conversation_store import ConversationStore
 from ..db import AppDB as appdb
 from ..db import conversation as convodb
 from ..db import llm_responses as llmrdb
@@ -17,22 +19,60 @@ from tsutils import configuration
 
 APP_DIR = Path(__file__).resolve().parent.parent
 
+CHANGE_INSERT = "insert"
+CHANGE_UPDATE = "update"
+CHANGE_CLEAR = "clear"
+
+
+@dataclass(frozen=True)
+class ConversationChange:
+    """One change of the conversation rows, sent to change listeners.
+
+    Attributes:
+        version: Version of the conversation after the change, increases by one per change.
+        action: CHANGE_INSERT, CHANGE_UPDATE or CHANGE_CLEAR.
+        persona: Persona of the changed row, None for CHANGE_CLEAR.
+        row_key: Key of the changed row, stable until the conversation is cleared.
+        text: Row text as displayed in the UI.
+        partial_id: Provider partial row replaced by an inserted row.
+    """
+    version: int
+    action: str
+    persona: str | None = None
+    row_key: str | None = None
+    text: str | None = None
+    partial_id: str | None = None
+
 
 class Conversation:
     """Encapsulates the complete conversation state for the application."""
 
+    # Personas of the prompt history sent to the LLM
+    _DIALOG_PERSONAS = (constants.PERSONA_YOU, constants.PERSONA_SPEAKER, constants.PERSONA_ASSISTANT)
+
     def __init__(self, context):
-        self.transcript_data = {
-            constants.PERSONA_SYSTEM: [],
-            constants.PERSONA_YOU: [],
-            constants.PERSONA_SPEAKER: [],
-            constants.PERSONA_ASSISTANT: [],
-        }
+        # Rows spoken at the same time are merged in this persona order
+        self._store = ConversationStore([
+            constants.PERSONA_YOU,
+            constants.PERSONA_SPEAKER,
+            constants.PERSONA_ASSISTANT,
+            constants.PERSONA_SYSTEM,
+        ])
+        # Rows per persona, owned by the store
+        self.transcript_data = self._store.rows
         self.last_update: datetime.datetime | None = None
         self.update_handler = None
         self.insert_handler = None
         self.partial_handler = None
         self.finalize_partial_handler = None
+        self.version = 0
+        self._change_listeners = []
+        # Changes waiting to be sent to the listeners, in version order
+        self._pending_changes: deque = deque()
+        # Held while changes are sent, listeners are called without the conversation locked
+        self._notify_lock = threading.RLock()
+        # Row keys of earlier generations are never reused after a clear
+        self._generation = 0
         self.context = context
         self._initialized = False
         self._lock = threading.RLock()
@@ -46,6 +86,89 @@ class Conversation:
             self.partial_handler = partial
             self.finalize_partial_handler = finalize_partial
 
+    def add_change_listener(self, listener):
+        """Register a callable receiving a ConversationChange for every change of the rows.
+        Listeners are called in version order, after the conversation is unlocked."""
+        with self._lock:
+            self._change_listeners.append(listener)
+
+    def remove_change_listener(self, listener):
+        """Stop sending changes to a listener."""
+        with self._lock:
+            if listener in self._change_listeners:
+                self._change_listeners.remove(listener)
+
+    def _emit_change(self, action: str, persona: str | None = None, index: int | None = None,
+                     text: str | None = None, partial_id: str | None = None):
+        """Increment the version and queue the change for the listeners.
+        Called with the conversation locked, _notify_changes sends it once unlocked."""
+        self.version += 1
+        if not self._change_listeners:
+            return
+        self._pending_changes.append(ConversationChange(
+            version=self.version,
+            action=action,
+            persona=persona,
+            row_key=self._row_key(persona, index) if index is not None else None,
+            text=text,
+            partial_id=partial_id,
+        ))
+
+    def _notify_changes(self):
+        """Send the queued changes to the listeners. Called with the conversation unlocked."""
+        with self._notify_lock:
+            while True:
+                with self._lock:
+                    if not self._pending_changes:
+                        return
+                    change = self._pending_changes.popleft()
+                    listeners = list(self._change_listeners)
+                for listener in listeners:
+                    listener(change)
+
+    def _row_key(self, persona: str, index: int) -> str:
+        return f"{self._generation}-{persona}-{index}"
+
+    def _parse_row_key(self, row_key: str) -> tuple[str, int] | None:
+        """Persona and index of a row key of the current generation."""
+        parts = row_key.split("-")
+        if len(parts) != 3 or parts[0] != str(self._generation) or not parts[2].isdigit():
+            return None
+        persona, index = parts[1], int(parts[2])
+        if persona not in self.transcript_data or index >= len(self.transcript_data[persona]):
+            return None
+        return persona, index
+
+    def is_row_key(self, row_key: str) -> bool:
+        """Whether row_key is the key of a row of the conversation, not of a provider partial."""
+        with self._lock:
+            return self._parse_row_key(row_key) is not None
+
+    def get_transcript_rows(self, sources: list, count: int = 0,
+                            before_row_key: str | None = None) -> tuple[int, list[tuple[str, str]]]:
+        """Get the last rows of the given personas in time order, as displayed in the UI.
+
+        Args:
+            sources: Personas of the rows.
+            count: Number of rows, 0 for all rows.
+            before_row_key: Only rows before this row are returned.
+
+        Returns:
+            The conversation version and a list of (row key, text) tuples.
+        """
+        with self._lock:
+            view = self._store.view(sources)
+            end = len(view)
+            if before_row_key is not None:
+                location = self._parse_row_key(before_row_key)
+                if location is None:
+                    return self.version, []
+                end = view.position(*location)
+            start = max(end - count, 0) if count > 0 else 0
+            rows = [(self._row_key(persona, index), row[0][:-1])
+                    for persona, index, row in view.entries(start, end)]
+            return self.version, rows
+
     def initialize_conversation(self):
         """Populate the initial system prompt and seed conversation."""
         self.config = configuration.Config(
@@ -76,29 +199,30 @@ class Conversation:
     def clear_conversation_data(self):
         """Clear all conversation data and restore initial prompts."""
         with self._lock:
-            for persona in self.transcript_data:
-                self.transcript_data[persona].clear()
+            self._store.clear()
+            self._generation += 1
             self._initialized = False
+            self._emit_change(CHANGE_CLEAR)
+        self._notify_changes()
         self.initialize_conversation()
 
     def update_conversation_by_id(self, persona: str, convo_id: int, text: str):
         """Update a single conversation row by its persisted id."""
         with self._lock:
-            transcript = self.transcript_data[persona]
-            for index, (_, time_spoken, current_convo_id) in enumerate(transcript):
-                if current_convo_id == convo_id:
-                    new_convo_text = f"{persona}: [{text}]\n\n"
-                    transcript[index] = (new_convo_text, time_spoken, convo_id)
-                    break
-            else:
+            location = self._store.find_by_id(convo_id)
+            if location is None or location[0] != persona:
                 print(f"Conversation with ID {convo_id} not found for persona {persona}.")
                 return
+            index = location[1]
+            time_spoken = self.transcript_data[persona][index][1]
+            self._store.replace(persona, index, f"{persona}: [{text}]\n\n", time_spoken, convo_id)
+            self._emit_change(CHANGE_UPDATE, persona, index, f"{persona}: [{text}]\n")
 
             should_update_db = self._initialized
 
+        self._notify_changes()
         if should_update_db:
-            convo_object: convodb.Conversations = appdb().get_object(convodb.TABLE_NAME)
-            convo_object.update_conversation(convo_id, text)
+            appdb().get_conversation_writer().update_conversation(convo_id, text)
 
     def update_conversation(
         self,
@@ -109,19 +233,20 @@ class Conversation:
         replace_ui_partial: bool = False,
         partial_id: str | None = None,
     ):
-        """Insert or update a conversation fragment in memory and the database."""
+        """Insert or update a conversation fragment in memory and the database.
+        Database writes are queued to the conversation writer, no database I/O
+        happens while the conversation is locked."""
         callback = None
         callback_args = ()
 
         with self._lock:
             transcript = self.transcript_data[persona]
             convo_id = None
-            convo_object = None
+            convo_writer = None
 
             if self._initialized:
                 inv_id = appdb().get_invocation_id()
-                convo_object = appdb().get_object(convodb.TABLE_NAME)
-                convo_id = convo_object.get_max_convo_id(speaker=persona, inv_id=inv_id)
+                convo_writer = appdb().get_conversation_writer()
 
             convo_text = f"{persona}: [{text}]\n\n"
             ui_text = f"{persona}: [{text}]\n"
@@ -135,10 +260,12 @@ class Conversation:
             )
 
             if should_update_previous:
-                prev_element = transcript.pop()
+                prev_element = self._store.last(persona)
                 time_spoken = prev_element[1]
-                if self._initialized and convo_object is not None:
-                    convo_object.update_conversation(convo_id, text)
+                # The previous row is the last row of the persona in this invocation
+                convo_id = prev_element[2]
+                if self._initialized and convo_writer is not None:
+                    convo_writer.update_conversation(convo_id, text)
                     if persona.lower() != "assistant" and self.update_handler is not None:
                         callback = self.update_handler
                         callback_args = (persona, ui_text)
@@ -147,9 +274,9 @@ class Conversation:
                     self._initialized
                     and persona != constants.PERSONA_SYSTEM
                     and persona != constants.PERSONA_ASSISTANT
-                    and convo_object is not None
+                    and convo_writer is not None
                 ):
-                    convo_id = convo_object.insert_conversation(inv_id, time_spoken, persona, text)
+                    convo_id = convo_writer.insert_conversation(inv_id, time_spoken, persona, text)
                     if replace_ui_partial and partial_id and self.finalize_partial_handler is not None:
                         callback = self.finalize_partial_handler
                         callback_args = (partial_id, ui_text)
@@ -160,9 +287,17 @@ class Conversation:
                         callback = self.insert_handler
                         callback_args = (ui_text,)
 
-            transcript.append((convo_text, time_spoken, convo_id))
+            if should_update_previous:
+                index = len(transcript) - 1
+                self._store.replace(persona, index, convo_text, time_spoken, convo_id)
+                self._emit_change(CHANGE_UPDATE, persona, index, ui_text)
+            else:
+                index = self._store.append(persona, convo_text, time_spoken, convo_id)
+                self._emit_change(CHANGE_INSERT, persona, index, ui_text,
+                                  partial_id=partial_id if replace_ui_partial else None)
             self.last_update = datetime.datetime.utcnow()
 
+        self._notify_changes()
         if callback is not None:
             callback(*callback_args)
 
@@ -201,6 +336,13 @@ class Conversation:
         if cleaned_text and cleaned_text[-1] == "]":
             cleaned_text = cleaned_text[:-1]
 
+        with self._lock:
+            index = self._store.find_by_text(persona, f"{persona}: [{cleaned_text}]")
+            if index is not None:
+                return self.transcript_data[persona][index][2]
+
+        # Rows no longer in memory are looked up in the database, write the queued rows first
+        appdb().get_conversation_writer().flush()
         inv_id = appdb().get_invocation_id()
         convo_object: convodb.Conversations = appdb().get_object(convodb.TABLE_NAME)
         return convo_object.get_convo_id_by_speaker_and_text(
@@ -219,11 +361,10 @@ class Conversation:
         persona = input_text[:end_speaker].strip()
         convo_id = None
         with self._lock:
-            transcript = self.transcript_data[persona]
-            for first, _, third in transcript:
-                if first.strip() == input_text.strip():
-                    convo_id = third
-                    break
+            if persona in self.transcript_data:
+                index = self._store.find_by_text(persona, input_text)
+                if index is not None:
+                    convo_id = self.transcript_data[persona][index][2]
 
         if not convo_id:
             self.context.previous_response = None
@@ -245,36 +386,12 @@ class Conversation:
             ]
 
         with self._lock:
-            combined_transcript = list(
-                merge(
-                    self.transcript_data[constants.PERSONA_YOU][-length:]
-                    if constants.PERSONA_YOU in sources
-                    else [],
-                    self.transcript_data[constants.PERSONA_SPEAKER][-length:]
-                    if constants.PERSONA_SPEAKER in sources
-                    else [],
-                    self.transcript_data[constants.PERSONA_ASSISTANT][-length:]
-                    if constants.PERSONA_ASSISTANT in sources
-                    else [],
-                    self.transcript_data[constants.PERSONA_SYSTEM][-length:]
-                    if constants.PERSONA_SYSTEM in sources
-                    else [],
-                    key=lambda x: x[1],
-                )
-            )
-            combined_transcript = combined_transcript[-length:]
-            return "".join([t[0] for t in combined_transcript])
+            return self._store.view(sources).text(length)
 
     def get_merged_conversation_summary(self, length: int = 0) -> list:
         """Return the conversation history formatted for summary prompts."""
         with self._lock:
-            combined_transcript = (
-                self.transcript_data[constants.PERSONA_YOU][-length:]
-                + self.transcript_data[constants.PERSONA_SPEAKER][-length:]
-                + self.transcript_data[constants.PERSONA_ASSISTANT][-length:]
-            )
-            sorted_transcript = sorted(combined_transcript, key=lambda x: x[1])
-            sorted_transcript = sorted_transcript[-length:]
+            sorted_transcript = self._store.view(self._DIALOG_PERSONAS).rows(length)
             sorted_transcript.insert(0, self.transcript_data[constants.PERSONA_YOU][0])
             sorted_transcript.insert(
                 0,
@@ -289,13 +406,7 @@ class Conversation:
     def get_merged_conversation_response(self, length: int = 0) -> list:
         """Return the conversation history formatted for response prompts."""
         with self._lock:
-            combined_transcript = (
-                self.transcript_data[constants.PERSONA_YOU][-length:]
-                + self.transcript_data[constants.PERSONA_SPEAKER][-length:]
-                + self.transcript_data[constants.PERSONA_ASSISTANT][-length:]
-            )
-            sorted_transcript = sorted(combined_transcript, key=lambda x: x[1])
-            sorted_transcript = sorted_transcript[-length:]
+            sorted_transcript = self._store.view(self._DIALOG_PERSONAS).rows(length)
             sorted_transcript.insert(0, self.transcript_data[constants.PERSONA_YOU][0])
             sorted_transcript.insert(0, self.transcript_data[constants.PERSONA_SYSTEM][0])
             return sorted_transcript
@@ -0,0 +1,220 @@
+"""In-memory rows of the conversation, addressable by id and by text."""
+
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+import datetime
+
+
+class MergedTranscriptView:
+    """Rows of a set of personas in time order, with the joined text cached.
+
+    The view keeps a sorted index of ``(time_spoken, persona rank, row index)``
+    keys, updated by the store as rows are added or replaced. Rows with the same
+    time are ordered by persona rank, then by position. The joined text of all
+    rows is cached with the start offset of every row, a change only rebuilds the
+    text from the first changed row onward.
+    """
+
+    def __init__(self, store: ConversationStore, personas: frozenset[str]):
+        self._store = store
+        self.personas = personas
+        self._order: list[tuple] = []
+        self._text = ""
+        self._offsets: list[int] = []
+        # Number of rows, from the start of _order, included in _text
+        self._valid = 0
+        for persona in personas:
+            rank = store.rank(persona)
+            for index, row in enumerate(store.rows[persona]):
+                self._order.append((row[1], rank, index))
+        self._order.sort()
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def text(self, length: int = 0) -> str:
+        """Joined text of the last length rows, all rows when length is 0."""
+        if 0 < length < len(self._order):
+            if self._valid < len(self._order):
+                # Cheaper than rebuilding the whole tail of the cache
+                return "".join(self._row(key)[0] for key in self._order[-length:])
+            return self._text[self._offsets[-length]:]
+        self._refresh()
+        return self._text
+
+    def rows(self, length: int = 0) -> list[tuple]:
+        """The last length rows in time order, all rows when length is 0."""
+        keys = self._order[-length:] if length > 0 else self._order
+        return [self._row(key) for key in keys]
+
+    def entries(self, start: int = 0, stop: int | None = None) -> list[tuple[str, int, tuple]]:
+        """(persona, row index, row) of the rows at positions start to stop in time order."""
+        personas = self._store.personas
+        return [(personas[key[1]], key[2], self._row(key)) for key in self._order[start:stop]]
+
+    def position(self, persona: str, index: int) -> int:
+        """Position of a row of the store in time order."""
+        key = (self._store.rows[persona][index][1], self._store.rank(persona), index)
+        return bisect_left(self._order, key)
+
+    def added(self, time_spoken, rank: int, index: int):
+        """A row was appended to the store."""
+        key = (time_spoken, rank, index)
+        if not self._order or self._order[-1] < key:
+            self._order.append(key)
+            return
+        insort(self._order, key)
+        self._invalidate(bisect_left(self._order, key))
+
+    def replaced(self, old_time_spoken, new_time_spoken, rank: int, index: int):
+        """The text or time of a row in the store changed."""
+        old_key = (old_time_spoken, rank, index)
+        position = bisect_left(self._order, old_key)
+        if old_time_spoken != new_time_spoken:
+            del self._order[position]
+            new_key = (new_time_spoken, rank, index)
+            insort(self._order, new_key)
+            position = min(position, bisect_left(self._order, new_key))
+        self._invalidate(position)
+
+    def clear(self):
+        self._order.clear()
+        self._text = ""
+        self._offsets.clear()
+        self._valid = 0
+
+    def _row(self, key: tuple) -> tuple:
+        return self._store.rows[self._store.personas[key[1]]][key[2]]
+
+    def _invalidate(self, position: int):
+        self._valid = min(self._valid, position)
+
+    def _refresh(self):
+        if self._valid == len(self._order):
+            return
+        cut = self._offsets[self._valid] if self._valid < len(self._offsets) else len(self._text)
+        del self._offsets[self._valid:]
+        pieces = []
+        offset = cut
+        for key in self._order[self._valid:]:
+            text = self._row(key)[0]
+            self._offsets.append(offset)
+            offset += len(text)
+            pieces.append(text)
+        self._text = self._text[:cut] + "".join(pieces)
+        self._valid = len(self._order)
+
+
+class ConversationStore:
+    """Per-persona rows of the conversation with constant time lookups.
+
+    Rows are ``(convo_text, time_spoken, convo_id)`` tuples appended to one list
+    per persona. Rows are only replaced in place, never removed one by one, so
+    the position of a row in its list never changes. Two indexes are kept:
+    ``convo_id -> (persona, index)`` and ``(persona, formatted text) -> indexes``.
+    Time ordered views of persona sets are kept up to date with the rows.
+
+    Args:
+        personas: Personas of the conversation. Rows of different personas spoken
+            at the same time are ordered as the personas are listed.
+    """
+
+    def __init__(self, personas: list[str]):
+        self.personas = list(personas)
+        self.rows: dict[str, list[tuple]] = {persona: [] for persona in personas}
+        self._ranks = {persona: rank for rank, persona in enumerate(personas)}
+        self._id_index: dict[int, tuple[str, int]] = {}
+        self._text_index: dict[tuple[str, str], list[int]] = {}
+        self._views: dict[frozenset[str], MergedTranscriptView] = {}
+
+    def __len__(self) -> int:
+        return sum(len(rows) for rows in self.rows.values())
+
+    def append(self, persona: str, convo_text: str, time_spoken: datetime.datetime,
+               convo_id: int | None) -> int:
+        """Add a row at the end of the persona's rows. Returns the index of the row."""
+        rows = self.rows[persona]
+        index = len(rows)
+        rows.append((convo_text, time_spoken, convo_id))
+        self._add_to_index(persona, index, convo_text, convo_id)
+        rank = self._ranks[persona]
+        for view in self._views_of(persona):
+            view.added(time_spoken, rank, index)
+        return index
+
+    def replace(self, persona: str, index: int, convo_text: str,
+                time_spoken: datetime.datetime, convo_id: int | None):
+        """Replace the row at index of the persona's rows."""
+        rows = self.rows[persona]
+        old_time_spoken = rows[index][1]
+        self._remove_from_index(persona, index, rows[index])
+        rows[index] = (convo_text, time_spoken, convo_id)
+        self._add_to_index(persona, index, convo_text, convo_id)
+        rank = self._ranks[persona]
+        for view in self._views_of(persona):
+            view.replaced(old_time_spoken, time_spoken, rank, index)
+
+    def last(self, persona: str) -> tuple | None:
+        """Get the last row of the persona, None when there is no row."""
+        rows = self.rows[persona]
+        return rows[-1] if rows else None
+
+    def rank(self, persona: str) -> int:
+        """Position of the persona in the order of rows spoken at the same time."""
+        return self._ranks[persona]
+
+    def view(self, personas) -> MergedTranscriptView:
+        """Get the time ordered view of the rows of the given personas.
+        Unknown personas are ignored. Views are created on first use."""
+        key = frozenset(persona for persona in personas if persona in self._ranks)
+        view = self._views.get(key)
+        if view is None:
+            view = MergedTranscriptView(self, key)
+            self._views[key] = view
+        return view
+
+    def find_by_id(self, convo_id: int) -> tuple[str, int] | None:
+        """Get the persona and index of the row with the given id."""
+        if convo_id is None:
+            return None
+        return self._id_index.get(convo_id)
+
+    def find_by_text(self, persona: str, text: str) -> int | None:
+        """Get the index of the first row of the persona whose formatted text matches.
+        Leading and trailing whitespace is ignored."""
+        indexes = self._text_index.get((persona, text.strip()))
+        return indexes[0] if indexes else None
+
+    def clear(self):
+        """Remove all rows. The per-persona lists are cleared in place."""
+        for rows in self.rows.values():
+            rows.clear()
+        self._id_index.clear()
+        self._text_index.clear()
+        for view in self._views.values():
+            view.clear()
+
+    def _views_of(self, persona: str):
+        return [view for view in self._views.values() if persona in view.personas]
+
+    def _add_to_index(self, persona: str, index: int, convo_text: str, convo_id: int | None):
+        if convo_id is not None:
+            self._id_index[convo_id] = (persona, index)
+        indexes = self._text_index.setdefault((persona, convo_text.strip()), [])
+        # Indexes are kept sorted, rows are mostly appended
+        position = len(indexes)
+        while position > 0 and indexes[position - 1] > index:
+            position -= 1
+        indexes.insert(position, index)
+
+    def _remove_from_index(self, persona: str, index: int, row: tuple):
+        convo_text, _, convo_id = row
+        if convo_id is not None and self._id_index.get(convo_id) == (persona, index):
+            del self._id_index[convo_id]
+        key = (persona, convo_text.strip())
+        indexes = self._text_index.get(key)
+        if indexes is not None:
+            indexes.remove(index)
+            if not indexes:
+                del self._text_index[key]
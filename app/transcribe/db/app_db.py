@@ -1,10 +1,13 @@
 import logging
 import sqlalchemy as sqldb
-from sqlalchemy import Engine
+from sqlalchemy import Engine, event
 
 from . import app_invocations as appi
 from . import conversation as convo
+from .conversation_writer import ConversationWriter
 from . import llm_responses as lresp
+from . import maintenance
+from . import migrations
 from . import summaries as s
 
 from tsutils import Singleton
@@ -12,11 +15,42 @@ from tsutils import Singleton
 # TO DO
 # Handle the case of clearing the conversation
 
+# Version of the schema declared by the table classes, the version of the latest migration.
+# Stored in the SQLite user_version of the database. Table schemas are not read from the
+# database when the versions match.
+SCHEMA_VERSION = migrations.LATEST_VERSION
+# Connections kept open for the threads that use the DB: UI, LLM responder,
+# conversation writer and task queue.
+DB_POOL_SIZE = 4
+DB_POOL_MAX_OVERFLOW = 4
+
 
 class DBInitException(Exception):
     pass
 
 
+def create_db_engine(db_file_path: str) -> Engine:
+    """Create the pooled engine of the application DB.
+    Connections use WAL journaling, so readers do not block the writer, and
+    synchronous=NORMAL, which syncs the WAL at checkpoints instead of every commit.
+    New databases are created with incremental auto vacuum, see maintenance.vacuum.
+    """
+    engine = sqldb.create_engine(f'sqlite:///{db_file_path}',
+                                 pool_size=DB_POOL_SIZE,
+                                 max_overflow=DB_POOL_MAX_OVERFLOW)
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        # Only takes effect before the first table is created
+        cursor.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.close()
+
+    return engine
+
+
 class AppDB(Singleton.Singleton):
     """Database associated with Transcribe.
     This class is implemented as a Singleton.
@@ -42,6 +76,8 @@ class AppDB(Singleton.Singleton):
     _db_context: dict = None
     _engine: Engine = None
     _db_logger: logging.Logger = None
+    _conversation_writer: ConversationWriter = None
+    _full_vacuum_pending: bool = False
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -56,7 +92,9 @@ class AppDB(Singleton.Singleton):
         # Create DB file if it does not exist
         # C:\....\transcribe\app\transcribe
         db_file_path = self._db_context["db_file_path"]
-        self._engine = sqldb.create_engine(f'sqlite:///{db_file_path}')
+        if self._engine is not None:
+            self._engine.dispose()
+        self._engine = create_db_engine(db_file_path)
         connection = self._engine.connect()
 
         # Initialize DB logger
@@ -79,14 +117,34 @@ class AppDB(Singleton.Singleton):
         self._db_logger.setLevel(db_logger_log_level)
         self._db_logger.propagate = False
 
+        # Upgrade tables of an older schema before the table objects use them
+        schema_current = self.get_schema_version(connection) == SCHEMA_VERSION
+        if not schema_current:
+            applied = migrations.run_migrations(connection)
+            connection.commit()
+            if applied:
+                self._db_logger.info('Applied schema migrations: %s', applied)
+
         # Initialize all the tables
-        self._tables[appi.TABLE_NAME] = appi.ApplicationInvocations(engine=self._engine)
-        self._tables[convo.TABLE_NAME] = convo.Conversations(engine=self._engine)
-        self._tables[lresp.TABLE_NAME] = lresp.LLMResponses(engine=self._engine)
-        self._tables[s.TABLE_NAME] = s.Summaries(engine=self._engine)
+        reflect = not schema_current
+        self._tables[appi.TABLE_NAME] = appi.ApplicationInvocations(engine=self._engine, reflect=reflect)
+        self._tables[convo.TABLE_NAME] = convo.Conversations(engine=self._engine, reflect=reflect)
+        self._tables[lresp.TABLE_NAME] = lresp.LLMResponses(engine=self._engine, reflect=reflect)
+        self._tables[s.TABLE_NAME] = s.Summaries(engine=self._engine, reflect=reflect)
+        if not schema_current:
+            connection.exec_driver_sql(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        if self._conversation_writer is not None:
+            self._conversation_writer.stop()
+        self._conversation_writer = ConversationWriter(self._tables[convo.TABLE_NAME])
         connection.commit()
         connection.close()
 
+    @staticmethod
+    def get_schema_version(connection) -> int:
+        """Get the schema version stored in the DB. 0 for databases created before versioning.
+        """
+        return connection.exec_driver_sql('PRAGMA user_version').scalar()
+
     def get_logger(self) -> logging.Logger:
         """Get DB logger
         """
@@ -100,9 +158,8 @@ class AppDB(Singleton.Singleton):
     def initialize_app(self):
         """Application initialization
         """
-        engine: Engine = sqldb.create_engine(f'sqlite:///{self._db_context["db_file_path"]}')
         # Insert any necessary data in tables
-        self._tables[appi.TABLE_NAME].insert_start_time(engine=engine)
+        self._tables[appi.TABLE_NAME].insert_start_time(engine=self._engine)
 
     def get_invocation_id(self) -> int:
         """Get the invocation id for this invocation of the application.
@@ -114,13 +171,40 @@ class AppDB(Singleton.Singleton):
         """
         return self._engine
 
+    def get_conversation_writer(self) -> ConversationWriter:
+        """Get the write-behind writer of the Conversations table
+        """
+        return self._conversation_writer
+
     def get_object(self, name):
         """Get corresponding table object
         """
         return self._tables[name]
 
+    def clean_db(self, archive_folder: str, retention_days: float,
+                 **_) -> maintenance.CleanupReport:
+        """Archive and delete invocations older than retention_days.
+        The running invocation is never archived. Runs on the task queue thread.
+        """
+        report = maintenance.clean_db(self._engine, archive_folder=archive_folder,
+                                      retention_days=retention_days,
+                                      exclude_invocation_id=self.get_invocation_id())
+        message = (f'DB clean archived {report.invocations_archived} invocations, '
+                   f'deleted {report.rows_deleted} rows, reclaimed {report.reclaimed_bytes} bytes')
+        if report.needs_full_vacuum:
+            # The one time conversion rebuilds the DB, wait until nothing writes to it
+            self._full_vacuum_pending = True
+            message += ', the DB is vacuumed at shutdown'
+        print(f'[INFO] {message}')
+        self._db_logger.info(message)
+        return report
+
     def shutdown_app(self):
         """Application shutdown
         """
-        engine = sqldb.create_engine(f'sqlite:///{self._db_context["db_file_path"]}')
-        self._tables[appi.TABLE_NAME].populate_end_time(engine)
+        if self._conversation_writer is not None:
+            self._conversation_writer.stop()
+        self._tables[appi.TABLE_NAME].populate_end_time(self._engine)
+        if self._full_vacuum_pending:
+            self._full_vacuum_pending = False
+            maintenance.convert_to_incremental_vacuum(self._engine)
@@ -56,7 +56,7 @@ class ApplicationInvocations:
     _db_table = None
     _invocation_id: int = None
 
-    def __init__(self, engine):
+    def __init__(self, engine, reflect: bool = True):
         """
         Initializes the ApplicationInvocations instance.
 
@@ -64,15 +64,20 @@ class ApplicationInvocations:
 
         Args:
             engine (Engine): The SQLAlchemy engine to connect to the database.
+            reflect (bool): Read the table schema from the database. When False the
+                declared schema is used without querying the database.
         """
-        try:
-            metadata = sqldb.MetaData()
-            self._db_table = sqldb.Table(self._table_name, metadata, autoload_with=engine)
-        except sqldb.exc.NoSuchTableError:
-            # If table does not exist, create the table
-            self._db_table = None
-            print(f'Table: {self._table_name} does not exist. Creating table.')
-            self.create_table(engine, metadata)
+        metadata = sqldb.MetaData()
+        if not reflect:
+            self._define_table(metadata)
+        else:
+            try:
+                self._db_table = sqldb.Table(self._table_name, metadata, autoload_with=engine)
+            except sqldb.exc.NoSuchTableError:
+                # If table does not exist, create the table
+                self._db_table = None
+                print(f'Table: {self._table_name} does not exist. Creating table.')
+                self.create_table(engine, metadata)
 
         self.populate_data()
 
@@ -84,14 +89,22 @@ class ApplicationInvocations:
             engine (Engine): The SQLAlchemy engine to connect to the database.
             metadata (MetaData): The SQLAlchemy MetaData object.
         """
+        self._define_table(metadata)
+        metadata.create_all(engine)
+
+    def _define_table(self, metadata):
+        """
+        Declares the ApplicationInvocations table schema.
+
+        Args:
+            metadata (MetaData): The SQLAlchemy MetaData object.
+        """
         self._db_table = sqldb.Table(self._table_name, metadata,
                                      sqldb.Column('Id', sqldb.Integer(), sqldb.Identity(start=1), primary_key=True),
                                      sqldb.Column('StartTime', sqldb.DateTime(), nullable=False,
                                                   default=datetime.utcnow),
                                      sqldb.Column('EndTime', sqldb.DateTime(), nullable=True))
 
-        metadata.create_all(engine)
-
     def insert_start_time(self, engine: Engine):
         """
         Inserts the start time of the application invocation into the database.
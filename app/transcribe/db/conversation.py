@@ -5,15 +5,33 @@ while the `Conversations` class provides methods to interact with the database t
 including creating the table, inserting, updating, and retrieving conversations.
 """
 
+import hashlib
 from datetime import datetime
 import sqlalchemy as sqldb
 from sqlalchemy import Column, Integer, String, DateTime
-from sqlalchemy.sql import update, text
+from sqlalchemy.sql import update, text, bindparam, select, func
 from sqlalchemy.orm import Session, mapped_column, Mapped
 from sqlalchemy import Engine, insert
 from sqlalchemy.orm import declarative_base
 
 TABLE_NAME = 'Conversations'
+SPEAKER_INDEX_NAME = 'IX_Conversations_InvocationId_Speaker_Id'
+TEXT_HASH_INDEX_NAME = 'IX_Conversations_InvocationId_Speaker_TextHash'
+
+
+def text_hash(convo_text: str) -> int:
+    """
+    Stable 64 bit hash of conversation text, stored in the TextHash column so rows
+    can be looked up by text through an index.
+
+    Args:
+        convo_text (str): The content of the conversation.
+
+    Returns:
+        int: Signed 64 bit hash of the text.
+    """
+    digest = hashlib.blake2b(convo_text.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
 
 
 class Conversation(declarative_base()):
@@ -26,6 +44,7 @@ class Conversation(declarative_base()):
         SpokenTime (datetime): The time the conversation was spoken.
         Speaker (str): The name of the speaker.
         Text (str): The content of the conversation.
+        TextHash (int): Hash of Text used for lookups by text.
     """
     __tablename__ = TABLE_NAME
 
@@ -34,6 +53,7 @@ class Conversation(declarative_base()):
     SpokenTime: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     Speaker: Mapped[str] = mapped_column(String(40), nullable=False)
     Text: Mapped[str] = mapped_column(String, nullable=False)
+    TextHash: Mapped[int] = mapped_column(Integer, nullable=True)
 
     def __repr__(self) -> str:
         """
@@ -60,7 +80,7 @@ class Conversations:
     _table_name = TABLE_NAME
     _db_table = None
 
-    def __init__(self, engine: Engine):
+    def __init__(self, engine: Engine, reflect: bool = True):
         """
         Initializes the Conversations instance.
 
@@ -68,35 +88,64 @@ class Conversations:
 
         Args:
             engine (Engine): The SQLAlchemy engine to connect to the database.
+            reflect (bool): Read the table schema from the database. When False the
+                declared schema is used without querying the database.
         """
         self.engine = engine
         self.metadata = sqldb.MetaData()
-        self._initialize_table()
+        self._initialize_table(reflect)
+        self._prepare_statements()
 
-    def _initialize_table(self):
+    def _initialize_table(self, reflect: bool = True):
         """Initializes the Conversations table."""
-        try:
-            self._db_table = sqldb.Table(self._table_name, self.metadata, autoload_with=self.engine)
-        except sqldb.exc.NoSuchTableError:
-            self._db_table = None
-            print(f'Table: {self._table_name} does not exist. Creating table.')
-            self.create_table()
+        if not reflect:
+            self._define_table()
+        else:
+            try:
+                self._db_table = sqldb.Table(self._table_name, self.metadata, autoload_with=self.engine)
+            except sqldb.exc.NoSuchTableError:
+                self._db_table = None
+                print(f'Table: {self._table_name} does not exist. Creating table.')
+                self.create_table()
 
         self.populate_data()
 
-    def create_table(self):
-        """
-        Creates the Conversations table in the database.
-        """
+    def _define_table(self):
+        """Declares the Conversations table schema."""
         self._db_table = sqldb.Table(
             self._table_name, self.metadata,
             Column('Id', Integer, sqldb.Identity(start=1), primary_key=True),
             Column("InvocationId", Integer, nullable=False),
             Column('SpokenTime', DateTime, nullable=False),
             Column('Speaker', String(40), nullable=False),
-            Column('Text', String, nullable=False)
+            Column('Text', String, nullable=False),
+            Column('TextHash', Integer, nullable=True),
+            sqldb.Index(SPEAKER_INDEX_NAME, 'InvocationId', 'Speaker', 'Id'),
+            sqldb.Index(TEXT_HASH_INDEX_NAME, 'InvocationId', 'Speaker', 'TextHash')
         )
 
+    def _prepare_statements(self):
+        """
+        Builds the statements of the frequent queries once. Their compiled form is
+        cached by the engine and reused for every execution.
+        """
+        table = self._db_table
+        self._insert_stmt = insert(table)
+        self._update_text_stmt = update(table).where(
+            table.c['Id'] == bindparam('convo_id')).values(
+            Text=bindparam('convo_text'), TextHash=bindparam('convo_text_hash'))
+        self._max_convo_id_stmt = select(func.max(table.c['Id'])).where(
+            table.c['Speaker'] == bindparam('speaker'), table.c['InvocationId'] == bindparam('inv_id'))
+        # The hash narrows the lookup to a few rows of the index, Text rules out collisions
+        self._convo_id_by_text_stmt = select(table.c['Id']).where(
+            table.c['InvocationId'] == bindparam('inv_id'), table.c['Speaker'] == bindparam('speaker'),
+            table.c['TextHash'] == bindparam('text_hash'), table.c['Text'] == bindparam('text'))
+
+    def create_table(self):
+        """
+        Creates the Conversations table in the database.
+        """
+        self._define_table()
         self.metadata.create_all(self.engine)
 
     def insert_conversation(self, invocation_id: int, spoken_time: datetime,
@@ -113,20 +162,16 @@ class Conversations:
         Returns:
             int: The ID of the inserted conversation entry.
         """
-        stmt = insert(self._db_table).values([
-            {
+        with self.engine.begin() as connection:
+            result = connection.execute(self._insert_stmt, {
                 'InvocationId': invocation_id,
                 'SpokenTime': spoken_time,
                 'Speaker': speaker_name,
-                'Text': convo_text
-            }
-        ])
-
-        with Session(self.engine) as session:
-            result = session.execute(stmt)
-            session.commit()
+                'Text': convo_text,
+                'TextHash': text_hash(convo_text)
+            })
 
-        convo_id = result.lastrowid
+        convo_id = result.inserted_primary_key[0]
         return convo_id
 
     def get_max_convo_id(self, speaker: str, inv_id: int) -> int:
@@ -139,14 +184,40 @@ class Conversations:
         Returns:
             int: The ID of the last conversation entry for the given speaker.
         """
-        stmt = text(f'SELECT MAX(Id) FROM {self._table_name} WHERE Speaker = :speaker and InvocationId = :inv_id')
-        with Session(self.engine) as session:
-            result = session.execute(stmt, {'speaker': speaker, 'inv_id': inv_id})
-            convo_id = result.scalar()
-            session.commit()
+        with self.engine.connect() as connection:
+            convo_id = connection.execute(self._max_convo_id_stmt,
+                                          {'speaker': speaker, 'inv_id': inv_id}).scalar()
 
         return convo_id
 
+    def get_max_id(self) -> int:
+        """
+        Retrieves the largest conversation ID in the table across all invocations.
+
+        Returns:
+            int: The largest ID, None when the table is empty.
+        """
+        stmt = text(f'SELECT MAX(Id) FROM {self._table_name}')
+        with Session(self.engine) as session:
+            return session.execute(stmt).scalar()
+
+    def write_batch(self, inserts: list[dict], updates: list[dict]):
+        """
+        Inserts and updates conversation entries in a single transaction.
+
+        Args:
+            inserts (list[dict]): Rows to insert, keyed by column name including the Id.
+            updates (list[dict]): Updates with the keys convo_id and convo_text.
+        """
+        with self.engine.begin() as connection:
+            if inserts:
+                connection.execute(self._insert_stmt,
+                                   [{**row, 'TextHash': text_hash(row['Text'])} for row in inserts])
+            if updates:
+                connection.execute(self._update_text_stmt,
+                                   [{**row, 'convo_text_hash': text_hash(row['convo_text'])}
+                                    for row in updates])
+
     def get_convo_id_by_speaker_and_text(self, speaker: str, input_text: str, inv_id: int) -> int:
         """
         Retrieves the ID of the conversation row that matches the given speaker and text.
@@ -158,11 +229,13 @@ class Conversations:
         Returns:
             int: The ID of the matching conversation entry.
         """
-        stmt = text(f'SELECT Id FROM {self._table_name} WHERE Speaker = :speaker and Text = :text and InvocationId = :inv_id')
-        with Session(self.engine) as session:
-            result = session.execute(stmt, {'speaker': speaker, 'text': input_text, 'inv_id': inv_id})
-            convo_id = result.scalar()
-            session.commit()
+        with self.engine.connect() as connection:
+            convo_id = connection.execute(self._convo_id_by_text_stmt, {
+                'speaker': speaker,
+                'text': input_text,
+                'text_hash': text_hash(input_text),
+                'inv_id': inv_id
+            }).scalar()
 
         return convo_id
 
@@ -182,10 +255,10 @@ class Conversations:
             return
 
         try:
-            with Session(self.engine) as session:
-                stmt = update(self._db_table).where(self._db_table.c['Id'] == conversation_id).values(Text=convo_text)
-                session.execute(stmt)
-                session.commit()
+            with self.engine.begin() as connection:
+                connection.execute(self._update_text_stmt,
+                                   {'convo_id': conversation_id, 'convo_text': convo_text,
+                                    'convo_text_hash': text_hash(convo_text)})
         except Exception as ex:
             print(f'Failed to update conversation: {ex}')
 
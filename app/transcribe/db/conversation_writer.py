@@ -0,0 +1,193 @@
+"""
+Write-behind persistence of conversation rows.
+
+Conversation updates arrive once per transcription window and once per streamed
+LLM token. The `ConversationWriter` queues them in memory and writes them to the
+Conversations table from a background thread, in a single transaction per batch.
+Repeated updates of the same row are coalesced, so only the latest text of a row
+is written. Ids of new rows are assigned from an in-memory counter, so callers
+never wait for the database. Rows of a failed write stay queued and are written
+again after a delay that doubles with each failure.
+"""
+
+import threading
+from datetime import datetime
+
+from .conversation import Conversations
+
+# Time queued rows are held so repeated updates of the same row are written once
+DEFAULT_FLUSH_INTERVAL_SECONDS = 0.1
+# Delay before the first retry of a failed write, doubled after each failure
+RETRY_INITIAL_SECONDS = 0.5
+RETRY_MAX_SECONDS = 30.0
+
+
+class ConversationWriter:
+    """
+    Queues inserts and updates of conversation rows and writes them in batches.
+
+    Attributes:
+        flush_interval_seconds (float): Time pending rows wait for more updates before a write.
+        batches_written (int): Number of transactions written.
+        rows_inserted (int): Number of rows inserted.
+        rows_updated (int): Number of row updates written.
+        updates_coalesced (int): Updates merged into an update or insert that was still pending.
+        write_failures (int): Number of failed transactions. Their rows are queued again.
+    """
+
+    def __init__(self, conversations: Conversations,
+                 flush_interval_seconds: float = DEFAULT_FLUSH_INTERVAL_SECONDS):
+        """
+        Initializes the writer. Ids of new rows continue after the largest id in the table.
+
+        Args:
+            conversations (Conversations): The Conversations table the rows are written to.
+            flush_interval_seconds (float): Time pending rows wait for more updates before a write.
+        """
+        self._conversations = conversations
+        self.flush_interval_seconds = max(float(flush_interval_seconds), 0.0)
+        self._condition = threading.Condition()
+        self._inserts: dict[int, dict] = {}
+        self._updates: dict[int, str] = {}
+        self._next_id = (conversations.get_max_id() or 0) + 1
+        self._flush_requested = False
+        self._writing = False
+        self._stopped = False
+        self._thread = None
+        self.batches_written = 0
+        self.rows_inserted = 0
+        self.rows_updated = 0
+        self.updates_coalesced = 0
+        self.write_failures = 0
+
+    def insert_conversation(self, invocation_id: int, spoken_time: datetime,
+                            speaker_name: str, convo_text: str) -> int:
+        """
+        Queues a conversation row for insertion.
+
+        Returns:
+            int: The ID the row is inserted with.
+        """
+        with self._condition:
+            convo_id = self._next_id
+            self._next_id += 1
+            self._inserts[convo_id] = {
+                'Id': convo_id,
+                'InvocationId': invocation_id,
+                'SpokenTime': spoken_time,
+                'Speaker': speaker_name,
+                'Text': convo_text
+            }
+            self._ensure_thread()
+            self._condition.notify_all()
+        return convo_id
+
+    def update_conversation(self, conversation_id: int, convo_text: str):
+        """
+        Queues an update of the text of a conversation row.
+        """
+        if conversation_id is None:
+            # Same as Conversations.update_conversation, system prompts have no row
+            return
+
+        with self._condition:
+            if conversation_id in self._inserts:
+                self._inserts[conversation_id]['Text'] = convo_text
+                self.updates_coalesced += 1
+            else:
+                if conversation_id in self._updates:
+                    self.updates_coalesced += 1
+                self._updates[conversation_id] = convo_text
+            self._ensure_thread()
+            self._condition.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Writes all queued rows without waiting for the flush interval.
+
+        Returns:
+            bool: True when all rows queued before the call were written, False when
+                a write failed or the timeout expired while rows are still unwritten.
+        """
+        with self._condition:
+            if self._stopped:
+                return not self._has_pending()
+            write_failures = self.write_failures
+            self._flush_requested = True
+            self._condition.notify_all()
+            self._condition.wait_for(lambda: (not self._has_pending() and not self._writing)
+                                     or self.write_failures > write_failures,
+                                     timeout=timeout)
+            self._flush_requested = False
+            return not self._has_pending() and not self._writing
+
+    def stop(self):
+        """Writes all queued rows and stops the writer thread."""
+        self.flush()
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def _has_pending(self) -> bool:
+        return bool(self._inserts or self._updates)
+
+    def _requeue(self, inserts: dict[int, dict], updates: dict[int, str]):
+        """Queues the rows of a failed write again, ahead of the rows queued since.
+        Text queued since for the same row replaces the failed text."""
+        for convo_id, convo_text in self._updates.items():
+            if convo_id in inserts:
+                inserts[convo_id]['Text'] = convo_text
+            else:
+                updates[convo_id] = convo_text
+        self._inserts = {**inserts, **self._inserts}
+        self._updates = updates
+
+    def _ensure_thread(self):
+        if self._thread is None and not self._stopped:
+            self._thread = threading.Thread(target=self._run, name='ConversationWriter', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        retry_seconds = 0.0
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._stopped or self._has_pending())
+                if not self._has_pending():
+                    return
+                # Give repeated updates of the same rows time to be coalesced,
+                # and the database time to recover after a failed write
+                self._condition.wait_for(lambda: self._stopped or self._flush_requested,
+                                         timeout=max(self.flush_interval_seconds, retry_seconds))
+                inserts, updates = self._inserts, self._updates
+                self._inserts, self._updates = {}, {}
+                self._flush_requested = False
+                self._writing = True
+
+            try:
+                self._conversations.write_batch(
+                    inserts=list(inserts.values()),
+                    updates=[{'convo_id': convo_id, 'convo_text': convo_text}
+                             for convo_id, convo_text in updates.items()])
+                self.rows_inserted += len(inserts)
+                self.rows_updated += len(updates)
+                self.batches_written += 1
+                retry_seconds = 0.0
+            except Exception as ex:
+                retry_seconds = min(max(retry_seconds * 2, RETRY_INITIAL_SECONDS), RETRY_MAX_SECONDS)
+                with self._condition:
+                    self._requeue(inserts, updates)
+                    self.write_failures += 1
+                    if self._stopped:
+                        # Do not hold up shutdown retrying a database that keeps failing
+                        print(f'Failed to write {len(self._inserts)} new and {len(self._updates)} '
+                              f'updated conversations before shutdown: {ex}')
+                        return
+                print(f'Failed to write {len(inserts)} new and {len(updates)} updated conversations, '
+                      f'retrying in {retry_seconds:.1f} seconds: {ex}')
+            finally:
+                with self._condition:
+                    self._writing = False
+                    self._condition.notify_all()
@@ -11,6 +11,7 @@ from sqlalchemy import Column, Integer, String, MetaData, DateTime, Engine, inse
 from sqlalchemy.orm import Session, mapped_column, declarative_base, Mapped
 
 TABLE_NAME = 'LLMResponses'
+CONVERSATION_INDEX_NAME = 'IX_LLMResponses_InvocationId_ConversationId'
 
 
 class LLMResponse(declarative_base()):
@@ -61,7 +62,7 @@ class LLMResponses:
     _db_table = None
     _metadata: MetaData = None
 
-    def __init__(self, engine: Engine):
+    def __init__(self, engine: Engine, reflect: bool = True):
         """
         Initializes the LLMResponses instance.
 
@@ -69,19 +70,24 @@ class LLMResponses:
 
         Args:
             engine (Engine): The SQLAlchemy engine to connect to the database.
+            reflect (bool): Read the table schema from the database. When False the
+                declared schema is used without querying the database.
         """
         self.engine = engine
         self._metadata = sqldb.MetaData()
-        self._initialize_table()
+        self._initialize_table(reflect)
 
-    def _initialize_table(self):
+    def _initialize_table(self, reflect: bool = True):
         """Initializes the LLMResponses table."""
-        try:
-            self._db_table = sqldb.Table(self._table_name, self._metadata, autoload_with=self.engine)
-        except sqldb.exc.NoSuchTableError:
-            self._db_table = None
-            print(f'Table: {self._table_name} does not exist. Creating table.')
-            self.create_table()
+        if not reflect:
+            self._define_table()
+        else:
+            try:
+                self._db_table = sqldb.Table(self._table_name, self._metadata, autoload_with=self.engine)
+            except sqldb.exc.NoSuchTableError:
+                self._db_table = None
+                print(f'Table: {self._table_name} does not exist. Creating table.')
+                self.create_table()
 
         self.populate_data()
 
@@ -89,17 +95,21 @@ class LLMResponses:
         """
         Creates the LLMResponses table in the database.
         """
+        self._define_table()
+        self._metadata.create_all(self.engine)
+
+    def _define_table(self):
+        """Declares the LLMResponses table schema."""
         self._db_table = sqldb.Table(
             self._table_name, self._metadata,
             Column('Id', Integer, sqldb.Identity(start=1), primary_key=True),
             Column('CreatedTime', DateTime, nullable=False, default=datetime.datetime.utcnow),
             Column('InvocationId', Integer, nullable=False),
             Column('ConversationId', Integer, nullable=False),
-            Column('Text', String, nullable=False)
+            Column('Text', String, nullable=False),
+            sqldb.Index(CONVERSATION_INDEX_NAME, 'InvocationId', 'ConversationId')
         )
 
-        self._metadata.create_all(self.engine)
-
     def insert_response(self, invocation_id: int, conversation_id: int, text: str) -> int:
         """
         Inserts a response entry into the LLMResponses table.
@@ -0,0 +1,225 @@
+"""
+Retention of old invocations in the application DB.
+
+Invocations older than the retention age are archived to one gzip compressed
+JSONL file per invocation, then deleted from the live tables in small batches so
+the transcript path never waits long on the write lock. Freed pages are returned
+to the file system with an incremental vacuum, a few pages per transaction.
+Databases created without incremental auto vacuum are converted with a full
+VACUUM at shutdown, never while transcribing.
+"""
+
+import datetime
+import gzip
+import json
+import os
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy import Connection, Engine
+
+from . import app_invocations as appi
+from . import conversation as convo
+from . import llm_responses as lresp
+from . import summaries as s
+
+# Rows deleted per transaction
+DEFAULT_DELETE_BATCH_SIZE = 500
+# Pause between delete transactions, lets queued transcript writes take the lock
+DELETE_BATCH_PAUSE_SECONDS = 0.01
+# Tables holding rows of an invocation, deleted before the invocation row
+INVOCATION_TABLES = (convo.TABLE_NAME, lresp.TABLE_NAME, s.TABLE_NAME)
+AUTO_VACUUM_INCREMENTAL = 2
+# Free pages returned to the file system per incremental vacuum transaction
+DEFAULT_VACUUM_STEP_PAGES = 256
+
+
+@dataclass
+class CleanupReport:
+    """
+    Result of a DB clean task.
+
+    Attributes:
+        invocations_archived (int): Invocations written to archive files and deleted.
+        rows_deleted (int): Rows deleted from the live tables, invocation rows included.
+        archive_files (list[str]): Paths of the archive files written.
+        reclaimed_bytes (int): Reduction of the DB file size.
+        needs_full_vacuum (bool): Rows were deleted from a DB without incremental
+            auto vacuum, see convert_to_incremental_vacuum.
+    """
+    invocations_archived: int = 0
+    rows_deleted: int = 0
+    archive_files: list[str] = field(default_factory=list)
+    reclaimed_bytes: int = 0
+    needs_full_vacuum: bool = False
+
+
+def _db_size(connection: Connection) -> int:
+    page_count = connection.exec_driver_sql('PRAGMA page_count').scalar()
+    page_size = connection.exec_driver_sql('PRAGMA page_size').scalar()
+    return page_count * page_size
+
+
+def _json_value(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+
+def _rows(connection: Connection, query: str, params: tuple):
+    result = connection.exec_driver_sql(query, params)
+    columns = list(result.keys())
+    for row in result:
+        yield {column: _json_value(value) for column, value in zip(columns, row)}
+
+
+def get_expired_invocations(connection: Connection, older_than: datetime.datetime,
+                            exclude_invocation_id: int = None) -> list[int]:
+    """
+    Get the ids of invocations started before a given time.
+
+    Args:
+        connection (Connection): Connection to the application DB.
+        older_than (datetime): Invocations started before this time are expired.
+        exclude_invocation_id (int): Invocation that is never expired, the running one.
+
+    Returns:
+        list[int]: Ids of the expired invocations, oldest first.
+    """
+    rows = connection.exec_driver_sql(
+        f'SELECT Id FROM {appi.TABLE_NAME} WHERE StartTime < ? ORDER BY Id',
+        (older_than.isoformat(' '),)).fetchall()
+    return [row[0] for row in rows if row[0] != exclude_invocation_id]
+
+
+def archive_invocation(connection: Connection, invocation_id: int, archive_folder: str) -> str:
+    """
+    Write all rows of an invocation to a gzip compressed JSONL file.
+    Each line holds the table name and one row. The file is written under a
+    temporary name and renamed once complete.
+
+    Returns:
+        str: Path of the archive file.
+    """
+    os.makedirs(archive_folder, exist_ok=True)
+    archive_path = os.path.join(archive_folder, f'invocation_{invocation_id}.jsonl.gz')
+    temp_path = f'{archive_path}.tmp'
+    with gzip.open(temp_path, 'wt', encoding='utf-8') as archive:
+        queries = [(appi.TABLE_NAME, f'SELECT * FROM {appi.TABLE_NAME} WHERE Id = ?')]
+        queries += [(table, f'SELECT * FROM {table} WHERE InvocationId = ? ORDER BY Id')
+                    for table in INVOCATION_TABLES]
+        for table, query in queries:
+            for row in _rows(connection, query, (invocation_id,)):
+                archive.write(json.dumps({'table': table, 'row': row}) + '\n')
+    os.replace(temp_path, archive_path)
+    return archive_path
+
+
+def delete_invocation(engine: Engine, invocation_id: int,
+                      batch_size: int = DEFAULT_DELETE_BATCH_SIZE) -> int:
+    """
+    Delete all rows of an invocation, at most batch_size rows per transaction.
+
+    Returns:
+        int: Number of rows deleted.
+    """
+    deleted = 0
+    for table in INVOCATION_TABLES:
+        while True:
+            with engine.begin() as connection:
+                count = connection.exec_driver_sql(
+                    f'DELETE FROM {table} WHERE Id IN '
+                    f'(SELECT Id FROM {table} WHERE InvocationId = ? LIMIT ?)',
+                    (invocation_id, batch_size)).rowcount
+            deleted += count
+            if count < batch_size:
+                break
+            time.sleep(DELETE_BATCH_PAUSE_SECONDS)
+
+    with engine.begin() as connection:
+        deleted += connection.exec_driver_sql(
+            f'DELETE FROM {appi.TABLE_NAME} WHERE Id = ?', (invocation_id,)).rowcount
+    return deleted
+
+
+def vacuum(engine: Engine, step_pages: int = DEFAULT_VACUUM_STEP_PAGES) -> bool:
+    """
+    Return free pages of the DB to the file system, at most step_pages pages per
+    transaction. Never runs a full VACUUM, which holds the write lock while the
+    whole DB is rebuilt.
+
+    Returns:
+        bool: False when the DB was created without incremental auto vacuum and
+            nothing was done, see convert_to_incremental_vacuum.
+    """
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        if connection.exec_driver_sql('PRAGMA auto_vacuum').scalar() != AUTO_VACUUM_INCREMENTAL:
+            return False
+        free_pages = connection.exec_driver_sql('PRAGMA freelist_count').scalar()
+        while free_pages > 0:
+            # The sqlite3 module frees a single page per execute, a script runs the pragma to completion
+            connection.connection.driver_connection.executescript(
+                f'PRAGMA incremental_vacuum({int(step_pages)})')
+            remaining_pages = connection.exec_driver_sql('PRAGMA freelist_count').scalar()
+            if remaining_pages >= free_pages:
+                break
+            free_pages = remaining_pages
+            time.sleep(DELETE_BATCH_PAUSE_SECONDS)
+        # Reclaimed pages reach the DB file at a checkpoint, do not wait for other connections
+        connection.exec_driver_sql('PRAGMA wal_checkpoint(PASSIVE)').fetchall()
+    return True
+
+
+def convert_to_incremental_vacuum(engine: Engine) -> bool:
+    """
+    Switch a DB created without incremental auto vacuum to incremental auto vacuum.
+    Rebuilds the DB with a full VACUUM, which holds the write lock throughout,
+    so only call it when nothing else writes to the DB, e.g. at shutdown.
+
+    Returns:
+        bool: True when the DB was converted.
+    """
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        if connection.exec_driver_sql('PRAGMA auto_vacuum').scalar() == AUTO_VACUUM_INCREMENTAL:
+            return False
+        connection.exec_driver_sql('PRAGMA auto_vacuum = INCREMENTAL')
+        connection.exec_driver_sql('VACUUM')
+        connection.exec_driver_sql('PRAGMA wal_checkpoint(TRUNCATE)').fetchall()
+    return True
+
+
+def clean_db(engine: Engine, archive_folder: str, retention_days: float,
+             exclude_invocation_id: int = None,
+             batch_size: int = DEFAULT_DELETE_BATCH_SIZE) -> CleanupReport:
+    """
+    Archive and delete invocations older than the retention age, then vacuum the DB.
+
+    Args:
+        engine (Engine): Engine of the application DB.
+        archive_folder (str): Folder the archive files are written to.
+        retention_days (float): Invocations started longer ago than this are archived.
+        exclude_invocation_id (int): Invocation that is never archived, the running one.
+        batch_size (int): Rows deleted per transaction.
+
+    Returns:
+        CleanupReport: Archived invocations, deleted rows and reclaimed bytes.
+    """
+    report = CleanupReport()
+    older_than = datetime.datetime.utcnow() - datetime.timedelta(days=retention_days)
+    with engine.connect() as connection:
+        size_before = _db_size(connection)
+        invocation_ids = get_expired_invocations(connection, older_than, exclude_invocation_id)
+
+    for invocation_id in invocation_ids:
+        # Rows are deleted only once their archive file is complete
+        with engine.connect() as connection:
+            report.archive_files.append(archive_invocation(connection, invocation_id, archive_folder))
+        report.rows_deleted += delete_invocation(engine, invocation_id, batch_size)
+        report.invocations_archived += 1
+
+    if invocation_ids:
+        report.needs_full_vacuum = not vacuum(engine)
+
+    with engine.connect() as connection:
+        report.reclaimed_bytes = max(size_before - _db_size(connection), 0)
+    return report
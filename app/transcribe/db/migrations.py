@@ -0,0 +1,128 @@
+"""
+Schema migrations of the application DB.
+
+Each migration upgrades the schema by one version. Applied versions are recorded
+in the SchemaMigrations table, so `run_migrations` only applies the steps a database
+has not seen yet. Steps are idempotent and skip tables that do not exist yet, those
+are created by the table classes with the latest declared schema.
+"""
+
+import datetime
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy import Connection
+
+from . import conversation as convo
+from . import llm_responses as lresp
+
+TABLE_NAME = 'SchemaMigrations'
+# Rows read and updated per statement when a column is backfilled
+BACKFILL_BATCH_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class Migration:
+    """
+    One step of the schema upgrade.
+
+    Attributes:
+        version (int): Schema version of the database after the step.
+        description (str): Short description recorded with the version.
+        upgrade (Callable[[Connection], None]): Applies the step on a connection.
+    """
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+def _table_exists(connection: Connection, table_name: str) -> bool:
+    return connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)).first() is not None
+
+
+def _column_exists(connection: Connection, table_name: str, column_name: str) -> bool:
+    columns = connection.exec_driver_sql(f'PRAGMA table_info({table_name})').fetchall()
+    return any(column[1] == column_name for column in columns)
+
+
+def _baseline(connection: Connection):
+    """Tables as created before versioning. Nothing to upgrade."""
+
+
+def _add_lookup_indexes(connection: Connection):
+    if _table_exists(connection, convo.TABLE_NAME):
+        connection.exec_driver_sql(
+            f'CREATE INDEX IF NOT EXISTS {convo.SPEAKER_INDEX_NAME} '
+            f'ON {convo.TABLE_NAME} (InvocationId, Speaker, Id)')
+    if _table_exists(connection, lresp.TABLE_NAME):
+        connection.exec_driver_sql(
+            f'CREATE INDEX IF NOT EXISTS {lresp.CONVERSATION_INDEX_NAME} '
+            f'ON {lresp.TABLE_NAME} (InvocationId, ConversationId)')
+
+
+def _add_conversation_text_hash(connection: Connection):
+    if not _table_exists(connection, convo.TABLE_NAME):
+        return
+    if not _column_exists(connection, convo.TABLE_NAME, 'TextHash'):
+        connection.exec_driver_sql(f'ALTER TABLE {convo.TABLE_NAME} ADD COLUMN TextHash INTEGER')
+
+    while True:
+        rows = connection.exec_driver_sql(
+            f'SELECT Id, Text FROM {convo.TABLE_NAME} WHERE TextHash IS NULL LIMIT {BACKFILL_BATCH_SIZE}'
+        ).fetchall()
+        if not rows:
+            break
+        connection.exec_driver_sql(f'UPDATE {convo.TABLE_NAME} SET TextHash = ? WHERE Id = ?',
+                                   [(convo.text_hash(row[1]), row[0]) for row in rows])
+
+    connection.exec_driver_sql(
+        f'CREATE INDEX IF NOT EXISTS {convo.TEXT_HASH_INDEX_NAME} '
+        f'ON {convo.TABLE_NAME} (InvocationId, Speaker, TextHash)')
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(1, 'Initial schema', _baseline),
+    Migration(2, 'Indexes on Conversations and LLMResponses lookups', _add_lookup_indexes),
+    Migration(3, 'Text hash of Conversations for lookup by text', _add_conversation_text_hash),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def get_applied_version(connection: Connection) -> int:
+    """Get the latest migration applied to the DB. 0 when no migration was applied."""
+    if not _table_exists(connection, TABLE_NAME):
+        return 0
+    return connection.exec_driver_sql(f'SELECT MAX(Version) FROM {TABLE_NAME}').scalar() or 0
+
+
+def run_migrations(connection: Connection) -> list[int]:
+    """
+    Applies the migrations the DB has not seen, in order, and records them.
+    The caller commits the connection.
+
+    Args:
+        connection (Connection): Connection to the application DB.
+
+    Returns:
+        list[int]: Versions applied by this call.
+    """
+    connection.exec_driver_sql(
+        f'CREATE TABLE IF NOT EXISTS {TABLE_NAME} ('
+        'Version INTEGER NOT NULL PRIMARY KEY, '
+        'Description VARCHAR NOT NULL, '
+        'AppliedTime DATETIME NOT NULL)')
+    applied_version = get_applied_version(connection)
+
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= applied_version:
+            continue
+        migration.upgrade(connection)
+        connection.exec_driver_sql(
+            f'INSERT INTO {TABLE_NAME} (Version, Description, AppliedTime) VALUES (?, ?, ?)',
+            (migration.version, migration.description, datetime.datetime.utcnow().isoformat(' ')))
+        applied.append(migration.version)
+
+    return applied
@@ -61,7 +61,7 @@ class Summaries:
     _db_table = None
     _metadata: MetaData = None
 
-    def __init__(self, engine: Engine):
+    def __init__(self, engine: Engine, reflect: bool = True):
         """
         Initializes the Summaries instance.
 
@@ -69,19 +69,24 @@ class Summaries:
 
         Args:
             engine (Engine): The SQLAlchemy engine to connect to the database.
+            reflect (bool): Read the table schema from the database. When False the
+                declared schema is used without querying the database.
         """
         self.engine = engine
         self.metadata = sqldb.MetaData()
-        self._initialize_table()
+        self._initialize_table(reflect)
 
-    def _initialize_table(self):
+    def _initialize_table(self, reflect: bool = True):
         """Initializes the Summaries table."""
-        try:
-            self._db_table = sqldb.Table(self._table_name, self.metadata, autoload_with=self.engine)
-        except sqldb.exc.NoSuchTableError:
-            self._db_table = None
-            print(f'Table: {self._table_name} does not exist. Creating table.')
-            self.create_table()
+        if not reflect:
+            self._define_table()
+        else:
+            try:
+                self._db_table = sqldb.Table(self._table_name, self.metadata, autoload_with=self.engine)
+            except sqldb.exc.NoSuchTableError:
+                self._db_table = None
+                print(f'Table: {self._table_name} does not exist. Creating table.')
+                self.create_table()
 
         self.populate_data()
 
@@ -89,6 +94,11 @@ class Summaries:
         """
         Creates the Summaries table in the database.
         """
+        self._define_table()
+        self.metadata.create_all(self.engine)
+
+    def _define_table(self):
+        """Declares the Summaries table schema."""
         self._db_table = sqldb.Table(
             self._table_name, self.metadata,
             Column('Id', Integer, sqldb.Identity(start=1), primary_key=True),
@@ -98,8 +108,6 @@ class Summaries:
             Column('Text', String, nullable=False)
         )
 
-        self.metadata.create_all(self.engine)
-
     def insert_summary(self, invocation_id: int, conversation_id: int, text: str) -> int:
         """
         Inserts a summary entry into the Summaries table.
@@ -1,14 +1,17 @@
 """Tests for application database logging configuration."""
 
+import datetime
 import logging
 import io
 import os
 import tempfile
 import unittest
+from unittest import mock
 
 from sqlalchemy import text
 
-from app.transcribe.db.app_db import AppDB
+from app.transcribe.db import app_db as app_db_module
+from app.transcribe.db.app_db import AppDB, SCHEMA_VERSION
 
 
 class TestAppDB(unittest.TestCase):
@@ -51,6 +54,54 @@ class TestAppDB(unittest.TestCase):
                         sqlalchemy_logger.removeHandler(handler)
                         handler.close()
 
+    def _initialize(self, temp_dir):
+        db_log_file = os.path.join(temp_dir, "db.log")
+        app_db = AppDB()
+        app_db.initialize_db(db_context={"db_file_path": os.path.join(temp_dir, "app.db"),
+                                         "db_log_file": db_log_file})
+        self.addCleanup(self._close, app_db, db_log_file)
+        return app_db
+
+    @staticmethod
+    def _close(app_db, db_log_file):
+        app_db.get_conversation_writer().stop()
+        app_db.get_engine().dispose()
+        sqlalchemy_logger = logging.getLogger("sqlalchemy")
+        for handler in list(sqlalchemy_logger.handlers):
+            if isinstance(handler, logging.FileHandler) and handler.baseFilename == db_log_file:
+                sqlalchemy_logger.removeHandler(handler)
+                handler.close()
+
+    def test_connections_use_wal_journal(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            app_db = self._initialize(temp_dir)
+
+            with app_db.get_engine().connect() as connection:
+                journal_mode = connection.exec_driver_sql("PRAGMA journal_mode").scalar()
+                synchronous = connection.exec_driver_sql("PRAGMA synchronous").scalar()
+
+            self.assertEqual(journal_mode, "wal")
+            # 1 is NORMAL
+            self.assertEqual(synchronous, 1)
+            self.doCleanups()
+
+    def test_schema_is_not_reflected_when_version_matches(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            app_db = self._initialize(temp_dir)
+            with app_db.get_engine().connect() as connection:
+                self.assertEqual(app_db.get_schema_version(connection), SCHEMA_VERSION)
+
+            with mock.patch.object(app_db_module.convo, "Conversations",
+                                   wraps=app_db_module.convo.Conversations) as conversations:
+                app_db = self._initialize(temp_dir)
+
+            self.assertFalse(conversations.call_args.kwargs["reflect"])
+            app_db.initialize_app()
+            convo_id = app_db.get_object(app_db_module.convo.TABLE_NAME).insert_conversation(
+                app_db.get_invocation_id(), datetime.datetime.utcnow(), "You", "hello")
+            self.assertIsNotNone(convo_id)
+            self.doCleanups()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,123 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.transcribe.db.conversation import Conversation, Conversations
+from app.transcribe.db.conversation_writer import ConversationWriter
+
+
+class TestConversationWriter(unittest.TestCase):
+    """Unit tests for the ConversationWriter class."""
+
+    def setUp(self):
+        """Use a database file, the writer thread needs its own connection."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f'sqlite:///{os.path.join(self.temp_dir.name, "test.db")}')
+        self.Session = sessionmaker(bind=self.engine)
+        self.conversations = Conversations(self.engine)
+        self.writer = ConversationWriter(self.conversations, flush_interval_seconds=10)
+
+    def tearDown(self):
+        self.writer.stop()
+        self.engine.dispose()
+        self.temp_dir.cleanup()
+
+    def _rows(self):
+        with self.Session() as session:
+            return {row.Id: row.Text for row in session.query(Conversation).all()}
+
+    def test_ids_continue_after_existing_rows(self):
+        """Test that ids are assigned in memory after the largest persisted id."""
+        existing_id = self.conversations.insert_conversation(1, datetime.utcnow(), "You", "existing")
+        writer = ConversationWriter(self.conversations)
+
+        convo_id = writer.insert_conversation(2, datetime.utcnow(), "You", "new")
+        writer.stop()
+
+        self.assertEqual(convo_id, existing_id + 1)
+        self.assertEqual(self._rows()[convo_id], "new")
+
+    def test_repeated_updates_of_a_pending_row_are_written_once(self):
+        """Test that a streamed row is inserted once with its final text."""
+        convo_id = self.writer.insert_conversation(1, datetime.utcnow(), "Speaker", "t")
+        for length in range(2, 51):
+            self.writer.update_conversation(convo_id, "t" * length)
+
+        self.assertEqual(self._rows(), {})
+        self.assertTrue(self.writer.flush(timeout=5))
+
+        self.assertEqual(self._rows(), {convo_id: "t" * 50})
+        self.assertEqual(self.writer.batches_written, 1)
+        self.assertEqual(self.writer.rows_inserted, 1)
+        self.assertEqual(self.writer.rows_updated, 0)
+        self.assertEqual(self.writer.updates_coalesced, 49)
+
+    def test_inserts_and_updates_are_written_in_one_batch(self):
+        """Test that updates of written rows and new rows share a transaction."""
+        first = self.writer.insert_conversation(1, datetime.utcnow(), "You", "first")
+        self.writer.flush(timeout=5)
+
+        self.writer.update_conversation(first, "first corrected")
+        self.writer.update_conversation(None, "system prompt")
+        second = self.writer.insert_conversation(1, datetime.utcnow(), "Speaker", "second")
+        self.writer.flush(timeout=5)
+
+        self.assertEqual(self._rows(), {first: "first corrected", second: "second"})
+        self.assertEqual(self.writer.batches_written, 2)
+        self.assertEqual(self.writer.rows_updated, 1)
+
+    def test_rows_of_a_failed_write_are_written_by_the_next_flush(self):
+        """Test that a failed write keeps its rows queued and flush reports them as unwritten."""
+        write_batch = self.conversations.write_batch
+        convo_id = self.writer.insert_conversation(1, datetime.utcnow(), "You", "hello")
+
+        def fail_after_newer_text(inserts, updates):
+            # Text queued while the write is in progress replaces the failed text
+            self.writer.update_conversation(convo_id, "hello there")
+            raise RuntimeError("database is locked")
+
+        with patch.object(self.conversations, 'write_batch', side_effect=fail_after_newer_text):
+            self.assertFalse(self.writer.flush(timeout=5))
+
+        self.assertEqual(self._rows(), {})
+        self.assertEqual(self.writer.write_failures, 1)
+
+        with patch.object(self.conversations, 'write_batch', side_effect=write_batch) as mock_write:
+            self.assertTrue(self.writer.flush(timeout=5))
+
+        mock_write.assert_called_once()
+        self.assertEqual(self._rows(), {convo_id: "hello there"})
+        self.writer.update_conversation(convo_id, "hello again")
+        self.assertTrue(self.writer.flush(timeout=5))
+        self.assertEqual(self._rows(), {convo_id: "hello again"})
+
+    def test_failed_updates_are_queued_behind_newer_text(self):
+        """Test that a failed update does not overwrite text queued after it."""
+        convo_id = self.writer.insert_conversation(1, datetime.utcnow(), "You", "first")
+        self.writer.flush(timeout=5)
+        self.writer.update_conversation(convo_id, "second")
+
+        def fail_after_newer_text(inserts, updates):
+            self.writer.update_conversation(convo_id, "third")
+            raise RuntimeError("database is locked")
+
+        with patch.object(self.conversations, 'write_batch', side_effect=fail_after_newer_text):
+            self.assertFalse(self.writer.flush(timeout=5))
+        self.assertTrue(self.writer.flush(timeout=5))
+
+        self.assertEqual(self._rows(), {convo_id: "third"})
+
+    def test_stop_writes_pending_rows(self):
+        """Test that rows queued before shutdown are not lost."""
+        convo_id = self.writer.insert_conversation(1, datetime.utcnow(), "You", "last words")
+
+        self.writer.stop()
+
+        self.assertEqual(self._rows(), {convo_id: "last words"})
+
+
+if __name__ == '__main__':
+    unittest.main()
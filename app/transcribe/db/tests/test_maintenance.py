@@ -0,0 +1,139 @@
+"""Tests for archival and deletion of old invocations."""
+
+import datetime
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine, text
+
+from app.transcribe.db import app_invocations as appi
+from app.transcribe.db import conversation as convo
+from app.transcribe.db import llm_responses as lresp
+from app.transcribe.db import maintenance
+from app.transcribe.db import summaries as s
+from app.transcribe.db.app_db import create_db_engine
+
+
+class TestMaintenance(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.archive_folder = os.path.join(self.temp_dir.name, 'archive')
+        self._open_db(os.path.join(self.temp_dir.name, 'app.db'))
+
+    def _open_db(self, db_file_path: str):
+        self.engine = create_db_engine(db_file_path)
+        appi.ApplicationInvocations(self.engine)
+        self.conversations = convo.Conversations(self.engine)
+        lresp.LLMResponses(self.engine)
+        s.Summaries(self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.temp_dir.cleanup()
+
+    def _add_invocation(self, days_ago: float, rows: int) -> int:
+        start_time = datetime.datetime.utcnow() - datetime.timedelta(days=days_ago)
+        with self.engine.begin() as connection:
+            invocation_id = connection.execute(
+                text(f'INSERT INTO {appi.TABLE_NAME} (StartTime) VALUES (:start_time)'),
+                {'start_time': start_time}).lastrowid
+        for index in range(rows):
+            convo_id = self.conversations.insert_conversation(
+                invocation_id, start_time, 'You', f'row {index} ' + 'text ' * 100)
+            with self.engine.begin() as connection:
+                connection.execute(
+                    text(f'INSERT INTO {lresp.TABLE_NAME} (CreatedTime, InvocationId, ConversationId, Text) '
+                         'VALUES (:created_time, :inv_id, :convo_id, :text)'),
+                    {'created_time': start_time, 'inv_id': invocation_id, 'convo_id': convo_id,
+                     'text': 'response'})
+        return invocation_id
+
+    def _count(self, table: str, invocation_id: int) -> int:
+        column = 'Id' if table == appi.TABLE_NAME else 'InvocationId'
+        with self.engine.connect() as connection:
+            return connection.exec_driver_sql(
+                f'SELECT COUNT(*) FROM {table} WHERE {column} = ?', (invocation_id,)).scalar()
+
+    def test_old_invocations_are_archived_and_deleted(self):
+        old_id = self._add_invocation(days_ago=100, rows=30)
+        recent_id = self._add_invocation(days_ago=1, rows=2)
+
+        report = maintenance.clean_db(self.engine, self.archive_folder, retention_days=90, batch_size=7)
+
+        self.assertEqual(report.invocations_archived, 1)
+        self.assertEqual(report.rows_deleted, 61)
+        self.assertEqual(self._count(convo.TABLE_NAME, old_id), 0)
+        self.assertEqual(self._count(lresp.TABLE_NAME, old_id), 0)
+        self.assertEqual(self._count(appi.TABLE_NAME, old_id), 0)
+        self.assertEqual(self._count(convo.TABLE_NAME, recent_id), 2)
+
+        with gzip.open(report.archive_files[0], 'rt', encoding='utf-8') as archive:
+            records = [json.loads(line) for line in archive]
+        tables = [record['table'] for record in records]
+        self.assertEqual(tables.count(appi.TABLE_NAME), 1)
+        self.assertEqual(tables.count(convo.TABLE_NAME), 30)
+        self.assertEqual(tables.count(lresp.TABLE_NAME), 30)
+        self.assertEqual(records[1]['row']['Speaker'], 'You')
+
+    def test_vacuum_reclaims_deleted_pages(self):
+        self._add_invocation(days_ago=100, rows=200)
+
+        report = maintenance.clean_db(self.engine, self.archive_folder, retention_days=90)
+
+        self.assertGreater(report.reclaimed_bytes, 0)
+        with self.engine.connect() as connection:
+            self.assertEqual(connection.exec_driver_sql('PRAGMA auto_vacuum').scalar(),
+                             maintenance.AUTO_VACUUM_INCREMENTAL)
+
+    def test_vacuum_runs_in_steps(self):
+        invocation_id = self._add_invocation(days_ago=100, rows=200)
+        maintenance.delete_invocation(self.engine, invocation_id)
+        with self.engine.connect() as connection:
+            size_before = maintenance._db_size(connection)
+
+        self.assertTrue(maintenance.vacuum(self.engine, step_pages=2))
+
+        with self.engine.connect() as connection:
+            self.assertEqual(connection.exec_driver_sql('PRAGMA freelist_count').scalar(), 0)
+            self.assertLess(maintenance._db_size(connection), size_before)
+
+    def test_db_without_incremental_vacuum_is_only_converted_on_request(self):
+        self.engine.dispose()
+        db_file_path = os.path.join(self.temp_dir.name, 'old.db')
+        # Tables created before incremental auto vacuum was enabled
+        with create_engine(f'sqlite:///{db_file_path}').connect() as connection:
+            connection.exec_driver_sql('PRAGMA auto_vacuum = NONE')
+            connection.exec_driver_sql('CREATE TABLE Old (Id INTEGER PRIMARY KEY)')
+        self._open_db(db_file_path)
+        self._add_invocation(days_ago=100, rows=50)
+
+        report = maintenance.clean_db(self.engine, self.archive_folder, retention_days=90)
+
+        self.assertTrue(report.needs_full_vacuum)
+        with self.engine.connect() as connection:
+            self.assertEqual(connection.exec_driver_sql('PRAGMA auto_vacuum').scalar(), 0)
+            self.assertGreater(connection.exec_driver_sql('PRAGMA freelist_count').scalar(), 0)
+
+        self.assertTrue(maintenance.convert_to_incremental_vacuum(self.engine))
+
+        with self.engine.connect() as connection:
+            self.assertEqual(connection.exec_driver_sql('PRAGMA auto_vacuum').scalar(),
+                             maintenance.AUTO_VACUUM_INCREMENTAL)
+            self.assertEqual(connection.exec_driver_sql('PRAGMA freelist_count').scalar(), 0)
+        self.assertFalse(maintenance.convert_to_incremental_vacuum(self.engine))
+
+    def test_running_invocation_is_kept(self):
+        invocation_id = self._add_invocation(days_ago=100, rows=1)
+
+        report = maintenance.clean_db(self.engine, self.archive_folder, retention_days=90,
+                                      exclude_invocation_id=invocation_id)
+
+        self.assertEqual(report.invocations_archived, 0)
+        self.assertEqual(self._count(convo.TABLE_NAME, invocation_id), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
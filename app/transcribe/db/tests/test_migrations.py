@@ -0,0 +1,84 @@
+"""Tests for schema migrations of the application DB."""
+
+import unittest
+
+import sqlalchemy as sqldb
+
+from app.transcribe.db import conversation as convo
+from app.transcribe.db import llm_responses as lresp
+from app.transcribe.db import migrations
+
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        self.engine = sqldb.create_engine('sqlite:///:memory:')
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def _create_unversioned_tables(self):
+        """Tables as created by releases without schema versioning."""
+        with self.engine.begin() as connection:
+            connection.exec_driver_sql(
+                'CREATE TABLE Conversations (Id INTEGER NOT NULL PRIMARY KEY, InvocationId INTEGER NOT NULL, '
+                'SpokenTime DATETIME NOT NULL, Speaker VARCHAR(40) NOT NULL, Text VARCHAR NOT NULL)')
+            connection.exec_driver_sql(
+                'CREATE TABLE LLMResponses (Id INTEGER NOT NULL PRIMARY KEY, CreatedTime DATETIME NOT NULL, '
+                'InvocationId INTEGER NOT NULL, ConversationId INTEGER NOT NULL, Text VARCHAR NOT NULL)')
+            connection.exec_driver_sql(
+                "INSERT INTO Conversations (InvocationId, SpokenTime, Speaker, Text) VALUES "
+                "(1, '2024-01-01 00:00:00', 'You', 'hello'), (1, '2024-01-01 00:00:01', 'Speaker', 'hi there')")
+
+    def _index_names(self, connection, table_name):
+        return {row[1] for row in connection.exec_driver_sql(f'PRAGMA index_list({table_name})')}
+
+    def test_unversioned_tables_are_upgraded(self):
+        self._create_unversioned_tables()
+
+        with self.engine.begin() as connection:
+            applied = migrations.run_migrations(connection)
+
+        self.assertEqual(applied, [migration.version for migration in migrations.MIGRATIONS])
+        with self.engine.connect() as connection:
+            self.assertEqual(migrations.get_applied_version(connection), migrations.LATEST_VERSION)
+            self.assertIn(convo.SPEAKER_INDEX_NAME, self._index_names(connection, convo.TABLE_NAME))
+            self.assertIn(convo.TEXT_HASH_INDEX_NAME, self._index_names(connection, convo.TABLE_NAME))
+            self.assertIn(lresp.CONVERSATION_INDEX_NAME, self._index_names(connection, lresp.TABLE_NAME))
+            hashes = connection.exec_driver_sql('SELECT Text, TextHash FROM Conversations').fetchall()
+        self.assertEqual([(text, convo.text_hash(text)) for text, _ in hashes], hashes)
+
+        conversations = convo.Conversations(self.engine)
+        self.assertEqual(conversations.get_convo_id_by_speaker_and_text('Speaker', 'hi there', 1), 2)
+
+    def test_migrations_are_applied_once(self):
+        self._create_unversioned_tables()
+        with self.engine.begin() as connection:
+            migrations.run_migrations(connection)
+
+        with self.engine.begin() as connection:
+            self.assertEqual(migrations.run_migrations(connection), [])
+
+    def test_new_database_tables_use_declared_schema(self):
+        with self.engine.begin() as connection:
+            migrations.run_migrations(connection)
+
+        convo.Conversations(self.engine)
+        lresp.LLMResponses(self.engine)
+
+        with self.engine.connect() as connection:
+            self.assertIn(convo.TEXT_HASH_INDEX_NAME, self._index_names(connection, convo.TABLE_NAME))
+            self.assertIn(lresp.CONVERSATION_INDEX_NAME, self._index_names(connection, lresp.TABLE_NAME))
+
+    def test_lookup_by_text_uses_index(self):
+        conversations = convo.Conversations(self.engine)
+        stmt = conversations._convo_id_by_text_stmt.compile(self.engine)
+
+        with self.engine.connect() as connection:
+            plan = connection.exec_driver_sql(
+                f'EXPLAIN QUERY PLAN {stmt}', (1, 'You', convo.text_hash('hello'), 'hello')).fetchall()
+
+        self.assertIn(convo.TEXT_HASH_INDEX_NAME, ' '.join(str(row[-1]) for row in plan))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -145,6 +145,7 @@ class DesktopController:
         """Persist the LLM response interval and update its label."""
         try:
             interval = self.settings_service.save_llm_response_interval(slider_value)
+            self.global_vars.responder.update_response_interval(interval)
             self.presenter.set_response_interval(interval)
             self.capture_action(f"Update LLM response interval to {interval}")
         except Exception as exception:
@@ -0,0 +1,100 @@
+"""Dispatch UI actions posted from worker threads on the Tk main loop."""
+
+from __future__ import annotations
+
+import threading
+import time
+import tkinter as tk
+from collections import OrderedDict
+
+from tsutils import app_logging as al
+
+
+logger = al.get_module_logger(al.UI_LOGGER)
+
+# Virtual event generated on the main window when actions are posted
+WAKE_EVENT = "<<UIActionsPosted>>"
+# Minimum time between two runs of the posted actions
+FRAME_MS = 33
+# Time between two wake up attempts before the main loop starts
+WAKE_RETRY_SECONDS = 0.1
+# Key of the updates of the response textbox
+RESPONSE_TEXTBOX_KEY = "response_textbox"
+
+
+class UIDispatcher:
+    """Run actions posted from any thread on the Tk main loop.
+
+    Posting never calls Tk, it only queues the action. The first action posted
+    after a run signals a waker thread, which wakes the Tk loop with a virtual
+    event. Tk calls from other threads wait for the main loop, only the waker
+    thread waits, so actions can be posted while holding locks the Tk thread
+    takes. All actions posted until the next frame are then run together, in order.
+    An action posted with a key replaces the pending action with the same key
+    and moves to the end, so a widget is updated once per frame with its latest
+    state. Nothing is scheduled while no action is posted.
+    """
+
+    def __init__(self, widget, frame_ms: int = FRAME_MS, clock=time.monotonic):
+        self.widget = widget
+        self.frame_ms = frame_ms
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pending: OrderedDict = OrderedDict()
+        self._wake_pending = False
+        self._last_dispatch = 0.0
+        self._wake_signal = threading.Event()
+        widget.bind(WAKE_EVENT, self._on_wake, add="+")
+        # Run actions posted before the main loop started
+        widget.after_idle(self.dispatch)
+        self._waker = threading.Thread(target=self._run_waker, name="UIWaker", daemon=True)
+        self._waker.start()
+
+    def post(self, callback, args: tuple = (), kwargs: dict = None, key=None):
+        """Queue callback(*args, **kwargs) for the Tk main loop. Does not block."""
+        with self._lock:
+            if key is None:
+                key = object()
+            else:
+                self._pending.pop(key, None)
+            self._pending[key] = (callback, args, kwargs or {})
+            if self._wake_pending:
+                return
+            self._wake_pending = True
+        self._wake_signal.set()
+
+    def dispatch(self):
+        """Run all pending actions. Called on the Tk main loop."""
+        with self._lock:
+            actions = list(self._pending.values())
+            self._pending.clear()
+            self._wake_pending = False
+        self._last_dispatch = self._clock()
+
+        for callback, args, kwargs in actions:
+            try:
+                callback(*args, **kwargs)
+            except Exception as exception:
+                logger.error(f"Error processing queued UI action: {exception}")
+
+    def _run_waker(self):
+        while True:
+            self._wake_signal.wait()
+            self._wake_signal.clear()
+            while True:
+                try:
+                    self.widget.event_generate(WAKE_EVENT, when="tail")
+                    break
+                except RuntimeError:
+                    # The main loop has not started yet
+                    time.sleep(WAKE_RETRY_SECONDS)
+                except tk.TclError as exception:
+                    logger.debug(f"UI window closed, stopping the UI waker: {exception}")
+                    return
+
+    def _on_wake(self, event=None):
+        delay_ms = int((self._last_dispatch - self._clock()) * 1000) + self.frame_ms
+        if delay_ms > 0:
+            self.widget.after(delay_ms, self.dispatch)
+        else:
+            self.dispatch()
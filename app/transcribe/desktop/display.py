@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-import datetime
 import tkinter as tk
 from io import BytesIO
 
@@ -10,6 +9,16 @@ import customtkinter as ctk
 import pyperclip
 from PIL import Image, ImageTk
 
+from .. import constants
+from ..core.conversation import CHANGE_CLEAR, CHANGE_INSERT, CHANGE_UPDATE
+from .dispatcher import RESPONSE_TEXTBOX_KEY
+
+# Personas shown in the transcript
+TRANSCRIPT_PERSONAS = (constants.PERSONA_YOU, constants.PERSONA_SPEAKER)
+# Rows kept in the transcript widget, older rows are paged in from the conversation
+MAX_TRANSCRIPT_ROWS = 2000
+TRANSCRIPT_PAGE_ROWS = 200
+
 
 class DesktopDisplayManager:
     """Encapsulate widget-facing display updates for the desktop UI."""
@@ -18,28 +27,28 @@ class DesktopDisplayManager:
         self.ui = None
         self.ui_font_size = ui_font_size
         self.popup_window = None
-        self.last_transcript_ui_update_time: datetime.datetime | None = None
+        # Conversation version shown in the transcript
+        self.transcript_version = 0
+        # Text of each textbox written by write_in_textbox
+        self._textbox_text: dict = {}
 
     def bind_ui(self, ui):
         """Attach the active UI instance."""
         self.ui = ui
 
     def update_initial_transcripts(self, runtime):
-        """Populate the initial transcript and start polling the response view."""
-        self.update_transcript_ui(runtime.transcriber, self.ui.transcript_text, runtime)
-        self.update_response_ui(
-            runtime.responder,
-            self.ui.response_textbox,
-            self.ui.update_interval_slider_label,
-            self.ui.update_interval_slider,
-            runtime,
-        )
-        runtime.convo.set_handlers(
-            self.queue_update_last_row,
-            self.queue_add_transcript_line,
-            partial=self.queue_upsert_partial_row,
-            finalize_partial=self.queue_finalize_partial_row,
-        )
+        """Populate the initial transcript and response, then follow conversation changes."""
+        # Changes made while the transcript is loaded are skipped by their version
+        runtime.convo.add_change_listener(self.queue_conversation_change)
+        self.ui.transcript_text.set_row_source(
+            lambda before_row_key, count: runtime.convo.get_transcript_rows(
+                TRANSCRIPT_PERSONAS, count=count, before_row_key=before_row_key)[1],
+            page_rows=TRANSCRIPT_PAGE_ROWS,
+            is_source_row=runtime.convo.is_row_key)
+        self.update_transcript_ui(self.ui.transcript_text, runtime)
+        self.update_response_ui(runtime)
+        # Rows are rendered from conversation changes, only provider partials use handlers
+        runtime.convo.set_handlers(None, None, partial=self.queue_upsert_partial_row)
 
     def update_last_row(self, speaker: str, input_text: str):
         """Replace the latest transcript row for a speaker."""
@@ -57,9 +66,48 @@ class DesktopDisplayManager:
         """Queue transcript insertion on the Tk thread."""
         self.ui.enqueue_ui_action(self.ui.transcript_text.add_text_to_bottom, input_text)
 
+    def queue_conversation_change(self, change):
+        """Queue a conversation change shown in the transcript or response on the Tk thread.
+        Updates of the same row, and of the response, are applied once per frame."""
+        if change.persona == constants.PERSONA_ASSISTANT:
+            self.queue_response_update()
+        elif change.action == CHANGE_UPDATE and change.persona in TRANSCRIPT_PERSONAS:
+            self.ui.enqueue_keyed_ui_action(("transcript_row", change.row_key),
+                                            self.apply_conversation_change, change)
+        elif change.action == CHANGE_CLEAR or change.persona in TRANSCRIPT_PERSONAS:
+            self.ui.enqueue_ui_action(self.apply_conversation_change, change)
+
+    def queue_response_update(self):
+        """Queue a refresh of the response textbox on the Tk thread."""
+        self.ui.enqueue_keyed_ui_action(RESPONSE_TEXTBOX_KEY, self.update_response_ui, self.ui.global_vars)
+
+    def select_transcript_row(self, input_text: str):
+        """Show the response of the selected transcript row."""
+        self.ui.global_vars.convo.on_convo_select(input_text)
+        self.update_response_ui(self.ui.global_vars)
+
+    def apply_conversation_change(self, change):
+        """Apply one inserted or updated row to the transcript."""
+        if change.version <= self.transcript_version:
+            return
+        self.transcript_version = change.version
+        textbox = self.ui.transcript_text
+
+        if change.action == CHANGE_CLEAR:
+            textbox.clear_all_text()
+        elif change.action == CHANGE_INSERT:
+            if change.partial_id:
+                textbox.finalize_keyed_row(change.partial_id, change.text, new_row_key=change.row_key)
+            else:
+                textbox.upsert_keyed_row(change.row_key, change.text)
+        elif change.action == CHANGE_UPDATE:
+            # Rows paged out of the widget are read from the conversation when scrolled to
+            textbox.update_keyed_row(change.row_key, change.text)
+
     def queue_upsert_partial_row(self, item_id: str, input_text: str):
         """Queue insertion or replacement of one provider-addressed partial row."""
-        self.ui.enqueue_ui_action(self.ui.transcript_text.upsert_keyed_row, item_id, input_text)
+        self.ui.enqueue_keyed_ui_action(("transcript_row", item_id),
+                                        self.ui.transcript_text.upsert_keyed_row, item_id, input_text)
 
     def queue_finalize_partial_row(self, item_id: str, input_text: str):
         """Queue replacement of a provider partial with its durable final text."""
@@ -174,12 +222,7 @@ class DesktopDisplayManager:
 
         def save_edit():
             new_text = edit_text.get("1.0", tk.END).strip()
-            text_widget = self.ui.transcript_text.text_widget
-            text_widget.configure(state="normal")
-            text_widget.delete(current_line, f"{current_line} lineend")
-            text_widget.insert(current_line, f"{speaker}: {new_text}")
-            text_widget.configure(state="disabled")
-
+            # The transcript row is rewritten by the resulting conversation change
             convo_id = runtime.convo.get_convo_id(persona=speaker, input_text=speaker_text)
             runtime.convo.update_conversation_by_id(persona=speaker, convo_id=convo_id, text=new_text)
             edit_window.destroy()
@@ -191,27 +234,24 @@ class DesktopDisplayManager:
             pady=10,
         )
 
-    def update_transcript_ui(self, transcriber, textbox, runtime):
-        """Refresh the transcript textbox if conversation state changed."""
-        if (
-            self.last_transcript_ui_update_time is None
-            or self.last_transcript_ui_update_time < runtime.convo.last_update
-        ):
-            transcript_strings = transcriber.get_transcript()
-            if isinstance(transcript_strings, list):
-                for line in transcript_strings:
-                    textbox.add_text_to_bottom(line)
-            else:
-                textbox.add_text_to_bottom(transcript_strings)
-            textbox.scroll_to_bottom()
-            self.last_transcript_ui_update_time = datetime.datetime.utcnow()
+    def update_transcript_ui(self, textbox, runtime):
+        """Render the last rows of the transcript if the conversation changed
+        since they were last rendered. Later changes are applied as deltas."""
+        version, rows = runtime.convo.get_transcript_rows(TRANSCRIPT_PERSONAS, count=MAX_TRANSCRIPT_ROWS)
+        if version <= self.transcript_version:
+            return
+        self.transcript_version = version
+        textbox.clear_all_text()
+        textbox.append_keyed_rows(rows)
+        textbox.scroll_to_bottom()
 
-    def update_response_ui(self, responder, textbox, update_interval_slider_label, update_interval_slider, runtime):
-        """Refresh the response textbox and reschedule polling."""
+    def update_response_ui(self, runtime):
+        """Refresh the response textbox. Called when a response changes or a row is selected."""
         response = None
+        textbox = self.ui.response_textbox
 
         if runtime.responder.enabled or runtime.update_response_now:
-            response = responder.response
+            response = runtime.responder.response
 
         if runtime.previous_response is not None:
             response = runtime.previous_response
@@ -222,25 +262,19 @@ class DesktopDisplayManager:
             textbox.configure(state="disabled")
             textbox.see("end")
 
-        update_interval = int(update_interval_slider.get())
-        responder.update_response_interval(update_interval)
-        update_interval_slider_label.configure(text=f"LLM Response interval: {update_interval} seconds")
-
-        textbox.after(
-            300,
-            self.update_response_ui,
-            responder,
-            textbox,
-            update_interval_slider_label,
-            update_interval_slider,
-            runtime,
-        )
+    def write_in_textbox(self, textbox, text: str):
+        """Update a textbox while preserving current selection.
+        Text that extends the current text is appended, unchanged text is not rewritten."""
+        current_text = self._textbox_text.get(id(textbox))
+        if current_text is not None and text.startswith(current_text):
+            if len(text) > len(current_text):
+                textbox.insert("end", text[len(current_text):])
+                self._textbox_text[id(textbox)] = text
+            return
 
-    @staticmethod
-    def write_in_textbox(textbox, text: str):
-        """Update a textbox while preserving current selection."""
         selected_ranges = textbox.tag_ranges("sel")
         textbox.delete("0.0", "end")
         textbox.insert("0.0", text)
         if len(selected_ranges):
             textbox.tag_add("sel", selected_ranges[0], selected_ranges[1])
+        self._textbox_text[id(textbox)] = text
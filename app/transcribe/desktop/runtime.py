@@ -12,13 +12,17 @@ from ..db.app_db import AppDB
 from ..providers.llm import create_responder
 from ..providers.stt import create_transcriber, ensure_ffmpeg_available
 
-from tsutils import utilities
+from tsutils import task_queue, utilities
+
+# Invocations older than this are archived and removed from the DB
+DEFAULT_DB_RETENTION_DAYS = 90
 
 
 def initialize_desktop_runtime(runtime, config: dict):
     """Initialize the desktop runtime state without launching the UI."""
     ensure_ffmpeg_available()
     initiate_db(runtime)
+    schedule_db_clean(runtime, config)
     if config["General"]["stt"].lower() == "openai-realtime":
         max_chunks = max(2, int(config.get("OpenAIRealtime", {}).get("max_raw_audio_chunks", 240)))
         runtime.audio_queue = queue.Queue(maxsize=max_chunks)
@@ -128,6 +132,20 @@ def initiate_db(runtime):
     adb.initialize_app()
 
 
+def schedule_db_clean(runtime, config: dict):
+    """Queue archival of old invocations on the task queue thread."""
+    retention_days = float(config.get("General", {}).get("db_retention_days", DEFAULT_DB_RETENTION_DAYS))
+    if retention_days <= 0:
+        return
+
+    runtime.task_worker.set_handler(task_queue.TaskQueueEnum.DB_CLEAN, AppDB().clean_db)
+    runtime.task_worker.add(
+        task_type=task_queue.TaskQueueEnum.DB_CLEAN,
+        archive_folder=f"{runtime.data_dir}/logs/archive",
+        retention_days=retention_days,
+    )
+
+
 def shutdown(runtime):
     """Activities to be performed right before application shutdown."""
     if runtime.transcriber is not None:
@@ -8,6 +8,7 @@ import customtkinter as ctk
 
 from .. import prompts
 from ..uicomp.selectable_text import SelectableText
+from .display import MAX_TRANSCRIPT_ROWS
 
 from tsutils.language import LANGUAGES_DICT
 
@@ -45,9 +46,9 @@ class DesktopViewBuilder:
 
     def create_transcript_panel(self, ui):
         """Create the transcript panel."""
-        ui.transcript_text = SelectableText(ui.main_frame)
+        ui.transcript_text = SelectableText(ui.main_frame, max_rows=MAX_TRANSCRIPT_ROWS)
         ui.transcript_text.pack(side="left", fill="both", expand=True, padx=10, pady=10)
-        ui.transcript_text.set_callbacks(ui.global_vars.convo.on_convo_select)
+        ui.transcript_text.set_callbacks(ui.select_transcript_row)
 
     def create_response_panel(self, ui):
         """Create the response panel."""
@@ -7,6 +7,7 @@ from . import constants, conversation, prompts
 from .db import AppDB as appdb
 from .db import llm_responses as llmrdb
 from .db import summaries as s
+from .response_stream import DEFAULT_STREAM_FLUSH_INTERVAL_MS, ResponseStream
 from tsutils import app_logging as al
 from tsutils import duration, utilities
 
@@ -39,6 +40,10 @@ class GPTResponder:
         # This var is used by UI to populate the response textbox
         self.response = prompts.INITIAL_RESPONSE
         self.llm_response_interval = config['General']['llm_response_interval']
+        self.stream_flush_interval_ms = config['General'].get('llm_stream_flush_interval_ms',
+                                                              DEFAULT_STREAM_FLUSH_INTERVAL_MS)
+        # Timing of the last streamed response
+        self.last_stream_stats = None
         self.conversation = convo
         self.config = config
         self.save_response_to_file = save_to_file
@@ -116,25 +121,45 @@ class GPTResponder:
     def _get_llm_response(self, messages, temperature, timeout) -> str:
         """Send a request to the LLM and process the streaming response."""
         with duration.Duration(name='OpenAI Chat Completion', screen=False):
-            multi_turn_response = self.llm_client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature,
-                timeout=timeout,
-                stream=True
-            )
+            response_stream = self._create_response_stream()
+            try:
+                multi_turn_response = self.llm_client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    timeout=timeout,
+                    stream=True
+                )
 
-            collected_messages = ""
-            for chunk in multi_turn_response:
-                chunk_message = chunk.choices[0].delta  # extract the message
-                if chunk_message.content:
-                    message_text = chunk_message.content
-                    collected_messages += message_text
-                    self._update_conversation(persona=constants.PERSONA_ASSISTANT,
-                                              response=collected_messages,
-                                              update_previous=True)
+                for chunk in multi_turn_response:
+                    chunk_message = chunk.choices[0].delta  # extract the message
+                    if chunk_message.content:
+                        response_stream.add(chunk_message.content)
+            finally:
+                # Text received before a failure is still published
+                collected_messages = self._close_response_stream(response_stream)
             return collected_messages
 
+    def _create_response_stream(self) -> ResponseStream:
+        """Create a stream that updates the last assistant row of the conversation
+        at the configured cadence."""
+        return ResponseStream(
+            on_flush=lambda text: self._update_conversation(persona=constants.PERSONA_ASSISTANT,
+                                                            response=text,
+                                                            update_previous=True),
+            flush_interval_ms=self.stream_flush_interval_ms)
+
+    def _close_response_stream(self, response_stream: ResponseStream) -> str:
+        """Publish the rest of a streamed response and log its timing."""
+        collected_messages = response_stream.close()
+        stats = response_stream.stats
+        self.last_stream_stats = stats
+        if stats.first_token_seconds is not None:
+            logger.info(f'LLM response: first token in {stats.first_token_seconds:.2f}s, '
+                        f'{stats.tokens} tokens at {stats.tokens_per_second:.1f} tokens/s, '
+                        f'{stats.flushes} conversation updates')
+        return collected_messages
+
     def _insert_response_in_db(self, last_convo_id: int, response: str):
         """Insert the generated response into the database."""
         inv_id = appdb().get_invocation_id()
@@ -269,6 +294,7 @@ class GPTResponder:
 
             with duration.Duration(name='OpenAI Chat Completion Selected', screen=False):
                 prompt = prompts.create_prompt_for_text(text=text, config=self.config)
+                response_stream = self._create_response_stream()
                 llm_response = self.llm_client.chat.completions.create(
                     model=self.model,
                     messages=prompt,
@@ -282,16 +308,14 @@ class GPTResponder:
                 self._update_conversation(persona=constants.PERSONA_ASSISTANT,
                                           response="  ",
                                           update_previous=False)
-                collected_messages = ""
-                for chunk in llm_response:
-                    chunk_message = chunk.choices[0].delta  # extract the message
-                    if chunk_message.content:
-                        message_text = chunk_message.content
-                        collected_messages += message_text
-                        # print(f"{message_text}", end="")
-                        self._update_conversation(persona=constants.PERSONA_ASSISTANT,
-                                                  response=collected_messages,
-                                                  update_previous=True)
+                try:
+                    for chunk in llm_response:
+                        chunk_message = chunk.choices[0].delta  # extract the message
+                        if chunk_message.content:
+                            response_stream.add(chunk_message.content)
+                finally:
+                    # Text received before a failure is still published
+                    collected_messages = self._close_response_stream(response_stream)
 
         except Exception as exception:
             print('Error when attempting to get a response from LLM.')
@@ -2,17 +2,28 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from difflib import SequenceMatcher
 import re
 
-from sdk.transcription_result import TranscriptSegment, TranscriptionHypothesis
+from sdk.transcription_result import TranscriptionHypothesis
 
 
 DEFAULT_WINDOW_SECONDS = 30
 DEFAULT_MUTABLE_TAIL_SECONDS = 5
 DEFAULT_AUDIO_CONTEXT_SECONDS = 10
 DEFAULT_STABILITY_PASSES = 2
+# text: merge overlapping windows by their words.
+# timestamps: merge overlapping windows by segment and word timestamps. Only audio
+# after the committed text, plus the audio context, is transcribed again.
+DEFAULT_ALIGNMENT = "text"
+ALIGNMENT_MODES = ("text", "timestamps")
+# Tokens of existing text compared beyond the length of the hypothesis
+MERGE_WINDOW_SLACK_TOKENS = 32
+# Tokens kept per speaker for merging. Older tokens are frozen into plain text,
+# so the work per hypothesis does not grow with the length of the transcript.
+MAX_TAIL_TOKENS = 512
+RETAINED_TAIL_TOKENS = 256
 
 
 @dataclass
@@ -26,11 +37,23 @@ class LiveTranscriptUpdate:
 
 @dataclass
 class _SpeakerTranscriptState:
-    current_text: str = ""
-    finalized_text: str = ""
+    frozen_text: str = ""
+    tokens: list[str] = field(default_factory=list)
+    normalized_tokens: list[str] = field(default_factory=list)
+    # Tokens before this index were finalized and are never rewritten
+    committed_tokens: int = 0
+    # Source-relative end of the audio of the committed tokens
+    committed_seconds: float = 0.0
     last_hypothesis_text: str = ""
     stability_count: int = 0
 
+    @property
+    def current_text(self) -> str:
+        tail_text = " ".join(self.tokens)
+        if not self.frozen_text:
+            return tail_text
+        return f"{self.frozen_text} {tail_text}".strip()
+
 
 class LiveTranscriptManager:
     """Maintain stable live transcript text across overlapping STT windows."""
@@ -43,132 +66,312 @@ class LiveTranscriptManager:
         self.stability_passes = int(
             general.get("live_transcription_stability_passes", DEFAULT_STABILITY_PASSES)
         )
+        self.audio_context_seconds = float(
+            general.get("live_transcription_audio_context_seconds", DEFAULT_AUDIO_CONTEXT_SECONDS)
+        )
+        self.alignment = str(general.get("live_transcription_alignment", DEFAULT_ALIGNMENT)).lower()
+        if self.alignment not in ALIGNMENT_MODES:
+            raise ValueError(f"Unknown live_transcription_alignment {self.alignment}. "
+                             f"Expected one of {', '.join(ALIGNMENT_MODES)}.")
         self._states: dict[str, _SpeakerTranscriptState] = {}
 
     def clear(self):
         """Clear all live transcript reconciliation state."""
         self._states.clear()
 
+    def restart_audio_timeline(self, speaker: str):
+        """The speaker's audio window was cleared and its timeline restarted at zero.
+        Committed audio positions of the speaker no longer apply."""
+        state = self._states.get(speaker)
+        if state is not None:
+            state.committed_seconds = 0.0
+
+    def retained_audio_start_seconds(self, speaker: str) -> float:
+        """Source-relative start of the audio that has to be retained for the speaker's
+        current phrase. Audio of committed text is not transcribed again, except for
+        the audio context before the committed position."""
+        state = self._states.get(speaker)
+        if state is None:
+            return 0.0
+        return max(0.0, state.committed_seconds - self.audio_context_seconds)
+
     def process_hypothesis(
         self,
         speaker: str,
         hypothesis: TranscriptionHypothesis,
         new_phrase: bool,
     ) -> LiveTranscriptUpdate:
-        """Merge a provider hypothesis into the speaker's current transcript."""
+        """Merge a provider hypothesis into the speaker's current transcript.
+
+        Only the end of the speaker's tokens, about as long as the hypothesis,
+        is compared with the hypothesis.
+        """
         state = self._states.setdefault(speaker, _SpeakerTranscriptState())
         hypothesis_text = self._clean_text(hypothesis.text)
         if not hypothesis_text:
             return LiveTranscriptUpdate(text=state.current_text, update_previous=True, changed=False)
 
+        if self.alignment == "timestamps" and self._has_timestamps(hypothesis):
+            return self._process_aligned_hypothesis(speaker, hypothesis, hypothesis_text, new_phrase)
+
+        hypothesis_tokens = hypothesis_text.split()
+        finalized_text, finalized_seconds = self._finalized_prefix(hypothesis)
+        finalized_count = len(finalized_text.split())
+
         if new_phrase:
-            state.current_text = hypothesis_text
-            state.finalized_text = self._finalized_prefix(hypothesis)
-            state.last_hypothesis_text = hypothesis_text
-            state.stability_count = 1
+            state = _SpeakerTranscriptState(last_hypothesis_text=hypothesis_text, stability_count=1)
+            self._states[speaker] = state
+            self._replace_tail(state, 0, hypothesis_tokens)
+            state.committed_tokens = min(finalized_count, len(state.tokens))
+            state.committed_seconds = finalized_seconds
+            self._commit_if_stable(state, hypothesis)
+            self._freeze_old_tokens(state)
             return LiveTranscriptUpdate(text=state.current_text, update_previous=False, changed=True)
 
-        merged_text = self._merge_text(state.current_text, hypothesis_text)
-        protected_text = self._protect_finalized_prefix(state.finalized_text, merged_text)
-        changed = protected_text != state.current_text
+        window_start = max(0, len(state.tokens) - len(hypothesis_tokens) - MERGE_WINDOW_SLACK_TOKENS)
+        merged_tokens, hypothesis_start = self._merge_tokens(
+            state.tokens[window_start:],
+            hypothesis_tokens,
+            state.normalized_tokens[window_start:],
+        )
+        committed_in_window = state.committed_tokens - window_start
+        if committed_in_window > 0:
+            if hypothesis_start is None:
+                # The hypothesis is not aligned with the window, drop its tokens up to
+                # the end of the committed tokens instead of counting positions
+                skipped = self._committed_end_in_hypothesis(
+                    state.normalized_tokens[window_start:state.committed_tokens], hypothesis_tokens)
+                hypothesis_start = committed_in_window - skipped
+                merged_tokens = hypothesis_tokens[skipped:]
+            else:
+                merged_tokens = merged_tokens[committed_in_window:]
+            merged_tokens = state.tokens[window_start:state.committed_tokens] + merged_tokens
+        elif hypothesis_start is None:
+            hypothesis_start = 0
+        changed = merged_tokens != state.tokens[window_start:]
 
         if hypothesis_text == state.last_hypothesis_text:
             state.stability_count += 1
         else:
             state.stability_count = 1
 
-        state.current_text = protected_text
-        state.finalized_text = self._merge_text(
-            state.finalized_text,
-            self._finalized_prefix(hypothesis),
-        )
+        self._replace_tail(state, window_start, merged_tokens)
+        if finalized_count:
+            state.committed_tokens = min(
+                len(state.tokens),
+                max(state.committed_tokens, window_start + hypothesis_start + finalized_count),
+            )
+            state.committed_seconds = max(state.committed_seconds, finalized_seconds)
         state.last_hypothesis_text = hypothesis_text
+        self._commit_if_stable(state, hypothesis)
+        self._freeze_old_tokens(state)
         return LiveTranscriptUpdate(text=state.current_text, update_previous=True, changed=changed)
 
-    def _finalized_prefix(self, hypothesis: TranscriptionHypothesis) -> str:
+    def _process_aligned_hypothesis(
+        self,
+        speaker: str,
+        hypothesis: TranscriptionHypothesis,
+        hypothesis_text: str,
+        new_phrase: bool,
+    ) -> LiveTranscriptUpdate:
+        """Merge a hypothesis by its timestamps.
+
+        Words that end before the mutable tail are committed. The words of the
+        hypothesis after the committed audio replace the speaker's uncommitted tail.
+        """
+        state = self._states[speaker]
+        if new_phrase:
+            state = _SpeakerTranscriptState()
+            self._states[speaker] = state
+
+        cutoff = hypothesis.audio_end_seconds - self.mutable_tail_seconds
+        committed_words = []
+        tail_words = []
+        committed_seconds = state.committed_seconds
+        for text, start_seconds, end_seconds in self._timed_words(hypothesis):
+            if (start_seconds + end_seconds) / 2 < state.committed_seconds:
+                # Context audio transcribed again, its text is already committed
+                continue
+            if end_seconds <= cutoff and not tail_words:
+                committed_words.append(text)
+                committed_seconds = max(committed_seconds, end_seconds)
+            else:
+                tail_words.append(text)
+
+        committed_tokens = self._clean_text(" ".join(committed_words)).split()
+        new_tokens = committed_tokens + self._clean_text(" ".join(tail_words)).split()
+        changed = new_phrase or new_tokens != state.tokens[state.committed_tokens:]
+
+        if hypothesis_text == state.last_hypothesis_text:
+            state.stability_count += 1
+        else:
+            state.stability_count = 1
+
+        self._replace_tail(state, state.committed_tokens, new_tokens)
+        state.committed_tokens += len(committed_tokens)
+        state.committed_seconds = committed_seconds
+        state.last_hypothesis_text = hypothesis_text
+        self._commit_if_stable(state, hypothesis)
+        self._freeze_old_tokens(state)
+        return LiveTranscriptUpdate(text=state.current_text, update_previous=not new_phrase,
+                                    changed=changed)
+
+    def _commit_if_stable(self, state: _SpeakerTranscriptState, hypothesis: TranscriptionHypothesis):
+        """Commit all text once the same hypothesis was seen stability_passes times in a row,
+        including the mutable tail."""
+        if state.stability_count < self.stability_passes:
+            return
+        if self._has_timestamps(hypothesis):
+            speech_end_seconds = max((end_seconds for _, _, end_seconds in self._timed_words(hypothesis)),
+                                     default=hypothesis.audio_end_seconds)
+        else:
+            speech_end_seconds = hypothesis.audio_end_seconds
+        state.committed_tokens = len(state.tokens)
+        state.committed_seconds = max(state.committed_seconds, speech_end_seconds)
+
+    @staticmethod
+    def _has_timestamps(hypothesis: TranscriptionHypothesis) -> bool:
+        """False when the provider returned text without timestamps, normalized as a
+        single segment spanning the whole window."""
+        segments = hypothesis.segments
+        if not segments:
+            return False
+        if len(segments) > 1 or segments[0].words:
+            return True
+        return (segments[0].start_seconds, segments[0].end_seconds) != \
+            (hypothesis.audio_start_seconds, hypothesis.audio_end_seconds)
+
+    @staticmethod
+    def _timed_words(hypothesis: TranscriptionHypothesis):
+        """Text with start and end seconds, per word where the provider returned word
+        timestamps and per segment otherwise."""
+        for segment in hypothesis.segments:
+            if segment.words:
+                for word in segment.words:
+                    yield word.text, word.start_seconds, word.end_seconds
+            elif segment.text:
+                yield segment.text, segment.start_seconds, segment.end_seconds
+
+    def _finalized_prefix(self, hypothesis: TranscriptionHypothesis) -> tuple[str, float]:
+        """Text of the segments that end before the mutable tail and the end of their audio."""
         cutoff = hypothesis.audio_end_seconds - self.mutable_tail_seconds
         finalized_segments = [
             segment for segment in hypothesis.segments if segment.end_seconds <= cutoff
         ]
-        return self._clean_text(" ".join(segment.text for segment in finalized_segments))
+        finalized_seconds = max((segment.end_seconds for segment in finalized_segments), default=0.0)
+        return (self._clean_text(" ".join(segment.text for segment in finalized_segments)),
+                finalized_seconds)
 
     @classmethod
-    def _protect_finalized_prefix(cls, finalized_text: str, candidate_text: str) -> str:
-        finalized_text = cls._clean_text(finalized_text)
-        candidate_text = cls._clean_text(candidate_text)
-        if not finalized_text or candidate_text.startswith(finalized_text):
-            return candidate_text
-        return cls._merge_text(finalized_text, candidate_text)
+    def _replace_tail(cls, state: _SpeakerTranscriptState, start: int, tokens: list[str]):
+        state.tokens[start:] = tokens
+        state.normalized_tokens[start:] = [cls._normalize_for_match(token) for token in tokens]
+
+    @staticmethod
+    def _freeze_old_tokens(state: _SpeakerTranscriptState):
+        """Move the oldest tokens into frozen text once the tail grows too long."""
+        if len(state.tokens) <= MAX_TAIL_TOKENS:
+            return
+        frozen_count = len(state.tokens) - RETAINED_TAIL_TOKENS
+        frozen_text = " ".join(state.tokens[:frozen_count])
+        state.frozen_text = f"{state.frozen_text} {frozen_text}".strip()
+        del state.tokens[:frozen_count]
+        del state.normalized_tokens[:frozen_count]
+        state.committed_tokens = max(0, state.committed_tokens - frozen_count)
 
     @classmethod
     def _merge_text(cls, existing_text: str, hypothesis_text: str) -> str:
         existing_text = cls._clean_text(existing_text)
         hypothesis_text = cls._clean_text(hypothesis_text)
-        if not existing_text:
-            return hypothesis_text
-        if not hypothesis_text:
-            return existing_text
-        if existing_text == hypothesis_text:
-            return existing_text
+        merged_tokens, _ = cls._merge_tokens(existing_text.split(), hypothesis_text.split())
+        return " ".join(merged_tokens)
+
+    @classmethod
+    def _merge_tokens(
+        cls,
+        existing_tokens: list[str],
+        hypothesis_tokens: list[str],
+        existing_normalized: list[str] | None = None,
+    ) -> tuple[list[str], int | None]:
+        """Merge hypothesis tokens into existing tokens.
+
+        Returns the merged tokens and the index in them where the first
+        hypothesis token was placed. The index is negative when the start of
+        the hypothesis was dropped, and None when a similar hypothesis replaced
+        the existing tokens without being aligned with them.
+        """
+        if not existing_tokens:
+            return list(hypothesis_tokens), 0
+        if not hypothesis_tokens:
+            return list(existing_tokens), len(existing_tokens)
+
+        existing_text = " ".join(existing_tokens)
+        hypothesis_text = " ".join(hypothesis_tokens)
         if hypothesis_text.startswith(existing_text):
-            return hypothesis_text
+            return list(hypothesis_tokens), 0
         if existing_text.endswith(hypothesis_text):
-            return existing_text
+            return list(existing_tokens), len(existing_tokens) - len(hypothesis_tokens)
 
-        existing_tokens = existing_text.split()
-        hypothesis_tokens = hypothesis_text.split()
-        overlap = cls._token_overlap(existing_tokens, hypothesis_tokens)
+        if existing_normalized is None:
+            existing_normalized = [cls._normalize_for_match(token) for token in existing_tokens]
+        hypothesis_normalized = [cls._normalize_for_match(token) for token in hypothesis_tokens]
+
+        overlap = cls._token_overlap(existing_normalized, hypothesis_normalized)
         if overlap:
-            return " ".join(existing_tokens + hypothesis_tokens[overlap:])
+            return existing_tokens + hypothesis_tokens[overlap:], len(existing_tokens) - overlap
 
-        rolling_window_merge = cls._merge_rolling_window(existing_tokens, hypothesis_tokens)
-        if rolling_window_merge:
-            return rolling_window_merge
+        rolling_window_match = cls._rolling_window_match(existing_normalized, hypothesis_normalized)
+        if rolling_window_match:
+            existing_index, hypothesis_index = rolling_window_match
+            return (existing_tokens[:existing_index] + hypothesis_tokens[hypothesis_index:],
+                    existing_index - hypothesis_index)
 
         similarity = SequenceMatcher(
             None,
-            cls._normalize_for_match(existing_text),
-            cls._normalize_for_match(hypothesis_text),
+            " ".join(token for token in existing_normalized if token),
+            " ".join(token for token in hypothesis_normalized if token),
         ).ratio()
         if similarity >= 0.72:
-            return hypothesis_text
-        return f"{existing_text} {hypothesis_text}".strip()
-
-    @classmethod
-    def _merge_rolling_window(cls, existing_tokens: list[str], hypothesis_tokens: list[str]) -> str:
-        """Replace an overlapping rolling-window region instead of appending it."""
-        if not existing_tokens or not hypothesis_tokens:
-            return ""
+            return list(hypothesis_tokens), None
+        return existing_tokens + hypothesis_tokens, len(existing_tokens)
 
-        matcher = SequenceMatcher(
-            None,
-            [cls._normalize_for_match(token) for token in existing_tokens],
-            [cls._normalize_for_match(token) for token in hypothesis_tokens],
-            autojunk=False,
-        )
+    @staticmethod
+    def _rolling_window_match(existing_normalized: list[str],
+                              hypothesis_normalized: list[str]) -> tuple[int, int] | None:
+        """Find where an overlapping rolling-window region starts in both token lists,
+        so the region is replaced instead of appended."""
+        matcher = SequenceMatcher(None, existing_normalized, hypothesis_normalized, autojunk=False)
         best_match = max(matcher.get_matching_blocks(), key=lambda match: match.size)
         if best_match.size == 0:
-            return ""
+            return None
 
-        hypothesis_coverage = best_match.size / len(hypothesis_tokens)
-        existing_coverage = best_match.size / len(existing_tokens)
+        hypothesis_coverage = best_match.size / len(hypothesis_normalized)
+        existing_coverage = best_match.size / len(existing_normalized)
         has_substantial_overlap = best_match.size >= 5 and (
             hypothesis_coverage >= 0.35 or existing_coverage >= 0.35
         )
         if not has_substantial_overlap:
-            return ""
+            return None
+        return best_match.a, best_match.b
 
-        merged_tokens = existing_tokens[:best_match.a] + hypothesis_tokens[best_match.b:]
-        return " ".join(merged_tokens)
+    @classmethod
+    def _committed_end_in_hypothesis(cls, committed_normalized: list[str],
+                                     hypothesis_tokens: list[str]) -> int:
+        """Number of leading hypothesis tokens up to the last one that matches a committed token."""
+        hypothesis_normalized = [cls._normalize_for_match(token) for token in hypothesis_tokens]
+        matcher = SequenceMatcher(None, committed_normalized, hypothesis_normalized, autojunk=False)
+        return max((match.b + match.size for match in matcher.get_matching_blocks() if match.size),
+                   default=0)
 
     @staticmethod
-    def _token_overlap(existing_tokens: list[str], hypothesis_tokens: list[str]) -> int:
-        max_overlap = min(len(existing_tokens), len(hypothesis_tokens))
+    def _token_overlap(existing_normalized: list[str], hypothesis_normalized: list[str]) -> int:
+        """Longest suffix of the existing tokens that is a prefix of the hypothesis."""
+        max_overlap = min(len(existing_normalized), len(hypothesis_normalized))
+        first_token = hypothesis_normalized[0]
         for length in range(max_overlap, 0, -1):
-            left = " ".join(existing_tokens[-length:])
-            right = " ".join(hypothesis_tokens[:length])
-            if LiveTranscriptManager._normalize_for_match(left) == \
-                    LiveTranscriptManager._normalize_for_match(right):
+            if existing_normalized[-length] != first_token:
+                continue
+            if existing_normalized[-length:] == hypothesis_normalized[:length]:
                 return length
         return 0
 
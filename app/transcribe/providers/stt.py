@@ -5,10 +5,10 @@ from __future__ import annotations
 import os
 import subprocess  # nosec
 import tempfile
+import threading
 import wave
-import pyaudiowpatch as pyaudio
-import custom_speech_recognition as sr
 from sdk import transcriber_models as tm
+from sdk.streaming_transcriber_models import PCM16MonoResampler
 
 from ..audio_transcriber import DeepgramTranscriber, WhisperCPPTranscriber, WhisperTranscriber
 from ..openai_realtime_transcriber import OpenAIRealtimeTranscriber
@@ -16,6 +16,11 @@ from ..openai_realtime_transcriber import OpenAIRealtimeTranscriber
 from tsutils import language, utilities
 
 
+WHISPER_CPP_SAMPLE_RATE = 16000
+# Number of frames converted at a time when converting wav files
+WAV_CONVERSION_BLOCK_FRAMES = 65536
+
+
 def get_language_code(lang: str) -> str:
     """Get the language code from the configured language label."""
     lang_lower = lang.lower()
@@ -39,46 +44,43 @@ def ensure_ffmpeg_available():
         raise SystemExit(1)
 
 
-def read_wav_file_data(file_path: str):
-    """Return raw frame data from a wav file."""
-    with wave.open(file_path, "rb") as file_handle:
-        return file_handle.readframes(file_handle.getnframes())
+class WhisperCppAudioPreprocessor:
+    """Normalize audio chunks into whisper.cpp's required 16 kHz mono format.
 
+    Conversion happens in-process. Each source has its own resampler, so filter
+    state carries over chunk boundaries and consecutive chunks join without clicks.
+    """
 
-class WhisperCppAudioPreprocessor:
-    """Normalize audio chunks into whisper.cpp's required 16 kHz mono format."""
+    def __init__(self, target_rate: int = WHISPER_CPP_SAMPLE_RATE):
+        self.target_rate = target_rate
+        self._resamplers: dict[str, tuple[tuple[int, int, int], PCM16MonoResampler]] = {}
+        self._lock = threading.Lock()
 
     def __call__(self, who_spoke: str, data, source_info: dict):
-        channels = int(source_info["channels"])
-        sample_width = pyaudio.PyAudio().get_sample_size(pyaudio.paInt16)
-        frame_rate = int(source_info["sample_rate"])
-        file_descriptor, file_path = tempfile.mkstemp(suffix=".wav")
-        os.close(file_descriptor)
-        converted_path = None
-
-        try:
-            if who_spoke == "Speaker":
-                with wave.open(file_path, "wb") as wav_file:
-                    wav_file.setnchannels(channels)  # pylint: disable=E1101
-                    wav_file.setsampwidth(sample_width)  # pylint: disable=E1101
-                    wav_file.setframerate(frame_rate)  # pylint: disable=E1101
-                    wav_file.writeframes(data)  # pylint: disable=E1101
+        source_format = (
+            int(source_info["sample_rate"]),
+            int(source_info["sample_width"]),
+            int(source_info["channels"]),
+        )
+        with self._lock:
+            current = self._resamplers.get(who_spoke)
+            if current is None or current[0] != source_format:
+                current = (source_format, PCM16MonoResampler(*source_format, target_rate=self.target_rate))
+                self._resamplers[who_spoke] = current
+        return current[1].convert(data)
+
+    def reset(self, who_spoke: str | None = None):
+        """Discard resampler state of one or all sources."""
+        with self._lock:
+            if who_spoke is None:
+                self._resamplers.clear()
             else:
-                audio_data = sr.AudioData(data, frame_rate, sample_width)
-                with open(file_path, "w+b") as file_handle:
-                    file_handle.write(audio_data.get_wav_data())
-
-            converted_path = convert_audio_to_16khz(file_path)
-            return read_wav_file_data(converted_path)
-        finally:
-            if os.path.exists(file_path):
-                os.unlink(file_path)
-            if converted_path and os.path.exists(converted_path):
-                os.unlink(converted_path)
+                self._resamplers.pop(who_spoke, None)
 
 
-def create_stt_model(name: str, config: dict, api: bool):
-    """Create the STT model instance for the selected provider."""
+def create_stt_model(name: str, config: dict, api: bool, preload: bool = False):
+    """Create the STT model instance for the selected provider.
+    preload loads local models in the background instead of before returning."""
     model_factory = tm.STTModelFactory()
 
     if name.lower() == "deepgram":
@@ -96,6 +98,9 @@ def create_stt_model(name: str, config: dict, api: bool):
         stt_model_config = {
             "local_transcripton_model_file": "ggml-" + config["WhisperCpp"]["local_transcripton_model_file"],
             "audio_lang": get_language_code(config["OpenAI"]["audio_lang"]),
+            "use_server": config["WhisperCpp"].get("use_server", True),
+            "server_binary": config["WhisperCpp"].get("server_binary", ""),
+            "server_port": config["WhisperCpp"].get("server_port", 0),
         }
         return model_factory.get_stt_model_instance(
             stt_model=tm.STTEnum.WHISPER_CPP,
@@ -120,6 +125,9 @@ def create_stt_model(name: str, config: dict, api: bool):
             "api_key": config["OpenAI"]["api_key"],
             "local_transcripton_model_file": config["OpenAI"]["local_transcripton_model_file"],
             "audio_lang": get_language_code(config["OpenAI"]["audio_lang"]),
+            "preload": preload,
+            "batch_size": config["OpenAI"].get("local_transcription_batch_size", 1),
+            "batch_wait_ms": config["OpenAI"].get("local_transcription_batch_wait_ms", 50),
         }
         return model_factory.get_stt_model_instance(
             stt_model=tm.STTEnum.WHISPER_LOCAL,
@@ -152,7 +160,12 @@ def create_transcriber(name: str, config: dict, api: bool, runtime):
         runtime.set_transcriber(transcriber)
         return transcriber
 
-    model = create_stt_model(name=name, config=config, api=api)
+    model = create_stt_model(
+        name=name,
+        config=config,
+        api=api,
+        preload=bool(config["OpenAI"].get("preload_local_transcription_model", False)),
+    )
     audio_chunk_preprocessor = WhisperCppAudioPreprocessor() if name.lower() == "whisper.cpp" else None
 
     if name.lower() == "deepgram":
@@ -186,10 +199,15 @@ def create_transcriber(name: str, config: dict, api: bool, runtime):
 
 
 def convert_audio_to_16khz(file_path: str) -> str:
-    """Convert an input wav file to the format required by whisper.cpp."""
-    ensure_ffmpeg_available()
+    """Convert an input audio file to the format required by whisper.cpp.
+    PCM wav files are converted in-process. Other formats are converted with ffmpeg.
+    """
     file_descriptor, mod_file_path = tempfile.mkstemp(suffix=".wav")
     os.close(file_descriptor)
+    if convert_wav_to_16khz(file_path, mod_file_path):
+        return mod_file_path
+
+    ensure_ffmpeg_available()
     log_file = f"{utilities.get_data_path(app_name='Transcribe')}/logs/ffmpeg.txt"
     with open(file=log_file, mode="a", encoding="utf-8") as log_handle:
         subprocess.call(
@@ -198,3 +216,29 @@ def convert_audio_to_16khz(file_path: str) -> str:
             stderr=subprocess.STDOUT,
         )
     return mod_file_path
+
+
+def convert_wav_to_16khz(file_path: str, output_path: str) -> bool:
+    """Convert a PCM wav file to 16 kHz mono PCM16 without ffmpeg.
+    Returns False when the file is not a PCM wav file.
+    """
+    try:
+        with wave.open(file_path, "rb") as wav_reader:
+            resampler = PCM16MonoResampler(
+                wav_reader.getframerate(),
+                wav_reader.getsampwidth(),
+                wav_reader.getnchannels(),
+                target_rate=WHISPER_CPP_SAMPLE_RATE,
+            )
+            with wave.open(output_path, "wb") as wav_writer:
+                wav_writer.setnchannels(1)  # pylint: disable=E1101
+                wav_writer.setsampwidth(2)  # pylint: disable=E1101
+                wav_writer.setframerate(WHISPER_CPP_SAMPLE_RATE)  # pylint: disable=E1101
+                while True:
+                    frames = wav_reader.readframes(WAV_CONVERSION_BLOCK_FRAMES)
+                    if not frames:
+                        break
+                    wav_writer.writeframes(resampler.convert(frames))  # pylint: disable=E1101
+    except (wave.Error, EOFError, ValueError):
+        return False
+    return True
@@ -0,0 +1,90 @@
+"""Coalescing of the deltas of streamed LLM responses."""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+
+DEFAULT_STREAM_FLUSH_INTERVAL_MS = 150
+# A delta ending with one of these ends a sentence and is published right away
+SENTENCE_ENDINGS = ('.', '!', '?', '\n')
+
+
+@dataclass
+class ResponseStreamStats:
+    """Timing of a streamed response. Each streamed delta is counted as a token."""
+    tokens: int = 0
+    flushes: int = 0
+    # Seconds from the request to the first delta, None when nothing was received
+    first_token_seconds: float | None = None
+    total_seconds: float = 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        """Tokens per second after the first token."""
+        streaming_seconds = self.total_seconds - (self.first_token_seconds or 0.0)
+        if self.tokens < 2 or streaming_seconds <= 0:
+            return 0.0
+        return (self.tokens - 1) / streaming_seconds
+
+
+class ResponseStream:
+    """Accumulates the deltas of a streamed response and publishes the text so far
+    at most once per flush interval, or when a delta ends a sentence.
+
+    Create the stream right before sending the request, the time to first token
+    is measured from its creation.
+
+    Args:
+        on_flush: Called with the full text received so far.
+        flush_interval_ms: Time between two publications of the text in the
+            middle of a sentence. 0 publishes every delta.
+    """
+
+    def __init__(self, on_flush, flush_interval_ms: int = DEFAULT_STREAM_FLUSH_INTERVAL_MS,
+                 clock=time.monotonic):
+        self._on_flush = on_flush
+        self.flush_interval_seconds = max(flush_interval_ms, 0) / 1000
+        self._clock = clock
+        self._start = clock()
+        self._last_flush = self._start
+        self._deltas: list[str] = []
+        self._text = ''
+        self._flushed_text = ''
+        self.stats = ResponseStreamStats()
+
+    @property
+    def text(self) -> str:
+        """Full text received so far."""
+        if self._deltas:
+            self._text += ''.join(self._deltas)
+            self._deltas.clear()
+        return self._text
+
+    def add(self, delta: str):
+        """Add a delta of the response, publishing the text when it is due."""
+        if not delta:
+            return
+        now = self._clock()
+        if self.stats.tokens == 0:
+            self.stats.first_token_seconds = now - self._start
+        self.stats.tokens += 1
+        self._deltas.append(delta)
+        if (now - self._last_flush >= self.flush_interval_seconds
+                or delta.rstrip(' ').endswith(SENTENCE_ENDINGS)):
+            self._flush(now)
+
+    def close(self) -> str:
+        """Publish the text not published yet. Returns the full text."""
+        now = self._clock()
+        self.stats.total_seconds = now - self._start
+        if self.text != self._flushed_text:
+            self._flush(now)
+        return self._text
+
+    def _flush(self, now: float):
+        self._flushed_text = self.text
+        self._last_flush = now
+        self.stats.flushes += 1
+        self._on_flush(self._flushed_text)
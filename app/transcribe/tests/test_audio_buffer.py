@@ -0,0 +1,77 @@
+"""Tests for the rolling live transcription audio buffer."""
+
+import unittest
+
+from app.transcribe.audio_buffer import AudioRingBuffer
+
+
+class TestAudioRingBuffer(unittest.TestCase):
+    def test_append_keeps_frame_aligned_window(self):
+        audio_buffer = AudioRingBuffer(sample_rate=10, sample_width=2, channels=1, max_seconds=0.3)
+
+        dropped = audio_buffer.append(b"0123")
+        dropped += audio_buffer.append(b"4567")
+
+        self.assertEqual(dropped, 2)
+        self.assertEqual(audio_buffer.tobytes(), b"234567")
+        self.assertEqual(audio_buffer.buffer_start_seconds, 0.1)
+        self.assertAlmostEqual(audio_buffer.buffer_end_seconds, 0.4)
+
+    def test_compaction_preserves_window_contents(self):
+        audio_buffer = AudioRingBuffer(sample_rate=10, sample_width=2, channels=1, max_seconds=0.4)
+        expected = b""
+
+        for index in range(20):
+            chunk = bytes([65 + index]) * 2
+            audio_buffer.append(chunk)
+            expected = (expected + chunk)[-8:]
+            self.assertEqual(audio_buffer.tobytes(), expected)
+
+        self.assertEqual(len(audio_buffer), 8)
+        self.assertAlmostEqual(audio_buffer.buffer_start_seconds, 1.6)
+
+    def test_view_is_zero_copy(self):
+        audio_buffer = AudioRingBuffer(sample_rate=10, sample_width=2, channels=1, max_seconds=1)
+        audio_buffer.append(b"0123")
+
+        view = audio_buffer.view()
+        audio_buffer.drop_head(2)
+
+        self.assertIs(view.obj, audio_buffer.view().obj)
+        self.assertEqual(bytes(view), b"0123")
+        self.assertEqual(bytes(audio_buffer.view()), b"23")
+
+    def test_drop_fraction_is_frame_aligned(self):
+        audio_buffer = AudioRingBuffer(sample_rate=10, sample_width=2, channels=2, max_seconds=1)
+        audio_buffer.append(b"0123456789AB")
+
+        dropped = audio_buffer.drop_fraction(0.5)
+
+        self.assertEqual(dropped, 4)
+        self.assertEqual(audio_buffer.tobytes(), b"456789AB")
+        self.assertEqual(audio_buffer.buffer_start_seconds, 0.1)
+
+    def test_unbounded_buffer_grows(self):
+        audio_buffer = AudioRingBuffer(sample_rate=10, sample_width=2, channels=1)
+        view = None
+
+        for _ in range(3000):
+            audio_buffer.append(b"ab")
+            view = audio_buffer.view()
+
+        self.assertEqual(len(audio_buffer), 6000)
+        self.assertEqual(bytes(view[-2:]), b"ab")
+        self.assertEqual(audio_buffer.buffer_start_seconds, 0.0)
+
+    def test_clear_resets_timeline(self):
+        audio_buffer = AudioRingBuffer(sample_rate=10, sample_width=2, channels=1, max_seconds=0.1)
+        audio_buffer.append(b"012345")
+
+        audio_buffer.clear()
+
+        self.assertEqual(len(audio_buffer), 0)
+        self.assertEqual(audio_buffer.buffer_start_seconds, 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,12 @@
 """Tests for live transcription behavior inside AudioTranscriber."""
 
 import datetime
+import threading
+import time
 import unittest
+from unittest.mock import MagicMock, call
+
+import numpy as np
 
 from app.transcribe.audio_transcriber import WhisperTranscriber
 
@@ -31,6 +36,274 @@ class FakeConversation:
         self.cleared = True
 
 
+class BlockingModel:
+    supports_concurrent_requests = True
+
+    def __init__(self):
+        self.calls = []
+        self.speaker_started = threading.Event()
+        self.release_speaker = threading.Event()
+
+    def get_transcription_from_pcm(self, pcm, sample_rate, width, channels):
+        audio = bytes(pcm)
+        self.calls.append(audio)
+        if audio.startswith(b"s"):
+            self.speaker_started.set()
+            self.release_speaker.wait(timeout=5)
+        return audio.decode()
+
+    def process_response(self, response):
+        return response
+
+    def normalize_response(self, response, audio_start_seconds=0.0, audio_end_seconds=0.0):
+        return _hypothesis(response)
+
+
+def _wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestAudioTranscriberLanes(unittest.TestCase):
+    def setUp(self):
+        self.conversation = FakeConversation()
+        self.model = BlockingModel()
+        self.transcriber = WhisperTranscriber(
+            FakeSource(),
+            FakeSource(),
+            model=self.model,
+            convo=self.conversation,
+            config={
+                "General": {
+                    "clear_transcript_periodically": False,
+                    "clear_transcript_interval_seconds": 90,
+                    "live_transcription_window_seconds": 0.1,
+                }
+            },
+        )
+        self.start = datetime.datetime.utcnow()
+
+    def tearDown(self):
+        self.model.release_speaker.set()
+        self.transcriber.stop()
+
+    def _at(self, seconds):
+        return self.start + datetime.timedelta(seconds=seconds)
+
+    def _lanes_idle(self):
+        return not any(lane.active for lane in self.transcriber._lanes.values())
+
+    def test_microphone_is_not_blocked_by_slow_speaker_transcription(self):
+        self.transcriber._submit_audio("Speaker", b"s1", self._at(0))
+        self.assertTrue(self.model.speaker_started.wait(timeout=5))
+
+        self.transcriber._submit_audio("You", b"y1", self._at(0))
+
+        self.assertTrue(_wait_until(lambda: any(u["persona"] == "You" for u in self.conversation.updates)))
+        self.assertFalse(any(u["persona"] == "Speaker" for u in self.conversation.updates))
+        self.model.release_speaker.set()
+        self.assertTrue(_wait_until(self._lanes_idle))
+
+    def test_backlog_for_a_source_is_coalesced_into_one_transcription(self):
+        self.transcriber._submit_audio("Speaker", b"s1", self._at(0))
+        self.assertTrue(self.model.speaker_started.wait(timeout=5))
+        for index in range(2, 5):
+            self.transcriber._submit_audio("Speaker", f"s{index}".encode(), self._at(index / 10))
+
+        self.model.release_speaker.set()
+
+        self.assertTrue(_wait_until(self._lanes_idle))
+        self.assertEqual(self.model.calls, [b"s1", b"s4"])
+        metrics = self.transcriber.get_lane_metrics()["Speaker"]
+        self.assertEqual(metrics.chunks_received, 4)
+        self.assertEqual(metrics.transcriptions, 2)
+        self.assertEqual(metrics.windows_skipped, 2)
+        self.assertEqual(metrics.chunks_outside_window, 2)
+
+    def test_stale_backlog_is_dropped_beyond_max_lag(self):
+        self.transcriber.max_lag_seconds = 5
+        now = datetime.datetime.utcnow()
+        self.transcriber._submit_audio("Speaker", b"s1", now - datetime.timedelta(seconds=30))
+        self.assertTrue(self.model.speaker_started.wait(timeout=5))
+        self.transcriber._submit_audio("Speaker", b"s2", now - datetime.timedelta(seconds=20))
+        self.transcriber._submit_audio("Speaker", b"s3", now - datetime.timedelta(seconds=19))
+        self.transcriber._submit_audio("Speaker", b"s4", now)
+
+        self.model.release_speaker.set()
+
+        self.assertTrue(_wait_until(self._lanes_idle))
+        self.assertEqual(self.model.calls, [b"s1", b"s4"])
+        metrics = self.transcriber.get_lane_metrics()["Speaker"]
+        self.assertEqual(metrics.stale_chunks_dropped, 2)
+        self.assertAlmostEqual(metrics.stale_seconds_dropped, 0.2)
+        self.assertFalse(self.conversation.updates[-1]["update_previous"])
+
+    def test_backlog_is_transcribed_per_chunk_when_coalescing_is_disabled(self):
+        self.transcriber.coalesce_backlog = False
+        self.transcriber._submit_audio("Speaker", b"s1", self._at(0))
+        self.assertTrue(self.model.speaker_started.wait(timeout=5))
+        self.transcriber._submit_audio("Speaker", b"s2", self._at(0.1))
+        self.transcriber._submit_audio("Speaker", b"s3", self._at(0.2))
+
+        self.model.release_speaker.set()
+
+        self.assertTrue(_wait_until(self._lanes_idle))
+        self.assertEqual(self.model.calls, [b"s1", b"s2", b"s3"])
+
+    def test_coalesced_backlog_is_transcribed_per_phrase(self):
+        self.transcriber._submit_audio("Speaker", b"s1", self._at(0))
+        self.assertTrue(self.model.speaker_started.wait(timeout=5))
+        self.transcriber._submit_audio("Speaker", b"s2", self._at(1))
+        self.transcriber._submit_audio("Speaker", b"s3", self._at(10))
+
+        self.model.release_speaker.set()
+
+        self.assertTrue(_wait_until(self._lanes_idle))
+        self.assertEqual(self.model.calls, [b"s1", b"s2", b"s3"])
+        self.assertFalse(self.conversation.updates[-1]["update_previous"])
+
+
+class FakeSource16k:
+    SAMPLE_RATE = 16000
+    SAMPLE_WIDTH = 2
+    channels = 1
+
+
+class RecordingModel:
+    supports_concurrent_requests = True
+
+    def __init__(self):
+        self.calls = []
+
+    def get_transcription_from_pcm(self, pcm, sample_rate, width, channels):
+        self.calls.append(bytes(pcm))
+        return "hello"
+
+    def process_response(self, response):
+        return response
+
+    def normalize_response(self, response, audio_start_seconds=0.0, audio_end_seconds=0.0):
+        self.window = (audio_start_seconds, audio_end_seconds)
+        return _hypothesis(response)
+
+
+class TestAudioTranscriberVoiceActivity(unittest.TestCase):
+    def setUp(self):
+        self.conversation = FakeConversation()
+        self.model = RecordingModel()
+        self.transcriber = WhisperTranscriber(
+            FakeSource16k(),
+            FakeSource16k(),
+            model=self.model,
+            convo=self.conversation,
+            config={
+                "General": {
+                    "clear_transcript_periodically": False,
+                    "clear_transcript_interval_seconds": 90,
+                    "voice_activity_detection": "energy",
+                    "voice_activity_hangover_seconds": 0,
+                    "voice_activity_padding_seconds": 0,
+                }
+            },
+        )
+
+    def tearDown(self):
+        self.transcriber.stop()
+
+    def test_silence_is_not_sent_to_stt_and_speech_is_trimmed(self):
+        now = datetime.datetime.utcnow()
+        silence = b"\x00\x00" * 4800
+        tone = (8000 * np.sin(np.arange(4800) / 5)).astype("<i2").tobytes()
+
+        self.transcriber._transcribe_pending_audio("Speaker", [(silence, now)])
+        self.transcriber._transcribe_pending_audio("Speaker", [(silence + tone, now)])
+
+        self.assertEqual(self.model.calls, [tone])
+        self.assertAlmostEqual(self.model.window[0], 0.3)
+        metrics = self.transcriber.get_voice_activity_metrics()["Speaker"]
+        self.assertEqual(metrics.chunks_dropped, 1)
+        self.assertAlmostEqual(metrics.seconds_trimmed, 0.3)
+
+
+class SecondsModel:
+    """Says one word per second of audio, named after the second of the source timeline."""
+    supports_concurrent_requests = True
+
+    def __init__(self):
+        self.windows = []
+
+    def get_transcription_from_pcm(self, pcm, sample_rate, width, channels):
+        return len(pcm) / (sample_rate * width * channels)
+
+    def process_response(self, response):
+        return "text"
+
+    def normalize_response(self, response, audio_start_seconds=0.0, audio_end_seconds=0.0):
+        from sdk.transcription_result import TranscriptSegment, TranscriptionHypothesis
+
+        self.windows.append((audio_start_seconds, audio_end_seconds))
+        segments = [TranscriptSegment(second, second, second + 1, f"s{second}")
+                    for second in range(round(audio_start_seconds), round(audio_end_seconds))]
+        return TranscriptionHypothesis(
+            provider="test",
+            text=" ".join(segment.text for segment in segments),
+            segments=segments,
+            audio_start_seconds=audio_start_seconds,
+            audio_end_seconds=audio_end_seconds,
+        )
+
+
+class TestAudioTranscriberTimestampAlignment(unittest.TestCase):
+    def setUp(self):
+        self.conversation = FakeConversation()
+        self.model = SecondsModel()
+        self.transcriber = WhisperTranscriber(
+            FakeSource(),
+            FakeSource(),
+            model=self.model,
+            convo=self.conversation,
+            config={
+                "General": {
+                    "clear_transcript_periodically": False,
+                    "clear_transcript_interval_seconds": 90,
+                    "live_transcription_window_seconds": 60,
+                    "live_transcription_audio_context_seconds": 1,
+                    "live_transcription_mutable_tail_seconds": 2,
+                    "live_transcription_alignment": "timestamps",
+                }
+            },
+        )
+
+    def tearDown(self):
+        self.transcriber.stop()
+
+    def test_only_audio_after_committed_text_and_context_is_transcribed_again(self):
+        now = datetime.datetime.utcnow()
+        one_second = b"\x01\x00" * FakeSource.SAMPLE_RATE
+
+        self.transcriber._transcribe_pending_audio("You", [(one_second * 10, now)])
+        self.transcriber._transcribe_pending_audio("You", [(one_second, now)])
+
+        self.assertEqual(self.model.windows, [(0.0, 10.0), (7.0, 11.0)])
+        self.assertEqual(self.conversation.updates[-1]["text"],
+                         " ".join(f"s{second}" for second in range(11)))
+        self.assertAlmostEqual(self.transcriber.get_lane_metrics()["You"].committed_seconds_dropped, 8)
+
+    def test_committed_text_shrinks_audio_window_to_context(self):
+        now = datetime.datetime.utcnow()
+        one_second = b"\x01\x00" * FakeSource.SAMPLE_RATE
+        audio_buffer = self.transcriber.audio_sources_properties["You"]["audio_buffer"]
+
+        self.transcriber._transcribe_pending_audio("You", [(one_second * 10, now)])
+
+        self.assertAlmostEqual(audio_buffer.buffer_start_seconds, 7)
+        self.assertAlmostEqual(audio_buffer.duration_seconds, 3)
+
+
 class TestAudioTranscriberLiveBehavior(unittest.TestCase):
     def setUp(self):
         self.conversation = FakeConversation()
@@ -53,13 +326,52 @@ class TestAudioTranscriberLiveBehavior(unittest.TestCase):
 
     def test_audio_buffer_is_trimmed_by_configured_window(self):
         source_info = self.transcriber.audio_sources_properties["You"]
-        source_info["last_sample"] = b"0123456789"
 
-        with source_info["mutex"]:
-            self.transcriber._trim_audio_buffer_locked(source_info)
+        self.transcriber._update_last_sample_and_phrase_status(
+            "You", b"0123456789", datetime.datetime.utcnow()
+        )
+
+        self.assertEqual(source_info["audio_buffer"].tobytes(), b"89")
+        self.assertEqual(source_info["audio_buffer"].buffer_start_seconds, 0.4)
+
+    def test_audio_window_snapshot_is_in_memory_view_of_retained_audio(self):
+        source_info = self.transcriber.audio_sources_properties["Speaker"]
+        source_info["target_sample_rate"] = 20
+        source_info["target_channels"] = 1
+        self.transcriber._configure_audio_buffers()
+        source_info["audio_buffer"].append(b"012345")
 
-        self.assertEqual(source_info["last_sample"], b"89")
-        self.assertEqual(source_info["buffer_start_seconds"], 0.4)
+        pcm, start_seconds, end_seconds = self.transcriber._get_audio_window_snapshot(source_info)
+
+        self.assertIsInstance(pcm, memoryview)
+        self.assertTrue(pcm.readonly)
+        self.assertEqual(bytes(pcm), b"2345")
+        self.assertAlmostEqual(start_seconds, 0.05)
+        self.assertAlmostEqual(end_seconds, 0.15)
+        self.assertEqual(self.transcriber._audio_format(source_info), (20, 2, 1))
+
+    def test_prune_for_latency_moves_head_of_audio_window(self):
+        source_info = self.transcriber.audio_sources_properties["You"]
+        source_info["audio_buffer"].configure(10, 2, 1, max_seconds=10)
+        source_info["audio_buffer"].append(b"0123456789")
+        results = {
+            "segments": [
+                {"id": 0, "text": "First."},
+                {"id": 1, "text": " Second."},
+            ]
+        }
+
+        first, second = self.transcriber.prune_for_latency(
+            who_spoke="You",
+            original_data_size=10,
+            results=results,
+            prune_id=0,
+            prune_percent=0.5,
+        )
+
+        self.assertEqual((first, second), ("First.", " Second."))
+        self.assertEqual(source_info["audio_buffer"].tobytes(), b"456789")
+        self.assertEqual(source_info["audio_buffer"].buffer_start_seconds, 0.2)
 
     def test_update_transcript_can_force_insert_or_update(self):
         now = datetime.datetime.utcnow()
@@ -71,8 +383,7 @@ class TestAudioTranscriberLiveBehavior(unittest.TestCase):
         self.assertTrue(self.conversation.updates[1]["update_previous"])
 
     def test_clear_transcript_data_resets_live_state_and_audio_window(self):
-        self.transcriber.audio_sources_properties["You"]["last_sample"] = b"1234"
-        self.transcriber.audio_sources_properties["You"]["buffer_start_seconds"] = 2.0
+        self.transcriber.audio_sources_properties["You"]["audio_buffer"].append(b"1234")
         self.transcriber.live_transcript_manager.process_hypothesis(
             "You",
             _hypothesis("hello"),
@@ -81,10 +392,22 @@ class TestAudioTranscriberLiveBehavior(unittest.TestCase):
 
         self.transcriber.clear_transcript_data()
 
-        self.assertEqual(self.transcriber.audio_sources_properties["You"]["last_sample"], b"")
-        self.assertEqual(self.transcriber.audio_sources_properties["You"]["buffer_start_seconds"], 0.0)
+        audio_buffer = self.transcriber.audio_sources_properties["You"]["audio_buffer"]
+        self.assertEqual(audio_buffer.tobytes(), b"")
+        self.assertEqual(audio_buffer.buffer_start_seconds, 0.0)
         self.assertTrue(self.conversation.cleared)
 
+    def test_clear_transcript_data_and_disabling_a_source_reset_the_preprocessor(self):
+        self.transcriber.audio_chunk_preprocessor = MagicMock()
+
+        self.transcriber.set_source_enabled("You", False)
+        self.transcriber.clear_transcript_data()
+
+        self.assertEqual(
+            self.transcriber.audio_chunk_preprocessor.reset.call_args_list,
+            [call("You"), call(None)],
+        )
+
 
 def _hypothesis(text):
     from sdk.transcription_result import TranscriptionHypothesis
@@ -0,0 +1,195 @@
+"""Tests for chunked parallel batch transcription."""
+
+import json
+import os
+import tempfile
+import unittest
+import wave
+from unittest import mock
+
+import numpy as np
+
+from app.transcribe.cli import chunked
+from app.transcribe.cli import directory as directory_module
+from app.transcribe.cli.directory import MANIFEST_FILE_NAME, find_audio_files, transcribe_directory
+from app.transcribe.cli.chunked import AudioChunk, ChunkStitcher, frame_energies, plan_chunks
+from sdk.transcription_result import TranscriptSegment, TranscriptionHypothesis
+
+
+SAMPLE_RATE = 16000
+
+
+def _write_wav(path, samples):
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(samples.astype("<i2").tobytes())
+
+
+def _speech_with_pause_at(total_seconds, pause_start, pause_seconds=0.5):
+    samples = (8000 * np.sin(np.arange(int(total_seconds * SAMPLE_RATE)) / 3)).astype(np.int16)
+    samples[int(pause_start * SAMPLE_RATE):int((pause_start + pause_seconds) * SAMPLE_RATE)] = 0
+    return samples
+
+
+def _segment(start, end, text):
+    return TranscriptSegment(id=0, start_seconds=start, end_seconds=end, text=text)
+
+
+class FakeModel:
+    """Says one word for every second of audio, named after the second of the file."""
+
+    def get_transcription_from_pcm(self, pcm, sample_rate, width, channels):
+        return len(pcm) / (sample_rate * width * channels)
+
+    def process_response(self, response):
+        return "text"
+
+    def normalize_response(self, response, audio_start_seconds=0.0, audio_end_seconds=0.0):
+        first = int(np.ceil(audio_start_seconds))
+        words = [f"w{second}" for second in range(first, int(audio_end_seconds))]
+        return TranscriptionHypothesis(
+            provider="fake",
+            text=" ".join(words),
+            segments=[_segment(first, audio_end_seconds, " ".join(words))],
+            audio_start_seconds=audio_start_seconds,
+            audio_end_seconds=audio_end_seconds,
+        )
+
+
+class TestChunkPlanning(unittest.TestCase):
+    def test_chunks_are_cut_at_silence_and_overlap(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "long.wav")
+            _write_wav(path, _speech_with_pause_at(25, pause_start=8))
+
+            energies, duration_seconds = frame_energies(path)
+
+        chunks = plan_chunks(energies, chunked.ENERGY_FRAME_SECONDS, duration_seconds,
+                             chunk_seconds=10, overlap_seconds=1, search_seconds=5)
+
+        self.assertAlmostEqual(duration_seconds, 25)
+        self.assertGreaterEqual(chunks[0].core_end_seconds, 8)
+        self.assertLessEqual(chunks[0].core_end_seconds, 8.5)
+        self.assertEqual(chunks[1].start_seconds, chunks[0].core_end_seconds - 1)
+        self.assertEqual(chunks[-1].core_end_seconds, 25)
+        for chunk in chunks:
+            self.assertLessEqual(chunk.core_end_seconds - chunk.core_start_seconds, 10)
+
+
+class TestChunkStitcher(unittest.TestCase):
+    def test_out_of_order_results_are_written_in_order_with_overlap_merged(self):
+        chunks = [AudioChunk(0, 0, 11, 0, 10), AudioChunk(1, 9, 20, 10, 20)]
+        lines = []
+        stitcher = ChunkStitcher(chunks, overlap_seconds=1, write_sentence=lines.append)
+
+        stitcher.add(1, [_segment(9.2, 12, "end of first and start"), _segment(12, 20, "last words")])
+        self.assertEqual(lines, [])
+        stitcher.add(0, [_segment(0, 5, "Hello there."), _segment(5, 11, "the end of first")])
+        stitcher.finish()
+
+        self.assertEqual(lines, [
+            "0:00:00 - 0:00:05: Hello there.",
+            "0:00:05 - 0:00:12: the end of first and start",
+            "0:00:12 - 0:00:20: last words",
+        ])
+        self.assertEqual(stitcher.sentences_written, 3)
+
+
+class TestTranscribeFileInChunks(unittest.TestCase):
+    def test_file_is_transcribed_in_parallel_chunks_and_streamed_to_output(self):
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = os.path.join(directory, "meeting.wav")
+            output_path = os.path.join(directory, "out.txt")
+            _write_wav(input_path, _speech_with_pause_at(25, pause_start=8))
+            config = {"General": {"batch_transcription_chunk_seconds": 10,
+                                  "batch_transcription_overlap_seconds": 1,
+                                  "batch_transcription_workers": 3}}
+
+            with mock.patch.object(chunked, "create_stt_model", return_value=FakeModel()):
+                result = chunked.transcribe_file_in_chunks(input_path, output_path, "deepgram",
+                                                           config, use_api=True)
+
+            with open(output_path, encoding="utf-8") as file_handle:
+                text = " ".join(line.split(": ", 1)[1].strip() for line in file_handle)
+
+        self.assertGreaterEqual(result.sentences, 1)
+        self.assertAlmostEqual(result.audio_seconds, 25)
+        self.assertEqual(result.chunks_failed, 0)
+        self.assertEqual(text.split(), [f"w{second}" for second in range(25)])
+
+    def test_local_models_use_process_pool(self):
+        self.assertTrue(chunked.uses_process_pool("whisper", use_api=False))
+        self.assertFalse(chunked.uses_process_pool("whisper", use_api=True))
+        self.assertFalse(chunked.uses_process_pool("whisper.cpp", use_api=False))
+
+
+class TestTranscribeDirectory(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.input_dir = os.path.join(self.temp_dir.name, "recordings")
+        os.makedirs(os.path.join(self.input_dir, "monday"))
+        _write_wav(os.path.join(self.input_dir, "a.wav"), _speech_with_pause_at(3, pause_start=1))
+        _write_wav(os.path.join(self.input_dir, "monday", "b.wav"), _speech_with_pause_at(4, pause_start=2))
+        with open(os.path.join(self.input_dir, "notes.txt"), "w", encoding="utf-8") as file_handle:
+            file_handle.write("not audio")
+        self.output_dir = os.path.join(self.temp_dir.name, "out")
+        self.config = {"General": {"batch_transcription_chunk_seconds": 10}}
+        patcher = mock.patch.object(chunked, "create_stt_model", side_effect=lambda **_: FakeModel())
+        self.create_model = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _run(self):
+        return transcribe_directory(self.input_dir, self.output_dir, "deepgram", self.config,
+                                    use_api=True, workers=2)
+
+    def _manifest(self):
+        with open(os.path.join(self.output_dir, MANIFEST_FILE_NAME), encoding="utf-8") as file_handle:
+            return json.load(file_handle)["files"]
+
+    def test_only_audio_files_are_found(self):
+        self.assertEqual(find_audio_files(self.input_dir), ["a.wav", os.path.join("monday", "b.wav")])
+
+    def test_files_are_transcribed_with_one_model_and_recorded_in_manifest(self):
+        counts = self._run()
+
+        self.assertEqual(counts, {"completed": 2, "skipped": 0, "failed": 0})
+        self.assertEqual(self.create_model.call_count, 1)
+        entry = self._manifest()[os.path.join("monday", "b.wav")]
+        self.assertEqual(entry["status"], "completed")
+        self.assertEqual(len(entry["sha256"]), 64)
+        self.assertAlmostEqual(entry["audio_seconds"], 4)
+        self.assertIn("real_time_factor", entry)
+        with open(os.path.join(self.output_dir, "monday", "b.wav.txt"), encoding="utf-8") as file_handle:
+            self.assertIn("w0 w1 w2 w3", file_handle.read())
+
+    def test_rerun_skips_completed_files_unless_contents_changed(self):
+        self._run()
+        _write_wav(os.path.join(self.input_dir, "a.wav"), _speech_with_pause_at(5, pause_start=1))
+
+        counts = self._run()
+
+        self.assertEqual(counts, {"completed": 1, "skipped": 1, "failed": 0})
+        self.assertAlmostEqual(self._manifest()["a.wav"]["audio_seconds"], 5)
+
+    def test_unreadable_file_is_recorded_as_failed(self):
+        real_checksum = directory_module.file_checksum
+
+        def checksum(path):
+            if path.endswith("a.wav"):
+                raise PermissionError("access denied")
+            return real_checksum(path)
+
+        with mock.patch.object(directory_module, "file_checksum", side_effect=checksum):
+            counts = self._run()
+
+        self.assertEqual(counts, {"completed": 1, "skipped": 0, "failed": 1})
+        entry = self._manifest()["a.wav"]
+        self.assertEqual(entry["status"], "failed")
+        self.assertIn("access denied", entry["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""Unit tests for conversation change events."""
+
+import datetime
+import threading
+import unittest
+from unittest import mock
+
+from app.transcribe.core import conversation as conversation_module
+from app.transcribe.core.conversation import CHANGE_CLEAR, CHANGE_INSERT, CHANGE_UPDATE, Conversation
+
+
+class FakeConversationWriter:
+    def __init__(self):
+        self.next_id = 0
+
+    def insert_conversation(self, invocation_id, spoken_time, speaker_name, convo_text):
+        self.next_id += 1
+        return self.next_id
+
+    def update_conversation(self, conversation_id, convo_text):
+        pass
+
+
+class FakeAppDB:
+    writer = FakeConversationWriter()
+
+    def get_invocation_id(self):
+        return 1
+
+    def get_conversation_writer(self):
+        return self.writer
+
+
+class TestConversationChanges(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(conversation_module, "appdb", FakeAppDB)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.conversation = Conversation(context=None)
+        self.changes = []
+        self.conversation.add_change_listener(self.changes.append)
+        self.now = datetime.datetime.utcnow()
+
+    def test_changes_are_versioned_row_deltas(self):
+        version = self.conversation.version
+        self.conversation.update_conversation("Speaker", "hel", self.now)
+        self.conversation.update_conversation("Speaker", "hello", self.now, update_previous=True)
+
+        self.assertEqual([change.action for change in self.changes], [CHANGE_INSERT, CHANGE_UPDATE])
+        self.assertEqual([change.version for change in self.changes], [version + 1, version + 2])
+        self.assertEqual(self.changes[0].row_key, self.changes[1].row_key)
+        self.assertEqual(self.changes[1].text, "Speaker: [hello]\n")
+
+    def test_transcript_rows_before_a_row(self):
+        for index in range(3):
+            self.conversation.update_conversation("Speaker", f"row {index}", datetime.datetime.utcnow())
+        last_key = self.changes[-1].row_key
+
+        version, rows = self.conversation.get_transcript_rows(["Speaker"], count=1, before_row_key=last_key)
+
+        self.assertEqual(version, self.conversation.version)
+        self.assertEqual(rows, [(self.changes[1].row_key, "Speaker: [row 1]\n")])
+
+    def test_clear_starts_new_row_keys(self):
+        self.conversation.update_conversation("Speaker", "before", self.now)
+        old_key = self.changes[-1].row_key
+
+        self.conversation.clear_conversation_data()
+        self.conversation.update_conversation("Speaker", "after", self.now)
+
+        self.assertIn(CHANGE_CLEAR, [change.action for change in self.changes])
+        self.assertNotEqual(self.changes[-1].row_key, old_key)
+        self.assertEqual(self.conversation.get_transcript_rows(["Speaker"], before_row_key=old_key)[1], [])
+        self.assertFalse(self.conversation.is_row_key(old_key))
+        self.assertTrue(self.conversation.is_row_key(self.changes[-1].row_key))
+        self.assertFalse(self.conversation.is_row_key("p1"))
+
+    def test_listeners_run_with_conversation_unlocked(self):
+        acquired = []
+
+        def listener(change):
+            # A Tk thread reading the conversation must not wait for the listener
+            thread = threading.Thread(
+                target=lambda: acquired.append(self.conversation.get_transcript_rows(["Speaker"]) is not None))
+            thread.start()
+            thread.join(timeout=2)
+            acquired.append(not thread.is_alive())
+
+        self.conversation.add_change_listener(listener)
+        self.conversation.update_conversation("Speaker", "hello", self.now)
+
+        self.assertEqual(acquired, [True, True])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+"""Unit tests for the in-memory conversation store."""
+
+import datetime
+import random
+import unittest
+from heapq import merge
+
+from app.transcribe.core.conversation_store import ConversationStore
+
+
+def row_text(persona, text):
+    return f"{persona}: [{text}]\n\n"
+
+
+class TestConversationStore(unittest.TestCase):
+    def setUp(self):
+        self.store = ConversationStore(["You", "Speaker"])
+        self.now = datetime.datetime(2024, 1, 1)
+
+    def test_rows_are_found_by_id_and_text(self):
+        self.store.append("You", row_text("You", "hello"), self.now, 1)
+        self.store.append("Speaker", row_text("Speaker", "hi"), self.now, 2)
+        self.store.append("You", row_text("You", "bye"), self.now, 3)
+
+        self.assertEqual(self.store.find_by_id(3), ("You", 1))
+        self.assertEqual(self.store.find_by_text("Speaker", "Speaker: [hi]"), 0)
+        self.assertIsNone(self.store.find_by_text("You", "Speaker: [hi]"))
+        self.assertIsNone(self.store.find_by_id(None))
+        self.assertEqual(len(self.store), 3)
+
+    def test_replace_updates_indexes(self):
+        self.store.append("You", row_text("You", "hel"), self.now, 1)
+        self.store.replace("You", 0, row_text("You", "hello"), self.now, 1)
+
+        self.assertIsNone(self.store.find_by_text("You", "You: [hel]"))
+        self.assertEqual(self.store.find_by_text("You", "You: [hello]"), 0)
+        self.assertEqual(self.store.rows["You"], [(row_text("You", "hello"), self.now, 1)])
+        self.assertEqual(self.store.find_by_id(1), ("You", 0))
+
+    def test_duplicate_text_returns_first_row(self):
+        self.store.append("You", row_text("You", "yes"), self.now, 1)
+        self.store.append("You", row_text("You", "yes"), self.now, 2)
+        self.assertEqual(self.store.find_by_text("You", "You: [yes]"), 0)
+
+        self.store.replace("You", 0, row_text("You", "no"), self.now, 1)
+        self.assertEqual(self.store.find_by_text("You", "You: [yes]"), 1)
+
+    def test_clear_keeps_row_lists(self):
+        rows = self.store.rows["You"]
+        self.store.append("You", row_text("You", "hello"), self.now, 1)
+
+        self.store.clear()
+
+        self.assertIs(self.store.rows["You"], rows)
+        self.assertEqual(rows, [])
+        self.assertIsNone(self.store.find_by_id(1))
+        self.assertIsNone(self.store.last("You"))
+
+
+class TestMergedTranscriptView(unittest.TestCase):
+    PERSONAS = ["You", "Speaker", "assistant", "system"]
+
+    def setUp(self):
+        self.store = ConversationStore(self.PERSONAS)
+        self.start = datetime.datetime(2024, 1, 1)
+
+    def expected_text(self, sources, length):
+        """Merge as done before the view existed."""
+        merged = list(merge(*[self.store.rows[persona][-length:] if persona in sources else []
+                              for persona in self.PERSONAS], key=lambda row: row[1]))
+        return "".join(row[0] for row in merged[-length:])
+
+    def test_view_matches_merge_of_personas(self):
+        rng = random.Random(7)
+        sources = ["You", "Speaker"]
+        view = self.store.view(sources)
+        for step in range(400):
+            persona = rng.choice(self.PERSONAS)
+            rows = self.store.rows[persona]
+            if rows and rng.random() < 0.4:
+                # Update the last row of the persona, keeping its time
+                self.store.replace(persona, len(rows) - 1, row_text(persona, f"edit {step}"),
+                                   rows[-1][1], rows[-1][2])
+            else:
+                # Several rows share the same time
+                time_spoken = self.start + datetime.timedelta(seconds=step // 3)
+                self.store.append(persona, row_text(persona, f"row {step}"), time_spoken, step)
+            if step % 5 == 0:
+                self.assertEqual(view.text(), self.expected_text(sources, 0))
+            self.assertEqual(view.text(3), self.expected_text(sources, 3))
+
+        self.assertEqual(self.store.view(self.PERSONAS).text(), self.expected_text(self.PERSONAS, 0))
+        self.assertEqual(self.store.view(["assistant"]).text(1), self.expected_text(["assistant"], 1))
+
+    def test_out_of_order_row_invalidates_tail(self):
+        view = self.store.view(["You", "Speaker"])
+        self.store.append("You", row_text("You", "first"), self.start, 1)
+        self.store.append("You", row_text("You", "third"), self.start + datetime.timedelta(seconds=2), 2)
+        self.assertEqual(view.text(), row_text("You", "first") + row_text("You", "third"))
+
+        self.store.append("Speaker", row_text("Speaker", "second"), self.start + datetime.timedelta(seconds=1), 3)
+
+        self.assertEqual(view.text(), row_text("You", "first") + row_text("Speaker", "second")
+                         + row_text("You", "third"))
+        self.assertEqual([row[2] for row in view.rows(2)], [3, 2])
+
+    def test_clear_empties_views(self):
+        view = self.store.view(["You"])
+        self.store.append("You", row_text("You", "hello"), self.start, 1)
+        self.assertEqual(len(view), 1)
+
+        self.store.clear()
+
+        self.assertEqual(view.text(), "")
+        self.assertEqual(view.rows(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
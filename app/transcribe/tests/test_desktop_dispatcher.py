@@ -0,0 +1,121 @@
+"""Unit tests for the desktop UI dispatcher."""
+
+import threading
+import unittest
+
+from app.transcribe.desktop.dispatcher import WAKE_EVENT, UIDispatcher
+
+
+class FakeWidget:
+    """Tk widget double that records events and scheduled callbacks."""
+
+    def __init__(self):
+        self.bindings = {}
+        self.events = []
+        self.event_threads = []
+        self.event_posted = threading.Event()
+        self.release_events = threading.Event()
+        self.release_events.set()
+        self.after_calls = []
+        self.idle_calls = []
+
+    def bind(self, sequence, func, add=None):
+        self.bindings[sequence] = func
+
+    def event_generate(self, sequence, when=None):
+        # Tk calls from other threads wait for the main loop
+        self.release_events.wait()
+        self.events.append((sequence, when))
+        self.event_threads.append(threading.get_ident())
+        self.event_posted.set()
+
+    def wait_for_events(self, count):
+        for _ in range(100):
+            if len(self.events) >= count:
+                return
+            self.event_posted.wait(0.05)
+            self.event_posted.clear()
+
+    def after(self, delay, callback):
+        self.after_calls.append((delay, callback))
+
+    def after_idle(self, callback):
+        self.idle_calls.append(callback)
+
+    def wake(self):
+        self.bindings[WAKE_EVENT](None)
+
+
+class TestUIDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.now = 100.0
+        self.widget = FakeWidget()
+        self.dispatcher = UIDispatcher(self.widget, frame_ms=33, clock=lambda: self.now)
+        self.calls = []
+
+    def test_one_wake_event_per_frame(self):
+        self.dispatcher.post(self.calls.append, ("first",))
+        self.dispatcher.post(self.calls.append, ("second",))
+
+        self.widget.wait_for_events(1)
+        self.assertEqual(self.widget.events, [(WAKE_EVENT, "tail")])
+        self.widget.wake()
+        self.assertEqual(self.calls, ["first", "second"])
+
+        self.dispatcher.post(self.calls.append, ("third",))
+        self.widget.wait_for_events(2)
+        self.assertEqual(len(self.widget.events), 2)
+
+    def test_post_does_not_wait_for_tk(self):
+        self.widget.release_events.clear()
+        lock = threading.Lock()
+
+        # Posting while holding a lock must not wait for the Tk loop
+        with lock:
+            self.dispatcher.post(self.calls.append, ("first",))
+        self.assertEqual(self.widget.events, [])
+
+        self.widget.release_events.set()
+        self.widget.wait_for_events(1)
+        self.assertNotIn(threading.get_ident(), self.widget.event_threads)
+
+    def test_keyed_actions_keep_latest(self):
+        self.dispatcher.post(self.calls.append, ("partial 1",), key="row")
+        self.dispatcher.post(self.calls.append, ("other",))
+        self.dispatcher.post(self.calls.append, ("partial 2",), key="row")
+
+        self.dispatcher.dispatch()
+
+        self.assertEqual(self.calls, ["other", "partial 2"])
+
+    def test_wake_within_frame_is_delayed(self):
+        self.dispatcher.dispatch()
+        self.now += 0.010
+        self.dispatcher.post(self.calls.append, ("late",))
+
+        self.widget.wake()
+
+        self.assertEqual(self.calls, [])
+        self.assertEqual(self.widget.after_calls, [(23, self.dispatcher.dispatch)])
+
+    def test_failing_action_does_not_stop_others(self):
+        self.dispatcher.post(lambda: 1 / 0)
+        self.dispatcher.post(self.calls.append, ("after error",))
+
+        self.dispatcher.dispatch()
+
+        self.assertEqual(self.calls, ["after error"])
+
+    def test_post_from_worker_thread(self):
+        thread = threading.Thread(target=self.dispatcher.post, args=(self.calls.append, ("worker",)))
+        thread.start()
+        thread.join()
+
+        self.dispatcher.dispatch()
+
+        self.assertEqual(self.calls, ["worker"])
+        self.assertEqual(self.widget.idle_calls, [self.dispatcher.dispatch])
+
+
+if __name__ == "__main__":
+    unittest.main()
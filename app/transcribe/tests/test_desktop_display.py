@@ -1,9 +1,9 @@
 """Unit tests for desktop display helpers."""
 
-import datetime
 import unittest
 from types import SimpleNamespace
 
+from app.transcribe.core.conversation import CHANGE_CLEAR, CHANGE_INSERT, CHANGE_UPDATE, ConversationChange
 from app.transcribe.desktop.display import DesktopDisplayManager
 
 
@@ -26,6 +26,51 @@ class FakeTranscriptText:
     def scroll_to_bottom(self):
         self.calls.append(("scroll_to_bottom",))
 
+    def clear_all_text(self):
+        self.calls.append(("clear_all_text",))
+
+    def append_keyed_rows(self, rows):
+        self.calls.append(("append_keyed_rows", rows))
+
+    def prepend_keyed_rows(self, rows):
+        self.calls.append(("prepend_keyed_rows", rows))
+
+    def upsert_keyed_row(self, row_key, text):
+        self.calls.append(("upsert_keyed_row", row_key, text))
+
+    def update_keyed_row(self, row_key, text):
+        self.calls.append(("update_keyed_row", row_key, text))
+        return True
+
+    def set_row_source(self, row_source, page_rows, is_source_row=None):
+        self.calls.append(("set_row_source", page_rows))
+        self.row_source = row_source
+
+    def finalize_keyed_row(self, row_key, text, new_row_key=None):
+        self.calls.append(("finalize_keyed_row", row_key, text, new_row_key))
+
+    def delete_keyed_row(self, row_key):
+        self.calls.append(("delete_keyed_row", row_key))
+
+
+class FakeConversation:
+    """Conversation double serving transcript rows."""
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.rows = rows
+        self.requests = []
+
+    def is_row_key(self, row_key):
+        return row_key in [key for key, _ in self.rows]
+
+    def get_transcript_rows(self, sources, count=0, before_row_key=None):
+        self.requests.append((tuple(sources), count, before_row_key))
+        end = len(self.rows)
+        if before_row_key is not None:
+            end = [row_key for row_key, _ in self.rows].index(before_row_key)
+        return self.version, self.rows[max(end - count, 0):end]
+
 
 class FakeTextbox:
     """Textbox double that records text operations."""
@@ -50,7 +95,7 @@ class FakeTextbox:
 
     def insert(self, start, text):
         self.insert_calls.append((start, text))
-        self.text = text
+        self.text = self.text + text if start == "end" else text
 
     def see(self, where):
         self.see_calls.append(where)
@@ -72,6 +117,8 @@ class TestDesktopDisplayManager(unittest.TestCase):
             update_interval_slider_label=self.interval_label,
             update_interval_slider=self.interval_slider,
             enqueue_ui_action=lambda callback, *args: self.enqueued.append((callback, args)),
+            enqueue_keyed_ui_action=lambda key, callback, *args: self.enqueued.append((callback, args, key)),
+            global_vars=None,
         )
         self.enqueued = []
         self.manager.bind_ui(self.ui)
@@ -101,29 +148,96 @@ class TestDesktopDisplayManager(unittest.TestCase):
         self.assertEqual(self.response_textbox.see_calls, ["end"])
 
     def test_update_transcript_ui_only_runs_when_conversation_changed(self):
-        runtime = SimpleNamespace(convo=SimpleNamespace(last_update=datetime.datetime(2026, 1, 1, 12, 0, 0)))
-        transcriber = SimpleNamespace(get_transcript=lambda: "line one")
+        runtime = SimpleNamespace(convo=FakeConversation(3, [("0-You-0", "You: [line one]\n")]))
+
+        self.manager.update_transcript_ui(self.transcript_text, runtime)
+        self.manager.update_transcript_ui(self.transcript_text, runtime)
 
-        self.manager.update_transcript_ui(transcriber, self.transcript_text, runtime)
-        self.manager.update_transcript_ui(transcriber, self.transcript_text, runtime)
+        add_calls = [call for call in self.transcript_text.calls if call[0] == "append_keyed_rows"]
+        self.assertEqual(add_calls, [("append_keyed_rows", [("0-You-0", "You: [line one]\n")])])
 
-        add_calls = [call for call in self.transcript_text.calls if call[0] == "add_text_to_bottom"]
-        self.assertEqual(add_calls, [("add_text_to_bottom", "line one")])
+    def test_conversation_changes_are_applied_as_row_deltas(self):
+        self.manager.apply_conversation_change(
+            ConversationChange(1, CHANGE_INSERT, "You", "0-You-1", "You: [hel]\n"))
+        self.manager.apply_conversation_change(
+            ConversationChange(2, CHANGE_UPDATE, "You", "0-You-1", "You: [hello]\n"))
+        self.manager.apply_conversation_change(
+            ConversationChange(2, CHANGE_UPDATE, "You", "0-You-1", "You: [stale]\n"))
+        self.manager.apply_conversation_change(
+            ConversationChange(3, CHANGE_INSERT, "Speaker", "0-Speaker-0", "Speaker: [hi]\n", partial_id="p1"))
 
-    def test_update_response_ui_writes_response_and_reschedules(self):
-        responder = SimpleNamespace(response="assistant response", update_response_interval=lambda value: value)
-        runtime = SimpleNamespace(responder=SimpleNamespace(enabled=True), update_response_now=False, previous_response=None)
+        self.assertEqual(
+            self.transcript_text.calls,
+            [
+                ("upsert_keyed_row", "0-You-1", "You: [hel]\n"),
+                ("update_keyed_row", "0-You-1", "You: [hello]\n"),
+                ("finalize_keyed_row", "p1", "Speaker: [hi]\n", "0-Speaker-0"),
+            ],
+        )
 
-        self.manager.update_response_ui(
-            responder,
-            self.response_textbox,
-            self.interval_label,
-            self.interval_slider,
-            runtime,
+    def test_assistant_changes_queue_response_update(self):
+        self.manager.queue_conversation_change(
+            ConversationChange(1, CHANGE_INSERT, "assistant", "0-assistant-0", "assistant: [x]\n"))
+        self.manager.queue_conversation_change(ConversationChange(2, CHANGE_CLEAR))
+
+        self.assertEqual(self.enqueued[0][0], self.manager.update_response_ui)
+        self.assertEqual(self.enqueued[0][2], "response_textbox")
+        self.assertEqual(self.enqueued[1][1][0].action, CHANGE_CLEAR)
+
+    def test_row_updates_are_keyed_by_row(self):
+        self.manager.queue_conversation_change(
+            ConversationChange(1, CHANGE_INSERT, "You", "0-You-0", "You: [hel]\n"))
+        self.manager.queue_conversation_change(
+            ConversationChange(2, CHANGE_UPDATE, "You", "0-You-0", "You: [hello]\n"))
+
+        self.assertEqual(len(self.enqueued[0]), 2)
+        self.assertEqual(self.enqueued[1][2], ("transcript_row", "0-You-0"))
+
+    def test_row_source_reads_older_rows_from_conversation(self):
+        rows = [(f"0-You-{index}", f"You: [{index}]\n") for index in range(3)]
+        runtime = SimpleNamespace(
+            convo=FakeConversation(3, rows),
+            responder=SimpleNamespace(enabled=False, response=None, update_response_interval=lambda value: value),
+            update_response_now=False,
+            previous_response=None,
         )
+        runtime.convo.add_change_listener = lambda listener: None
+        runtime.convo.set_handlers = lambda *args, **kwargs: None
+        self.ui.global_vars = runtime
+
+        self.manager.update_initial_transcripts(runtime)
+
+        self.assertEqual(self.transcript_text.calls[0], ("set_row_source", 200))
+        self.assertEqual(self.transcript_text.row_source("0-You-2", 1), [rows[1]])
+
+    def test_write_in_textbox_appends_extended_text(self):
+        self.manager.write_in_textbox(self.response_textbox, "Hello")
+        self.manager.write_in_textbox(self.response_textbox, "Hello world")
+        self.manager.write_in_textbox(self.response_textbox, "Hello world")
+
+        self.assertEqual(self.response_textbox.insert_calls, [("0.0", "Hello"), ("end", " world")])
+        self.assertEqual(len(self.response_textbox.delete_calls), 1)
+        self.assertEqual(self.response_textbox.text, "Hello world")
+
+    def test_update_response_ui_writes_response_once(self):
+        runtime = SimpleNamespace(responder=SimpleNamespace(enabled=True, response="assistant response"),
+                                  update_response_now=False, previous_response=None)
+
+        self.manager.update_response_ui(runtime)
 
         self.assertEqual(self.response_textbox.insert_calls[-1], ("0.0", "assistant response"))
-        self.assertEqual(self.response_textbox.after_calls[0][0], 300)
+        self.assertEqual(self.response_textbox.after_calls, [])
+
+    def test_selected_row_response_is_shown(self):
+        runtime = SimpleNamespace(responder=SimpleNamespace(enabled=False, response="latest"),
+                                  update_response_now=False, previous_response=None)
+        runtime.convo = SimpleNamespace(
+            on_convo_select=lambda text: setattr(runtime, "previous_response", f"response to {text}"))
+        self.ui.global_vars = runtime
+
+        self.manager.select_transcript_row("You: [hello]")
+
+        self.assertEqual(self.response_textbox.text, "response to You: [hello]")
 
 
 if __name__ == "__main__":
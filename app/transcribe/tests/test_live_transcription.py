@@ -2,8 +2,9 @@
 
 import unittest
 
+from app.transcribe import live_transcription
 from app.transcribe.live_transcription import LiveTranscriptManager
-from sdk.transcription_result import TranscriptSegment, TranscriptionHypothesis
+from sdk.transcription_result import TranscriptSegment, TranscriptWord, TranscriptionHypothesis
 
 
 def hypothesis(text, segments=None, start=0.0, end=10.0):
@@ -16,6 +17,17 @@ def hypothesis(text, segments=None, start=0.0, end=10.0):
     )
 
 
+def rolling_windows(word_count, window_words=60, step_words=10):
+    """Hypotheses for a long monologue heard through overlapping windows.
+    The last word of each window is misheard and corrected by the next window."""
+    words = [f"word{index}" for index in range(word_count)]
+    for end in range(step_words, word_count + 1, step_words):
+        window = words[max(0, end - window_words):end]
+        if end < word_count:
+            window = window[:-1] + [f"{window[-1]}x"]
+        yield " ".join(window)
+
+
 class TestLiveTranscriptManager(unittest.TestCase):
     def setUp(self):
         self.manager = LiveTranscriptManager(
@@ -161,6 +173,167 @@ class TestLiveTranscriptManager(unittest.TestCase):
         self.assertEqual(update.text, "fresh")
         self.assertTrue(update.update_previous)
 
+    def test_committed_tokens_are_kept_when_hypothesis_rewrites_them(self):
+        self.manager.process_hypothesis(
+            "You",
+            hypothesis(
+                "alpha beta gamma delta",
+                segments=[
+                    TranscriptSegment(0, 0.0, 3.0, "alpha beta"),
+                    TranscriptSegment(1, 6.0, 9.0, "gamma delta"),
+                ],
+                end=10.0,
+            ),
+            new_phrase=True,
+        )
+        update = self.manager.process_hypothesis(
+            "You",
+            hypothesis("alfa beta gamma delta epsilon", end=11.0),
+            new_phrase=False,
+        )
+
+        self.assertEqual(update.text, "alpha beta gamma delta epsilon")
+
+    def test_committed_tokens_are_kept_when_unaligned_hypothesis_starts_later(self):
+        self.manager.process_hypothesis(
+            "You",
+            hypothesis(
+                "one two three four five six",
+                segments=[
+                    TranscriptSegment(0, 0.0, 3.0, "one two three"),
+                    TranscriptSegment(1, 6.0, 9.0, "four five six"),
+                ],
+                end=10.0,
+            ),
+            new_phrase=True,
+        )
+        # A shorter audio context starts the hypothesis after the first committed word,
+        # and the rewording keeps it from being aligned with the existing tokens
+        update = self.manager.process_hypothesis(
+            "You",
+            hypothesis("two three for fife six seven", start=1.0, end=11.0),
+            new_phrase=False,
+        )
+
+        self.assertEqual(update.text, "one two three for fife six seven")
+
+    def test_long_monologue_is_merged_without_duplicates_in_bounded_state(self):
+        words = [f"word{index}" for index in range(3000)]
+        update = None
+        for index, text in enumerate(rolling_windows(len(words))):
+            update = self.manager.process_hypothesis("Speaker", hypothesis(text), new_phrase=index == 0)
+            state = self.manager._states["Speaker"]  # pylint: disable=protected-access
+            self.assertLessEqual(len(state.tokens), live_transcription.MAX_TAIL_TOKENS)
+
+        self.assertEqual(update.text.split(), words)
+
+    def test_merge_text_is_available_for_plain_strings(self):
+        merged_text = LiveTranscriptManager._merge_text(  # pylint: disable=protected-access
+            "hello  world", "world again")
+        self.assertEqual(merged_text, "hello world again")
+
+
+class TestLiveTranscriptTimestampAlignment(unittest.TestCase):
+    def setUp(self):
+        self.manager = LiveTranscriptManager(
+            {
+                "General": {
+                    "live_transcription_mutable_tail_seconds": 2,
+                    "live_transcription_audio_context_seconds": 1,
+                    "live_transcription_alignment": "timestamps",
+                }
+            }
+        )
+
+    def test_segments_before_mutable_tail_are_committed(self):
+        self.manager.process_hypothesis("You", hypothesis(
+            "one two three",
+            segments=[
+                TranscriptSegment(0, 0.0, 3.0, "one"),
+                TranscriptSegment(1, 3.0, 6.0, "two"),
+                TranscriptSegment(2, 6.0, 9.0, "three"),
+            ],
+            end=9.0,
+        ), new_phrase=True)
+
+        self.assertEqual(self.manager.retained_audio_start_seconds("You"), 5.0)
+
+        update = self.manager.process_hypothesis("You", hypothesis(
+            "to three four",
+            segments=[
+                TranscriptSegment(0, 5.0, 6.0, "to"),
+                TranscriptSegment(1, 6.0, 9.0, "three"),
+                TranscriptSegment(2, 9.0, 11.0, "four"),
+            ],
+            start=5.0,
+            end=11.0,
+        ), new_phrase=False)
+
+        self.assertEqual(update.text, "one two three four")
+        self.assertTrue(update.update_previous)
+        self.assertEqual(self.manager.retained_audio_start_seconds("You"), 8.0)
+
+    def test_word_timestamps_split_a_segment_at_the_committed_audio(self):
+        self.manager.process_hypothesis("You", hypothesis(
+            "hello there",
+            segments=[TranscriptSegment(0, 0.0, 4.0, "hello there")],
+            end=6.0,
+        ), new_phrase=True)
+
+        update = self.manager.process_hypothesis("You", hypothesis(
+            "there general kenobi",
+            segments=[TranscriptSegment(0, 3.0, 7.0, "there general kenobi", words=(
+                TranscriptWord(3.0, 3.8, "there"),
+                TranscriptWord(4.2, 5.0, "general"),
+                TranscriptWord(5.5, 7.0, "kenobi"),
+            ))],
+            start=3.0,
+            end=7.0,
+        ), new_phrase=False)
+
+        self.assertEqual(update.text, "hello there general kenobi")
+
+    def test_hypothesis_without_timestamps_is_merged_by_text(self):
+        self.manager.process_hypothesis("You", hypothesis("hello world"), new_phrase=True)
+
+        update = self.manager.process_hypothesis("You", hypothesis("world again"), new_phrase=False)
+
+        self.assertEqual(update.text, "hello world again")
+        self.assertEqual(self.manager.retained_audio_start_seconds("You"), 0.0)
+
+    def test_text_alignment_commits_segments_before_mutable_tail(self):
+        manager = LiveTranscriptManager({"General": {"live_transcription_mutable_tail_seconds": 2,
+                                                     "live_transcription_audio_context_seconds": 1}})
+        manager.process_hypothesis("You", hypothesis(
+            "one two",
+            segments=[TranscriptSegment(0, 0.0, 3.0, "one"), TranscriptSegment(1, 3.0, 9.0, "two")],
+            end=9.0,
+        ), new_phrase=True)
+
+        self.assertEqual(manager.retained_audio_start_seconds("You"), 2.0)
+
+    def test_repeated_hypothesis_commits_mutable_tail(self):
+        self.manager.process_hypothesis("You", hypothesis(
+            "one two",
+            segments=[TranscriptSegment(0, 0.0, 3.0, "one"), TranscriptSegment(1, 3.0, 9.0, "two")],
+            end=10.0,
+        ), new_phrase=True)
+        self.assertEqual(self.manager.retained_audio_start_seconds("You"), 2.0)
+
+        update = self.manager.process_hypothesis("You", hypothesis(
+            "one two",
+            segments=[TranscriptSegment(0, 0.0, 3.0, "one"), TranscriptSegment(1, 3.0, 9.0, "two")],
+            end=10.5,
+        ), new_phrase=False)
+
+        self.assertEqual(update.text, "one two")
+        self.assertFalse(update.changed)
+        self.assertEqual(self.manager.retained_audio_start_seconds("You"), 8.0)
+
+    def test_unknown_alignment_is_rejected(self):
+        with self.assertRaises(ValueError):
+            LiveTranscriptManager({"General": {"live_transcription_alignment": "audio"}})
+
 
 if __name__ == "__main__":
     unittest.main()
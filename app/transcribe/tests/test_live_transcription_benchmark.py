@@ -0,0 +1,58 @@
+"""Optional benchmark replaying an hour of rolling-window hypotheses through LiveTranscriptManager."""
+
+import os
+import time
+import unittest
+
+from app.transcribe.live_transcription import LiveTranscriptManager
+from sdk.transcription_result import TranscriptSegment, TranscriptionHypothesis
+
+
+RUN_BENCHMARK = os.environ.get("TRANSCRIBE_BENCHMARK") == "1"
+STREAM_SECONDS = 3600
+WINDOW_SECONDS = 30
+WORD_SECONDS = 0.4
+SEGMENT_WORDS = 5
+
+
+def _hypothesis(words, end_seconds):
+    first = max(0, int((end_seconds - WINDOW_SECONDS) / WORD_SECONDS))
+    last = int(end_seconds / WORD_SECONDS)
+    segments = []
+    for start in range(first, last, SEGMENT_WORDS):
+        stop = min(start + SEGMENT_WORDS, last)
+        segments.append(TranscriptSegment(len(segments), start * WORD_SECONDS, stop * WORD_SECONDS,
+                                          " ".join(words[start:stop])))
+    return TranscriptionHypothesis(
+        provider="benchmark",
+        text=" ".join(words[first:last]),
+        segments=segments,
+        audio_start_seconds=first * WORD_SECONDS,
+        audio_end_seconds=end_seconds,
+    )
+
+
+@unittest.skipUnless(RUN_BENCHMARK, "Set TRANSCRIBE_BENCHMARK=1 to run the live transcription benchmark.")
+class TestLiveTranscriptManagerBenchmark(unittest.TestCase):
+    def test_replay_one_hour_of_hypotheses(self):
+        manager = LiveTranscriptManager({"General": {}})
+        words = [f"word{index}" for index in range(int(STREAM_SECONDS / WORD_SECONDS))]
+        hypotheses = [_hypothesis(words, second) for second in range(1, STREAM_SECONDS + 1)]
+
+        durations = []
+        update = None
+        for index, hypothesis in enumerate(hypotheses):
+            started = time.perf_counter()
+            update = manager.process_hypothesis("Speaker", hypothesis, new_phrase=index == 0)
+            durations.append(time.perf_counter() - started)
+
+        first_ms = sum(durations[:600]) * 1000 / 600
+        last_ms = sum(durations[-600:]) * 1000 / 600
+        print(f"\n{len(hypotheses)} hypotheses in {sum(durations):.2f} seconds. "
+              f"First 10 minutes {first_ms:.3f} ms, last 10 minutes {last_ms:.3f} ms per update")
+        self.assertEqual(update.text.split(), words)
+        self.assertLess(last_ms, first_ms * 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -102,6 +102,30 @@ class TestPCM16MonoResampler(unittest.TestCase):
         converted = PCM16MonoResampler(24000, 2, 3).convert(frames)
         self.assertEqual(converted, b"\x00\x00" * 10)
 
+    def test_multichannel_downmix_matches_per_frame_mean(self):
+        samples = [int(30000 * math.sin(index / 5)) for index in range(6 * 64)]
+        frames = struct.pack(f"<{len(samples)}h", *samples)
+
+        converted = PCM16MonoResampler(24000, 2, 6).convert(frames)
+
+        expected = [
+            int(sum(samples[offset:offset + 6]) / 6) for offset in range(0, len(samples), 6)
+        ]
+        self.assertEqual(list(struct.unpack(f"<{len(expected)}h", converted)), expected)
+
+    def test_channel_weights_are_applied_and_clipped(self):
+        frames = struct.pack("<hhhh", 1000, 3000, 30000, 30000)
+
+        converted = PCM16MonoResampler(24000, 2, 2, channel_weights=(0.0, 1.0)).convert(frames)
+        self.assertEqual(struct.unpack("<2h", converted), (3000, 30000))
+
+        loud = PCM16MonoResampler(24000, 2, 2, channel_weights=(1.0, 1.0)).convert(frames)
+        self.assertEqual(struct.unpack("<2h", loud), (4000, 32767))
+
+    def test_channel_weights_must_match_channel_count(self):
+        with self.assertRaises(ValueError):
+            PCM16MonoResampler(24000, 2, 6, channel_weights=(0.5, 0.5))
+
 
 class TestOpenAIRealtimeSTTModel(unittest.TestCase):
     def setUp(self):
@@ -0,0 +1,43 @@
+"""Optional micro-benchmark for PCM16MonoResampler downmixing and resampling."""
+
+import math
+import os
+import struct
+import time
+import unittest
+
+from sdk.streaming_transcriber_models import PCM16MonoResampler
+
+
+RUN_BENCHMARK = os.environ.get("TRANSCRIBE_BENCHMARK") == "1"
+CHUNK_SECONDS = 0.1
+ITERATIONS = 200
+
+
+def _chunk(sample_rate, channels):
+    frames = int(sample_rate * CHUNK_SECONDS)
+    samples = [int(10000 * math.sin(index / 7)) for index in range(frames * channels)]
+    return struct.pack(f"<{len(samples)}h", *samples)
+
+
+@unittest.skipUnless(RUN_BENCHMARK, "Set TRANSCRIBE_BENCHMARK=1 to run the resampler benchmark.")
+class TestPCM16MonoResamplerBenchmark(unittest.TestCase):
+    def test_convert_100ms_chunks(self):
+        print()
+        for sample_rate in (44100, 48000):
+            for channels in (1, 2, 6, 8):
+                converter = PCM16MonoResampler(sample_rate, 2, channels, target_rate=16000)
+                chunk = _chunk(sample_rate, channels)
+                converter.convert(chunk)
+
+                started = time.perf_counter()
+                for _ in range(ITERATIONS):
+                    converter.convert(chunk)
+                elapsed_ms = (time.perf_counter() - started) * 1000 / ITERATIONS
+
+                print(f"{sample_rate} Hz, {channels} channels: {elapsed_ms:.3f} ms per 100 ms chunk")
+                self.assertLess(elapsed_ms, CHUNK_SECONDS * 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
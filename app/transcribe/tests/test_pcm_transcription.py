@@ -0,0 +1,112 @@
+"""Tests for in-memory PCM transcription paths."""
+
+import io
+import os
+import unittest
+import wave
+from array import array
+from types import SimpleNamespace
+
+import numpy as np
+
+from sdk.transcriber_models import (
+    APIWhisperSTTModel,
+    WhisperCPPSTTModel,
+    WhisperSTTModel,
+    pcm_to_float32,
+    pcm_to_wav_bytes,
+)
+
+
+def _pcm16(samples):
+    return array("h", samples).tobytes()
+
+
+class FakeWhisperModel:
+    def __init__(self):
+        self.audio = None
+
+    def transcribe(self, audio, **kwargs):
+        self.audio = audio
+        self.kwargs = kwargs
+        return {"text": "hello", "segments": []}
+
+
+class TestPCMTranscription(unittest.TestCase):
+    def test_pcm_to_wav_bytes_preserves_format(self):
+        pcm = _pcm16([0, 100, -100, 200])
+
+        wav_data = pcm_to_wav_bytes(memoryview(pcm), sample_rate=8000, width=2, channels=2)
+
+        with wave.open(io.BytesIO(wav_data), "rb") as wav_file:
+            self.assertEqual(wav_file.getnchannels(), 2)
+            self.assertEqual(wav_file.getsampwidth(), 2)
+            self.assertEqual(wav_file.getframerate(), 8000)
+            self.assertEqual(wav_file.readframes(wav_file.getnframes()), pcm)
+
+    def test_pcm_to_float32_downmixes_to_normalized_mono(self):
+        pcm = _pcm16([16384, 16384, -16384, -16384])
+
+        audio = pcm_to_float32(memoryview(pcm), sample_rate=16000, width=2, channels=2)
+
+        self.assertEqual(audio.dtype, np.float32)
+        np.testing.assert_allclose(audio, [0.5, -0.5])
+
+    def test_whisper_local_transcribes_from_array(self):
+        model = object.__new__(WhisperSTTModel)
+        model.lang = "en"
+        model.audio_model = FakeWhisperModel()
+
+        result = model.get_transcription_from_pcm(
+            memoryview(_pcm16([0] * 3200)), sample_rate=32000, width=2, channels=1
+        )
+
+        self.assertEqual(result["text"], "hello")
+        self.assertIsInstance(model.audio_model.audio, np.ndarray)
+        self.assertEqual(len(model.audio_model.audio), 1600)
+        self.assertEqual(model.audio_model.kwargs["language"], "en")
+
+    def test_whisper_api_uploads_in_memory_wav(self):
+        uploads = []
+
+        def create(model, file):
+            uploads.append(file)
+            return SimpleNamespace(text="hello")
+
+        model = object.__new__(APIWhisperSTTModel)
+        model.stt_client = SimpleNamespace(
+            audio=SimpleNamespace(transcriptions=SimpleNamespace(create=create))
+        )
+
+        result = model.get_transcription_from_pcm(
+            memoryview(_pcm16([1, 2])), sample_rate=16000, width=2, channels=1
+        )
+
+        self.assertEqual(result.text, "hello")
+        file_name, wav_data = uploads[0]
+        self.assertEqual(file_name, "audio.wav")
+        self.assertTrue(wav_data.startswith(b"RIFF"))
+
+    def test_default_path_falls_back_to_temporary_wav_file(self):
+        seen = {}
+
+        def get_transcription(wav_file_path):
+            with wave.open(wav_file_path, "rb") as wav_file:
+                seen["frames"] = wav_file.readframes(wav_file.getnframes())
+            seen["path"] = wav_file_path
+            return {"transcription": []}
+
+        model = object.__new__(WhisperCPPSTTModel)
+        model.server = None
+        model.get_transcription = get_transcription
+        pcm = _pcm16([5, 6, 7])
+
+        result = model.get_transcription_from_pcm(memoryview(pcm), sample_rate=16000, width=2, channels=1)
+
+        self.assertEqual(result, {"transcription": []})
+        self.assertEqual(seen["frames"], pcm)
+        self.assertFalse(os.path.exists(seen["path"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,10 @@
 """Unit tests for STT provider composition."""
 
+import os
+import tempfile
 import unittest
+import wave
+from array import array
 from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
@@ -156,5 +160,70 @@ class TestSTTProviders(unittest.TestCase):
         self.assertNotIn("audio_chunk_preprocessor", kwargs)
 
 
+class TestWhisperCppAudioConversion(unittest.TestCase):
+    @staticmethod
+    def _stereo_48khz(frames):
+        return array("h", [sample for index in range(frames) for sample in (index % 1000, -(index % 1000))]).tobytes()
+
+    def test_preprocessor_converts_to_16khz_mono_in_process(self):
+        preprocessor = stt.WhisperCppAudioPreprocessor()
+        source_info = {"sample_rate": 48000, "sample_width": 2, "channels": 2}
+
+        with patch("app.transcribe.providers.stt.subprocess.call") as mock_call:
+            converted = preprocessor("Speaker", self._stereo_48khz(4800), source_info)
+
+        mock_call.assert_not_called()
+        self.assertEqual(len(converted), 1600 * 2)
+
+    def test_preprocessor_carries_resampler_state_across_chunks(self):
+        source_info = {"sample_rate": 44100, "sample_width": 2, "channels": 2}
+        audio = self._stereo_48khz(4410)
+        whole = stt.WhisperCppAudioPreprocessor()("Speaker", audio, source_info)
+
+        chunked_preprocessor = stt.WhisperCppAudioPreprocessor()
+        # Chunk boundary inside a frame and between resampler phases
+        chunked = b"".join(
+            chunked_preprocessor("Speaker", audio[offset:offset + 1001], source_info)
+            for offset in range(0, len(audio), 1001)
+        )
+
+        self.assertEqual(chunked, whole)
+
+    def test_wav_file_is_converted_without_ffmpeg(self):
+        file_descriptor, input_path = tempfile.mkstemp(suffix=".wav")
+        os.close(file_descriptor)
+        output_path = None
+        try:
+            with wave.open(input_path, "wb") as wav_file:
+                wav_file.setnchannels(2)
+                wav_file.setsampwidth(2)
+                wav_file.setframerate(48000)
+                wav_file.writeframes(self._stereo_48khz(48000))
+
+            with patch("app.transcribe.providers.stt.subprocess.call") as mock_call:
+                output_path = stt.convert_audio_to_16khz(input_path)
+
+            mock_call.assert_not_called()
+            with wave.open(output_path, "rb") as wav_file:
+                self.assertEqual(wav_file.getframerate(), 16000)
+                self.assertEqual(wav_file.getnchannels(), 1)
+                self.assertEqual(wav_file.getnframes(), 16000)
+        finally:
+            for path in (input_path, output_path):
+                if path and os.path.exists(path):
+                    os.unlink(path)
+
+    def test_non_wav_input_is_not_converted_in_process(self):
+        file_descriptor, input_path = tempfile.mkstemp(suffix=".mp3")
+        os.write(file_descriptor, b"ID3 not a wav file")
+        os.close(file_descriptor)
+        try:
+            self.assertFalse(stt.convert_wav_to_16khz(input_path, input_path + ".wav"))
+        finally:
+            os.unlink(input_path)
+            if os.path.exists(input_path + ".wav"):
+                os.unlink(input_path + ".wav")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,68 @@
+"""Unit tests for coalescing of streamed LLM responses."""
+
+import unittest
+
+from app.transcribe.response_stream import ResponseStream
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 10.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResponseStream(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.flushed = []
+        self.stream = ResponseStream(self.flushed.append, flush_interval_ms=100, clock=self.clock)
+
+    def add(self, delta, seconds=0.01):
+        self.clock.now += seconds
+        self.stream.add(delta)
+
+    def test_deltas_are_flushed_on_interval_and_sentence_end(self):
+        for delta in ["Hello", " there", ",", " how"]:
+            self.add(delta)
+        self.assertEqual(self.flushed, [])
+
+        self.add(" are", seconds=0.1)
+        self.assertEqual(self.flushed, ["Hello there, how are"])
+
+        self.add(" you?")
+        self.assertEqual(self.flushed[-1], "Hello there, how are you?")
+
+        self.add(" Fine")
+        self.assertEqual(self.stream.close(), "Hello there, how are you? Fine")
+        self.assertEqual(len(self.flushed), 3)
+        self.assertEqual(self.flushed[-1], "Hello there, how are you? Fine")
+
+    def test_close_does_not_repeat_last_flush(self):
+        self.add("Done.")
+        self.stream.close()
+
+        self.assertEqual(self.flushed, ["Done."])
+        self.assertEqual(self.stream.stats.flushes, 1)
+
+    def test_stats_report_first_token_and_rate(self):
+        self.add("a", seconds=0.5)
+        for _ in range(10):
+            self.add("b", seconds=0.1)
+        self.stream.close()
+
+        stats = self.stream.stats
+        self.assertAlmostEqual(stats.first_token_seconds, 0.5)
+        self.assertEqual(stats.tokens, 11)
+        self.assertAlmostEqual(stats.tokens_per_second, 10.0)
+
+    def test_empty_stream(self):
+        self.assertEqual(self.stream.close(), "")
+        self.assertEqual(self.flushed, [])
+        self.assertIsNone(self.stream.stats.first_token_seconds)
+        self.assertEqual(self.stream.stats.tokens_per_second, 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
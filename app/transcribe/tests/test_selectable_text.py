@@ -3,7 +3,34 @@ from tkinter import Tk
 # from customtkinter import CTk
 
 # Assuming SelectableTextComponent is defined in a module named selectable_text_component
-from app.transcribe.uicomp.selectable_text import SelectableText
+from app.transcribe.uicomp.selectable_text import KeyedRowWindow, SelectableText
+
+
+class TestKeyedRowWindow(unittest.TestCase):
+    def test_rows_beyond_max_rows_are_dropped_from_top(self):
+        window = KeyedRowWindow(max_rows=2)
+        tags = [window.append(f"0-You-{index}") for index in range(3)]
+
+        self.assertEqual(window.overflow(), [tags[0]])
+        self.assertEqual(window.keys(), ["0-You-1", "0-You-2"])
+        self.assertNotIn("0-You-0", window)
+        self.assertTrue(window.has_older_rows)
+
+    def test_rows_are_prepended_renamed_and_removed(self):
+        window = KeyedRowWindow()
+        window.append("partial")
+        window.prepend(["0-You-0", "0-You-1"])
+        new_tag = window.rename("partial", "0-You-2")
+
+        self.assertEqual(window.keys(), ["0-You-0", "0-You-1", "0-You-2"])
+        self.assertEqual(window.tag("0-You-2"), new_tag)
+        self.assertIsNone(window.tag("partial"))
+        self.assertIsNotNone(window.remove("0-You-1"))
+        self.assertIsNone(window.remove("0-You-1"))
+        self.assertEqual(window.first(), "0-You-0")
+        self.assertEqual(window.first(lambda row_key: row_key != "0-You-0"), "0-You-2")
+        self.assertEqual(len(window.clear()), 2)
+        self.assertEqual(len(window), 0)
 
 
 class TestSelectableText(unittest.TestCase):
@@ -54,6 +81,63 @@ class TestSelectableText(unittest.TestCase):
         result = self.component.text_widget.get("1.0", "end").strip()
         self.assertEqual(result, "")
 
+    def test_keyed_rows_are_replaced_and_deleted(self):
+        self.component.append_keyed_rows([("0-You-1", "You: [one]"), ("0-You-2", "You: [two]")])
+        self.component.upsert_keyed_row("0-You-1", "You: [one more]")
+        self.component.delete_keyed_row("0-You-2")
+        result = self.component.text_widget.get("1.0", "end").strip()
+        self.assertEqual(result, "You: [one more]")
+
+    def test_prepend_keyed_rows_adds_rows_on_top(self):
+        self.component.append_keyed_rows([("0-You-3", "You: [three]")])
+        self.component.prepend_keyed_rows([("0-You-1", "You: [one]"), ("0-You-2", "You: [two]")])
+        result = self.component.text_widget.get("1.0", "end").split()
+        self.assertEqual(result[1::2], ["[one]", "[two]", "[three]"])
+
+    def test_finalized_partial_row_takes_row_key(self):
+        self.component.upsert_keyed_row("partial", "You: [hel]")
+        self.component.finalize_keyed_row("partial", "You: [hello]", new_row_key="0-You-1")
+        self.component.upsert_keyed_row("0-You-1", "You: [hello there]")
+        result = self.component.text_widget.get("1.0", "end").strip()
+        self.assertEqual(result, "You: [hello there]")
+
+    def test_rows_beyond_max_rows_are_paged_in_from_source(self):
+        component = SelectableText(self.root, max_rows=3)
+        rows = [(f"0-You-{index}", f"You: [{index}]") for index in range(4)]
+
+        def row_source(before_row_key, count):
+            end = [row_key for row_key, _ in rows].index(before_row_key)
+            return rows[max(end - count, 0):end]
+
+        component.set_row_source(row_source, page_rows=1, is_source_row=lambda row_key: row_key != "p1")
+        for row_key, text in rows[:2]:
+            component.upsert_keyed_row(row_key, text)
+        # A provider partial ends up as the top row
+        component.upsert_keyed_row("p1", "Speaker: [partial]")
+        for row_key, text in rows[2:]:
+            component.upsert_keyed_row(row_key, text)
+        self.assertEqual(component.text_widget.get("1.0", "end").split()[1::2], ["[partial]", "[2]", "[3]"])
+
+        self.assertFalse(component.update_keyed_row("0-You-0", "You: [x]"))
+        component.load_older_rows()
+
+        self.assertEqual(component.text_widget.get("1.0", "end").split()[1::2],
+                         ["[1]", "[partial]", "[2]", "[3]"])
+        self.assertTrue(component.rows.has_older_rows)
+        component.destroy()
+
+    def test_replace_multiple_newlines_keeps_two(self):
+        self.component.add_text_to_bottom("Line 1\n\n\n\n")
+        self.component.add_text_to_bottom("Line 2")
+        self.component.replace_multiple_newlines()
+        self.assertEqual(self.component.text_widget.get("1.0", "end-1c"), "Line 1\n\nLine 2\n")
+
+    def test_delete_row_starting_with_deletes_last_match(self):
+        for line in ["You: [one]", "Speaker: [two]", "You: [three]"]:
+            self.component.add_text_to_bottom(line)
+        self.component.delete_row_starting_with("You")
+        self.assertEqual(self.component.text_widget.get("1.0", "end-1c"), "You: [one]\nSpeaker: [two]\n")
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -93,6 +93,44 @@ class TestTranscriptionNormalization(unittest.TestCase):
         self.assertEqual(result.segments[0].start_seconds, 8.0)
         self.assertEqual(result.segments[-1].end_seconds, 10.5)
 
+    def test_word_timestamps_are_normalized(self):
+        model = object.__new__(WhisperSTTModel)
+        response = {
+            "text": "Hello there.",
+            "segments": [
+                {"id": 0, "start": 0.0, "end": 1.0, "text": "Hello there.", "words": [
+                    {"word": " Hello", "start": 0.0, "end": 0.4},
+                    {"word": " there.", "start": 0.5, "end": 1.0},
+                ]},
+            ],
+        }
+
+        result = model.normalize_response(response, audio_start_seconds=3.0, audio_end_seconds=4.0)
+
+        words = result.segments[0].words
+        self.assertEqual([word.text for word in words], ["Hello", "there."])
+        self.assertEqual(words[1].start_seconds, 3.5)
+        # Segments are frozen, their words too
+        self.assertIsInstance(words, tuple)
+        hash(result.segments[0])
+
+    def test_deepgram_utterance_words_are_normalized(self):
+        model = object.__new__(DeepgramSTTModel)
+        alternative = SimpleNamespace(transcript="First.")
+        response = SimpleNamespace(
+            results=SimpleNamespace(
+                channels=[SimpleNamespace(alternatives=[alternative])],
+                utterances=[SimpleNamespace(start=0.0, end=1.0, transcript="First.", words=[
+                    SimpleNamespace(word="first", punctuated_word="First.", start=0.1, end=0.9),
+                ])],
+            )
+        )
+
+        result = model.normalize_response(response, audio_start_seconds=2.0, audio_end_seconds=3.0)
+
+        self.assertEqual(result.segments[0].words[0].text, "First.")
+        self.assertEqual(result.segments[0].words[0].end_seconds, 2.9)
+
 
 if __name__ == "__main__":
     unittest.main()
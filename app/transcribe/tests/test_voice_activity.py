@@ -0,0 +1,130 @@
+"""Tests for voice activity gating of live transcription audio."""
+
+import unittest
+
+import numpy as np
+
+from app.transcribe.voice_activity import (
+    EnergyVoiceActivityDetector,
+    VoiceActivityGate,
+    create_voice_activity_gate,
+)
+
+
+SAMPLE_RATE = 16000
+
+
+def _tone(seconds, amplitude=8000, frequency=220):
+    samples = np.arange(int(SAMPLE_RATE * seconds))
+    return (amplitude * np.sin(2 * np.pi * frequency * samples / SAMPLE_RATE)).astype("<i2").tobytes()
+
+
+def _silence(seconds):
+    return b"\x00\x00" * int(SAMPLE_RATE * seconds)
+
+
+def _hiss(seconds, amplitude=3000):
+    rng = np.random.default_rng(0)
+    return rng.integers(-amplitude, amplitude, int(SAMPLE_RATE * seconds)).astype("<i2").tobytes()
+
+
+class TestEnergyVoiceActivityDetector(unittest.TestCase):
+    def test_tone_is_speech_and_silence_is_not(self):
+        detector = EnergyVoiceActivityDetector()
+
+        speech = detector.speech_frames(_silence(0.3) + _tone(0.3), SAMPLE_RATE, 2, 1)
+
+        self.assertEqual(len(speech), 20)
+        self.assertFalse(speech[:10].any())
+        self.assertTrue(speech[10:].all())
+
+    def test_broadband_noise_is_not_speech(self):
+        detector = EnergyVoiceActivityDetector()
+
+        self.assertFalse(detector.speech_frames(_hiss(0.3), SAMPLE_RATE, 2, 1).any())
+
+    def test_noise_floor_follows_quiet_frames_only(self):
+        detector = EnergyVoiceActivityDetector()
+        detector.speech_frames(_hiss(0.3, amplitude=200), SAMPLE_RATE, 2, 1)
+        noise_floor = detector.noise_floor
+        self.assertGreater(noise_floor, 0)
+
+        # Loud high zero crossing frames, such as fricatives, do not raise the floor
+        detector.speech_frames(_hiss(0.3), SAMPLE_RATE, 2, 1)
+        self.assertLessEqual(detector.noise_floor, noise_floor)
+
+    def test_classification_without_adapting(self):
+        detector = EnergyVoiceActivityDetector()
+
+        detector.speech_frames(_hiss(0.3, amplitude=200), SAMPLE_RATE, 2, 1, adapt=False)
+
+        self.assertEqual(detector.noise_floor, 0.0)
+
+    def test_stereo_input_is_downmixed(self):
+        mono = np.frombuffer(_tone(0.09), dtype="<i2")
+        stereo = np.repeat(mono, 2).tobytes()
+
+        self.assertTrue(EnergyVoiceActivityDetector().speech_frames(stereo, SAMPLE_RATE, 2, 2).all())
+
+
+class TestVoiceActivityGate(unittest.TestCase):
+    def setUp(self):
+        self.gate = VoiceActivityGate(EnergyVoiceActivityDetector, hangover_seconds=0.5,
+                                      padding_seconds=0.06)
+
+    def test_silent_chunks_are_dropped_after_hangover(self):
+        accepted = [
+            self.gate.accept_chunk("You", chunk, SAMPLE_RATE, 2, 1)
+            for chunk in (_silence(0.3), _tone(0.3), _silence(0.3), _silence(0.3), _silence(0.3))
+        ]
+
+        self.assertEqual(accepted, [False, True, True, True, False])
+        metrics = self.gate.get_metrics()["You"]
+        self.assertEqual(metrics.chunks_dropped, 2)
+        self.assertAlmostEqual(metrics.seconds_dropped, 0.6)
+        self.assertEqual(metrics.frames_processed, 50)
+        self.assertEqual(metrics.speech_frames, 10)
+
+    def test_hangover_is_per_source(self):
+        self.gate.accept_chunk("You", _tone(0.3), SAMPLE_RATE, 2, 1)
+
+        self.assertFalse(self.gate.accept_chunk("Speaker", _silence(0.3), SAMPLE_RATE, 2, 1))
+        self.assertTrue(self.gate.accept_chunk("You", _silence(0.3), SAMPLE_RATE, 2, 1))
+
+    def test_window_is_trimmed_to_speech_with_padding(self):
+        window = _silence(0.9) + _tone(0.3) + _silence(0.9)
+
+        start, end = self.gate.speech_bounds("You", window, SAMPLE_RATE, 2, 1)
+
+        self.assertEqual(start, int(0.84 * SAMPLE_RATE) * 2)
+        self.assertEqual(end, int(1.26 * SAMPLE_RATE) * 2)
+        self.assertAlmostEqual(self.gate.get_metrics()["You"].seconds_trimmed, 1.68)
+
+    def test_window_without_speech_has_no_bounds(self):
+        self.assertIsNone(self.gate.speech_bounds("You", _silence(0.9), SAMPLE_RATE, 2, 1))
+        self.assertEqual(self.gate.get_metrics()["You"].windows_skipped, 1)
+
+    def test_window_bounds_do_not_adapt_detector(self):
+        self.gate.speech_bounds("You", _hiss(0.9, amplitude=200), SAMPLE_RATE, 2, 1)
+
+        detector, _ = self.gate._state("You")
+        self.assertEqual(detector.noise_floor, 0.0)
+
+
+class TestCreateVoiceActivityGate(unittest.TestCase):
+    def test_disabled_by_default(self):
+        self.assertIsNone(create_voice_activity_gate({"General": {}}))
+
+    def test_unavailable_detector_falls_back_to_energy(self):
+        gate = create_voice_activity_gate({"General": {"voice_activity_detection": "webrtc"}})
+
+        self.assertIsInstance(gate, VoiceActivityGate)
+        self.assertFalse(gate.accept_chunk("You", _silence(0.9), SAMPLE_RATE, 2, 1))
+
+    def test_unknown_detector_is_rejected(self):
+        with self.assertRaises(ValueError):
+            create_voice_activity_gate({"General": {"voice_activity_detection": "magic"}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""Tests for batched decoding of live windows with local Whisper."""
+
+import threading
+import unittest
+
+import numpy as np
+
+from sdk.transcriber_models import WhisperSTTModel
+from sdk.whisper_batching import WhisperBatchScheduler, _segments_from_tokens
+
+
+class FakeTokenizer:
+    timestamp_begin = 1000
+
+    def decode(self, tokens):
+        return " ".join(f"t{token}" for token in tokens)
+
+
+class RecordingBatch:
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, audios, language):
+        self.batches.append((len(audios), language))
+        return [{"text": f"{language}:{len(audio)}", "segments": []} for audio in audios]
+
+
+def _transcribe_concurrently(scheduler, requests):
+    results = [None] * len(requests)
+
+    def run(index, audio, language):
+        results[index] = scheduler.transcribe(audio, language)
+
+    threads = [threading.Thread(target=run, args=(index, audio, language))
+               for index, (audio, language) in enumerate(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    return results
+
+
+class TestWhisperBatchScheduler(unittest.TestCase):
+    def test_concurrent_windows_are_decoded_in_one_batch(self):
+        run_batch = RecordingBatch()
+        scheduler = WhisperBatchScheduler(run_batch, max_batch_size=2, max_wait_seconds=2)
+
+        results = _transcribe_concurrently(scheduler, [(np.zeros(10), "en"), (np.zeros(20), "en")])
+
+        self.assertEqual(run_batch.batches, [(2, "en")])
+        self.assertEqual(sorted(result["text"] for result in results), ["en:10", "en:20"])
+
+    def test_windows_are_batched_by_language(self):
+        run_batch = RecordingBatch()
+        scheduler = WhisperBatchScheduler(run_batch, max_batch_size=2, max_wait_seconds=2)
+
+        results = _transcribe_concurrently(scheduler, [(np.zeros(10), "en"), (np.zeros(20), "fr")])
+
+        self.assertEqual(sorted(run_batch.batches), [(1, "en"), (1, "fr")])
+        self.assertEqual(results[1]["text"], "fr:20")
+
+    def test_lone_window_is_decoded_after_wait(self):
+        run_batch = RecordingBatch()
+        scheduler = WhisperBatchScheduler(run_batch, max_batch_size=4, max_wait_seconds=0.01)
+
+        self.assertEqual(scheduler.transcribe(np.zeros(5), "en")["text"], "en:5")
+
+    def test_errors_are_raised_to_each_caller(self):
+        def fail(audios, language):
+            raise RuntimeError("decode failed")
+
+        scheduler = WhisperBatchScheduler(fail, max_wait_seconds=0)
+
+        with self.assertRaises(RuntimeError):
+            scheduler.transcribe(np.zeros(5), "en")
+
+
+class TestWhisperBatchSegments(unittest.TestCase):
+    def test_timestamp_tokens_delimit_segments(self):
+        tokens = [1000, 1, 2, 1050, 1050, 3, 1100]
+
+        segments = _segments_from_tokens(FakeTokenizer(), tokens, duration_seconds=3)
+
+        self.assertEqual(segments, [
+            {"id": 0, "start": 0.0, "end": 1.0, "text": "t1 t2"},
+            {"id": 1, "start": 1.0, "end": 2.0, "text": "t3"},
+        ])
+
+    def test_unterminated_segment_ends_with_audio(self):
+        segments = _segments_from_tokens(FakeTokenizer(), [1000, 5], duration_seconds=2.5)
+
+        self.assertEqual(segments[0]["end"], 2.5)
+
+
+class TestWhisperSTTModelBatching(unittest.TestCase):
+    def test_short_windows_go_through_scheduler(self):
+        requests = []
+
+        class FakeScheduler:
+            def transcribe(self, audio, language):
+                requests.append((len(audio), language))
+                return {"text": "batched", "segments": []}
+
+        model = object.__new__(WhisperSTTModel)
+        model.lang = "en"
+        model.batch_scheduler = FakeScheduler()
+
+        result = model.get_transcription_from_pcm(memoryview(b"\x00\x00" * 1600), 16000, 2, 1)
+
+        self.assertEqual(result["text"], "batched")
+        self.assertEqual(requests, [(1600, "en")])
+
+
+if __name__ == "__main__":
+    unittest.main()
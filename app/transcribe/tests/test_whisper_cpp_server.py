@@ -0,0 +1,151 @@
+"""Tests for the persistent whisper.cpp server worker."""
+
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sdk.transcriber_models import WhisperCPPSTTModel
+from sdk.whisper_cpp_server import WhisperCppServer, to_transcription_json
+
+
+class _InferenceHandler(BaseHTTPRequestHandler):
+    def do_POST(self):  # pylint: disable=invalid-name
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append((self.path, body))
+        payload = json.dumps(
+            {"text": " Hello.", "segments": [{"id": 0, "start": 0.0, "end": 1.25, "text": " Hello."}]}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class FakeServerProcess:
+    """Local stand-in for the whisper.cpp server binary."""
+
+    instances = []
+
+    def __init__(self, args, stdout=None, stderr=None):
+        del stdout, stderr
+        self.args = args
+        self.returncode = None
+        port = int(args[args.index("--port") + 1])
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _InferenceHandler)
+        self.httpd.requests = []
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        FakeServerProcess.instances.append(self)
+
+    def stop_serving(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+    def crash(self):
+        self.stop_serving()
+        self.returncode = -11
+
+    def poll(self):
+        return self.returncode
+
+    def terminate(self):
+        self.stop_serving()
+        if self.returncode is None:
+            self.returncode = 0
+
+    kill = terminate
+
+    def wait(self, timeout=None):
+        del timeout
+        return self.returncode
+
+
+class TestWhisperCppServer(unittest.TestCase):
+    def setUp(self):
+        FakeServerProcess.instances = []
+        self.server = WhisperCppServer(
+            binary_path="whisper-server",
+            model_filename="ggml-base.bin",
+            startup_timeout_seconds=5,
+            request_timeout_seconds=5,
+            process_factory=FakeServerProcess,
+        )
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_model_is_loaded_once_for_many_requests(self):
+        first = self.server.transcribe(b"RIFF1", language="en")
+        second = self.server.transcribe(b"RIFF2", language="en")
+
+        self.assertEqual(len(FakeServerProcess.instances), 1)
+        self.assertIn("ggml-base.bin", FakeServerProcess.instances[0].args)
+        self.assertEqual(first, second)
+        self.assertEqual(first["transcription"][0]["offsets"], {"from": 0, "to": 1250})
+        path, body = FakeServerProcess.instances[0].httpd.requests[-1]
+        self.assertEqual(path, "/inference")
+        self.assertIn(b"RIFF2", body)
+        self.assertIn(b'name="language"\r\n\r\nen', body)
+
+    def test_server_is_restarted_after_crash(self):
+        self.server.transcribe(b"RIFF1", language="en")
+        FakeServerProcess.instances[0].crash()
+
+        response = self.server.transcribe(b"RIFF2", language="en")
+
+        self.assertEqual(response["transcription"][0]["text"], " Hello.")
+        self.assertEqual(len(FakeServerProcess.instances), 2)
+        self.assertEqual(self.server.restarts, 1)
+
+    def test_unresponsive_server_is_restarted(self):
+        self.server.transcribe(b"RIFF1", language="en")
+        FakeServerProcess.instances[0].stop_serving()
+
+        response = self.server.transcribe(b"RIFF2", language="en")
+
+        self.assertEqual(response["transcription"][0]["text"], " Hello.")
+        self.assertEqual(self.server.restarts, 1)
+
+    def test_server_is_restarted_once_for_concurrent_failures(self):
+        self.server.transcribe(b"RIFF1", language="en")
+        restarts_seen = self.server.restarts
+
+        # The first failing lane restarts the server, the other one reuses it
+        self.server.restart(restarts_seen=restarts_seen)
+        self.server.restart(restarts_seen=restarts_seen)
+
+        self.assertEqual(self.server.restarts, 1)
+        self.assertEqual(len(FakeServerProcess.instances), 2)
+
+    def test_text_only_response_is_converted_to_single_segment(self):
+        response = to_transcription_json({"text": "Hi", "duration": 2.5})
+
+        self.assertEqual(response["transcription"], [{"offsets": {"from": 0, "to": 2500}, "text": "Hi"}])
+
+    def test_model_sends_in_memory_audio_to_server(self):
+        requests = []
+
+        class FakeServer:
+            def transcribe(self, wav_data, language):
+                requests.append((wav_data, language))
+                return {"transcription": [{"offsets": {"from": 0, "to": 100}, "text": " Hi"}]}
+
+        model = object.__new__(WhisperCPPSTTModel)
+        model.lang = "en"
+        model.server = FakeServer()
+
+        response = model.get_transcription_from_pcm(memoryview(b"\x00\x00"), 16000, 2, 1)
+
+        self.assertEqual(model.process_response(response), " Hi")
+        self.assertTrue(requests[0][0].startswith(b"RIFF"))
+        self.assertEqual(requests[0][1], "en")
+
+
+if __name__ == "__main__":
+    unittest.main()
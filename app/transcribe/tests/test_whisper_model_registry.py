@@ -0,0 +1,88 @@
+"""Tests for the shared local Whisper model registry."""
+
+import threading
+import unittest
+from unittest import mock
+
+from sdk import transcriber_models as tm
+from sdk.whisper_model_registry import WhisperModelRegistry
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, model_filename, device=None):
+        self.release.wait(timeout=5)
+        self.calls.append((model_filename, device))
+        return object()
+
+
+class TestWhisperModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.loader = CountingLoader()
+        self.registry = WhisperModelRegistry(loader=self.loader)
+
+    def test_model_is_loaded_once_per_file_and_device(self):
+        first = self.registry.get("models/base.pt", "cpu")
+        second = self.registry.get("models/base.pt", "cpu")
+        other_device = self.registry.get("models/base.pt", "cuda")
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other_device)
+        self.assertEqual([device for _, device in self.loader.calls], ["cpu", "cuda"])
+
+    def test_concurrent_requests_wait_for_a_single_load(self):
+        self.loader.release.clear()
+        preload = self.registry.preload("models/base.pt", "cpu")
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(self.registry.get("models/base.pt", "cpu")))
+        waiter.start()
+
+        self.loader.release.set()
+        preload.join(timeout=5)
+        waiter.join(timeout=5)
+
+        self.assertEqual(len(self.loader.calls), 1)
+        self.assertIs(results[0], self.registry.get("models/base.pt", "cpu"))
+        self.assertTrue(self.registry.is_loaded("models/base.pt", "cpu"))
+
+
+class TestWhisperSTTModelSharing(unittest.TestCase):
+    def setUp(self):
+        self.loader = CountingLoader()
+        self.registry = WhisperModelRegistry(loader=self.loader)
+        patcher = mock.patch.object(tm, "whisper_model_registry", self.registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        download = mock.patch.object(tm.WhisperSTTModel, "download_model")
+        download.start()
+        self.addCleanup(download.stop)
+        self.config = {"local_transcripton_model_file": "base", "audio_lang": "en",
+                       "api_key": "", "device": "cpu"}
+
+    def test_models_share_checkpoint_and_language_change_does_not_reload(self):
+        live = tm.WhisperSTTModel(self.config)
+        batch = tm.WhisperSTTModel(self.config)
+
+        live.set_lang("fr")
+
+        self.assertIs(live.audio_model, batch.audio_model)
+        self.assertEqual(live.lang, "fr")
+        self.assertEqual(len(self.loader.calls), 1)
+
+    def test_preload_does_not_block_construction(self):
+        self.loader.release.clear()
+
+        model = tm.WhisperSTTModel(dict(self.config, preload=True))
+
+        self.assertEqual(self.loader.calls, [])
+        self.loader.release.set()
+        self.assertIsNotNone(model.audio_model)
+        self.assertEqual(len(self.loader.calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -50,6 +50,12 @@ Methods:
     add_text_to_bottom(self, input_text: str)
         Add text to the bottom of the Text widget.
 
+    upsert_keyed_row(self, row_key: str, input_text: str)
+        Insert or replace the row with the given key.
+
+    set_row_source(self, row_source, page_rows: int)
+        Set the source of older rows, paged in when the view reaches the top.
+
     delete_row_starting_with(self, start_text: str)
         Delete the row that starts with the given text.
 
@@ -63,9 +69,110 @@ Methods:
         Get the text of the last 3 rows.
 """
 
-from tkinter import Text, Scrollbar, END, Menu, TclError
+from __future__ import annotations
+
+from collections import OrderedDict
+import itertools
+import re
+from tkinter import IntVar, Text, Scrollbar, END, Menu, TclError
 import customtkinter as ctk
 
+# Rows added from the row source each time the view reaches the top
+DEFAULT_PAGE_ROWS = 200
+ROW_TAG_PREFIX = "transcript-row-"
+
+
+class KeyedRowWindow:
+    """Keyed rows of a SelectableText, top to bottom, with the tag of each row.
+
+    Rows are kept in an ordered dict, so rows are added at either end, renamed
+    and removed in constant time. When max_rows is set, rows beyond it are
+    dropped from the top, the caller deletes their text.
+    """
+
+    def __init__(self, max_rows: int = 0):
+        self.max_rows = max_rows
+        # Slot -> (row key, tag), top to bottom. A renamed row keeps its slot
+        self._rows: OrderedDict[int, tuple[str, str]] = OrderedDict()
+        self._slots: dict[str, int] = {}
+        self._next_slot = itertools.count()
+        # Rows before the first row may exist in the row source
+        self.has_older_rows = False
+
+    def __contains__(self, row_key: str) -> bool:
+        return row_key in self._slots
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def keys(self) -> list[str]:
+        return [row_key for row_key, _ in self._rows.values()]
+
+    def tag(self, row_key: str) -> str | None:
+        """Tag of the row, None when the row is not in the window."""
+        slot = self._slots.get(row_key)
+        return self._rows[slot][1] if slot is not None else None
+
+    def first(self, predicate=None) -> str | None:
+        """Key of the top row, or of the top row matching predicate(row_key)."""
+        for row_key, _ in self._rows.values():
+            if predicate is None or predicate(row_key):
+                return row_key
+        return None
+
+    def append(self, row_key: str) -> str:
+        """Add a row at the bottom. Returns its tag."""
+        return self._add(row_key)
+
+    def prepend(self, row_keys: list[str]) -> list[str]:
+        """Add rows, oldest first, at the top. Returns their tags."""
+        tags = []
+        for row_key in reversed(row_keys):
+            tags.append(self._add(row_key))
+            self._rows.move_to_end(self._slots[row_key], last=False)
+        tags.reverse()
+        return tags
+
+    def rename(self, row_key: str, new_row_key: str) -> str:
+        """Give a row a new key in place. Returns the new tag."""
+        slot = self._slots.pop(row_key)
+        self._slots[new_row_key] = slot
+        tag = ROW_TAG_PREFIX + new_row_key
+        self._rows[slot] = (new_row_key, tag)
+        return tag
+
+    def remove(self, row_key: str) -> str | None:
+        """Remove a row. Returns its tag, None when the row is not in the window."""
+        slot = self._slots.pop(row_key, None)
+        if slot is None:
+            return None
+        return self._rows.pop(slot)[1]
+
+    def overflow(self) -> list[str]:
+        """Remove the rows beyond max_rows from the top. Returns their tags."""
+        tags = []
+        while self.max_rows > 0 and len(self._rows) > self.max_rows:
+            _, (row_key, tag) = self._rows.popitem(last=False)
+            del self._slots[row_key]
+            tags.append(tag)
+            self.has_older_rows = True
+        return tags
+
+    def clear(self) -> list[str]:
+        """Remove all rows. Returns their tags."""
+        tags = [tag for _, tag in self._rows.values()]
+        self._rows.clear()
+        self._slots.clear()
+        self.has_older_rows = False
+        return tags
+
+    def _add(self, row_key: str) -> str:
+        slot = next(self._next_slot)
+        tag = ROW_TAG_PREFIX + row_key
+        self._slots[row_key] = slot
+        self._rows[slot] = (row_key, tag)
+        return tag
+
 
 class SelectableText(ctk.CTkFrame):
     """Custom TKinter Component to display multiple lines of text
@@ -74,14 +181,19 @@ class SelectableText(ctk.CTkFrame):
 
     context_menu = None
 
-    def __init__(self, master=None, **kwargs):
+    def __init__(self, master=None, max_rows: int = 0, **kwargs):
         super().__init__(master, **kwargs)
 
         self.text_widget = Text(self, wrap="word", undo=True, width=40,
                                 background='#252422', font=("Arial", 20),
                                 foreground='#639cdc')
         self.scrollbar = Scrollbar(self, command=self.text_widget.yview)
-        self.text_widget.config(yscrollcommand=self.scrollbar.set)
+        self.text_widget.config(yscrollcommand=self.on_y_scroll)
+        # Keyed rows in the widget, older rows are paged in from row_source
+        self.rows = KeyedRowWindow(max_rows)
+        self.row_source = None
+        self.page_rows = DEFAULT_PAGE_ROWS
+        self.is_source_row = None
 
         self.text_widget.pack(side="left", fill="both", expand=True)
         self.scrollbar.pack(side="right", fill="y")
@@ -132,12 +244,22 @@ class SelectableText(ctk.CTkFrame):
         """
         self.on_text_click_cb = onTextClick
 
+    def on_y_scroll(self, first, last):
+        """Update the scrollbar and load older rows when the view reaches the top."""
+        self.scrollbar.set(first, last)
+        if float(first) <= 0.0 and float(last) < 1.0:
+            self.load_older_rows()
+
     def clear_all_text(self):
         """Clear all text from the component
         """
         self.text_widget.configure(state="normal")
         self.text_widget.delete("1.0", END)
         self.text_widget.configure(state="disabled")
+        for tag in self.rows.clear():
+            self.text_widget.tag_delete(tag)
+        # Rows added next may follow rows of the row source
+        self.rows.has_older_rows = self.row_source is not None
 
     def on_text_click(self, event):
         """Handle the click event on the Text widget."""
@@ -196,52 +318,140 @@ class SelectableText(ctk.CTkFrame):
         self.text_widget.insert(END, input_text + "\n")
         self.text_widget.configure(state="disabled")
 
-    @staticmethod
-    def _row_tag(row_key: str) -> str:
-        return f"transcript-row-{row_key}"
+    def set_row_source(self, row_source, page_rows: int = DEFAULT_PAGE_ROWS, is_source_row=None):
+        """Set the source of the keyed rows dropped from the top of the widget.
+        row_source(before_row_key, count) returns up to count (row key, text) rows
+        before the given row, oldest first. is_source_row(row_key) tells rows of
+        the source from other keyed rows, such as provider partials.
+        """
+        self.row_source = row_source
+        self.page_rows = page_rows
+        self.is_source_row = is_source_row
+        self.rows.has_older_rows = True
+
+    def load_older_rows(self):
+        """Add a page of the rows before the first row of the row source."""
+        if self.row_source is None or not self.rows.has_older_rows:
+            return
+        first_row_key = self.rows.first(self.is_source_row)
+        if first_row_key is None:
+            return
+        rows = self.row_source(first_row_key, self.page_rows)
+        self.rows.has_older_rows = len(rows) >= self.page_rows
+        if rows:
+            self.prepend_keyed_rows(rows)
 
     def upsert_keyed_row(self, row_key: str, input_text: str):
         """Insert or replace a transcript row without depending on its position."""
-        tag = self._row_tag(row_key)
+        tag = self.rows.tag(row_key)
         self.text_widget.configure(state="normal")
-        ranges = self.text_widget.tag_ranges(tag)
-        if ranges:
-            start, end = ranges[0], ranges[1]
-            self.text_widget.delete(start, end)
-            self.text_widget.insert(start, input_text + "\n", tag)
+        if tag is None:
+            self.text_widget.insert(END, input_text + "\n", self.rows.append(row_key))
+            self._drop_overflow_rows()
         else:
-            start = self.text_widget.index(END)
-            self.text_widget.insert(END, input_text + "\n", tag)
+            self._replace_row(tag, input_text, tag)
         self.text_widget.configure(state="disabled")
         self.scroll_to_bottom()
 
-    def finalize_keyed_row(self, row_key: str, input_text: str):
-        """Replace a transient row with final text and remove its provider tag."""
-        tag = self._row_tag(row_key)
+    def update_keyed_row(self, row_key: str, input_text: str) -> bool:
+        """Replace the text of a keyed row in the widget.
+        Returns False when the row is not in the widget.
+        """
+        tag = self.rows.tag(row_key)
+        if tag is None:
+            return False
         self.text_widget.configure(state="normal")
-        ranges = self.text_widget.tag_ranges(tag)
-        if ranges:
-            start, end = ranges[0], ranges[1]
-            self.text_widget.delete(start, end)
-            self.text_widget.insert(start, input_text + "\n")
+        self._replace_row(tag, input_text, tag)
+        self.text_widget.configure(state="disabled")
+        return True
+
+    def finalize_keyed_row(self, row_key: str, input_text: str, new_row_key: str = None):
+        """Replace a transient row with final text and remove its provider tag.
+        The final row is tagged with new_row_key when given.
+        """
+        tag = self.rows.tag(row_key)
+        self.text_widget.configure(state="normal")
+        if tag is not None:
+            if new_row_key:
+                new_tag = self.rows.rename(row_key, new_row_key)
+            else:
+                new_tag = None
+                self.rows.remove(row_key)
+            self._replace_row(tag, input_text, new_tag)
+            self.text_widget.tag_delete(tag)
         else:
-            self.text_widget.insert(END, input_text + "\n")
+            new_tag = self.rows.append(new_row_key) if new_row_key else ()
+            self.text_widget.insert(END, input_text + "\n", new_tag)
+            self._drop_overflow_rows()
         self.text_widget.configure(state="disabled")
         self.scroll_to_bottom()
 
-    def delete_row_starting_with(self, start_text: str):
-        """Delete the row that starts with the given text."""
+    def append_keyed_rows(self, rows: list):
+        """Add (row key, text) rows to the bottom of the Text widget."""
+        chunks = []
+        for row_key, input_text in rows:
+            if row_key not in self.rows:
+                chunks += [input_text + "\n", self.rows.append(row_key)]
+        if not chunks:
+            return
         self.text_widget.configure(state="normal")
-        last_line_index = int(self.text_widget.index('end-1c').split('.', maxsplit=1)[0])
-
-        for line_number in range(last_line_index, 0, -1):
-            line_start = f"{line_number}.0"
-            line_end = f"{line_number}.end"
-            line_text = self.text_widget.get(line_start, line_end).strip()
-            if line_text.startswith(start_text):
-                self.text_widget.delete(line_start, f"{line_number + 1}.0")
-                break
+        self.text_widget.insert(END, *chunks)
+        self._drop_overflow_rows()
+        self.text_widget.configure(state="disabled")
+
+    def prepend_keyed_rows(self, rows: list):
+        """Add (row key, text) rows to the top of the Text widget
+        without moving the text in view.
+        """
+        rows = [(row_key, input_text) for row_key, input_text in rows if row_key not in self.rows]
+        if not rows:
+            return
+        chunks = []
+        for tag, (_, input_text) in zip(self.rows.prepend([row_key for row_key, _ in rows]), rows):
+            chunks += [input_text + "\n", tag]
+        self.text_widget.mark_set("view-anchor", "@0,0")
+        self.text_widget.mark_gravity("view-anchor", "right")
+        self.text_widget.configure(state="normal")
+        self.text_widget.insert("1.0", *chunks)
+        self.text_widget.configure(state="disabled")
+        self.text_widget.yview("view-anchor")
+
+    def delete_keyed_row(self, row_key: str):
+        """Delete a keyed row."""
+        tag = self.rows.remove(row_key)
+        if tag is None:
+            return
+        self.text_widget.configure(state="normal")
+        self._delete_row(tag)
+        self.text_widget.configure(state="disabled")
 
+    def _replace_row(self, tag: str, input_text: str, new_tag):
+        ranges = self.text_widget.tag_ranges(tag)
+        if not ranges:
+            self.text_widget.insert(END, input_text + "\n", new_tag or ())
+            return
+        start = ranges[0]
+        self.text_widget.delete(start, ranges[-1])
+        self.text_widget.insert(start, input_text + "\n", new_tag or ())
+
+    def _delete_row(self, tag: str):
+        ranges = self.text_widget.tag_ranges(tag)
+        if ranges:
+            self.text_widget.delete(ranges[0], ranges[-1])
+        self.text_widget.tag_delete(tag)
+
+    def _drop_overflow_rows(self):
+        for tag in self.rows.overflow():
+            self._delete_row(tag)
+
+    def delete_row_starting_with(self, start_text: str):
+        """Delete the last row that starts with the given text."""
+        self.text_widget.configure(state="normal")
+        # Tk searches the lines from the bottom, leading blanks are ignored
+        line_start = self.text_widget.search(f"^[ \t]*{re.escape(start_text)}", END,
+                                             stopindex="1.0", backwards=True, regexp=True)
+        if line_start:
+            self.text_widget.delete(line_start, f"{line_start} +1 lines linestart")
         self.text_widget.configure(state="disabled")
 
     def replace_multiple_newlines(self):
@@ -249,13 +459,15 @@ class SelectableText(ctk.CTkFrame):
         with a single newline character.
         """
         self.text_widget.configure(state="normal")
+        count = IntVar(self)
         current_index = "1.0"
         while True:
-            current_index = self.text_widget.search("\n\n\n", current_index, END)
+            current_index = self.text_widget.search("\n{3,}", current_index, END,
+                                                    regexp=True, count=count)
             if not current_index:
                 break
-            next_index = self.text_widget.index(f"{current_index} + 1c")
-            self.text_widget.delete(current_index, next_index)
+            # Keep two newlines of each run
+            self.text_widget.delete(f"{current_index} + 2c", f"{current_index} + {count.get()}c")
         self.text_widget.configure(state="disabled")
 
     def delete_last_2_row(self):
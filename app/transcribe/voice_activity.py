@@ -0,0 +1,258 @@
+"""Voice activity gating for audio sent to file/window STT models."""
+
+from __future__ import annotations
+
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from sdk.streaming_transcriber_models import PCM16MonoResampler
+
+
+DEFAULT_VOICE_ACTIVITY_DETECTION = "none"
+DEFAULT_ENERGY_THRESHOLD = 300
+DEFAULT_HANGOVER_SECONDS = 0.5
+DEFAULT_PADDING_SECONDS = 0.2
+DEFAULT_FRAME_SECONDS = 0.03
+# Hiss and broadband noise cross zero far more often than voiced speech
+DEFAULT_MAX_ZERO_CROSSING_RATE = 0.35
+# A frame is speech when it is this much louder than the tracked noise floor
+NOISE_FLOOR_RATIO = 3.0
+VAD_SAMPLE_RATE = 16000
+
+
+@dataclass
+class VoiceActivityMetrics:
+    """Counters describing how much audio of a single source was kept from STT."""
+    frames_processed: int = 0
+    speech_frames: int = 0
+    chunks_dropped: int = 0
+    seconds_dropped: float = 0.0
+    # Transcription windows that contained no speech and were not transcribed
+    windows_skipped: int = 0
+    # Leading and trailing silence removed from transcription windows
+    seconds_trimmed: float = 0.0
+
+
+class VoiceActivityDetector(ABC):
+    """Classify fixed length frames of PCM audio as speech or non speech."""
+
+    frame_seconds: float = DEFAULT_FRAME_SECONDS
+
+    @abstractmethod
+    def speech_frames(self, pcm, sample_rate: int, sample_width: int, channels: int,
+                      adapt: bool = True) -> np.ndarray:
+        """Return one bool per complete frame of ``pcm``. True means the frame contains speech.
+        Adaptive state, such as a noise floor, is only updated when ``adapt`` is True."""
+
+
+def _mono_samples(pcm, sample_rate: int, sample_width: int, channels: int,
+                  target_rate: int | None = None) -> np.ndarray:
+    converter = PCM16MonoResampler(sample_rate, sample_width, channels,
+                                   target_rate=target_rate or sample_rate)
+    return np.frombuffer(converter.convert(pcm), dtype="<i2")
+
+
+def _frames(samples: np.ndarray, frame_size: int) -> np.ndarray:
+    count = len(samples) // frame_size
+    return samples[:count * frame_size].reshape(count, frame_size)
+
+
+class EnergyVoiceActivityDetector(VoiceActivityDetector):
+    """Frame energy and zero crossing rate detector with an adaptive noise floor."""
+
+    def __init__(self, energy_threshold: float = DEFAULT_ENERGY_THRESHOLD,
+                 max_zero_crossing_rate: float = DEFAULT_MAX_ZERO_CROSSING_RATE,
+                 frame_seconds: float = DEFAULT_FRAME_SECONDS):
+        self.energy_threshold = float(energy_threshold)
+        self.max_zero_crossing_rate = float(max_zero_crossing_rate)
+        self.frame_seconds = float(frame_seconds)
+        self.noise_floor = 0.0
+
+    def speech_frames(self, pcm, sample_rate, sample_width, channels, adapt=True):
+        frame_size = max(int(sample_rate * self.frame_seconds), 1)
+        frames = _frames(_mono_samples(pcm, sample_rate, sample_width, channels), frame_size)
+        if len(frames) == 0:
+            return np.zeros(0, dtype=bool)
+        samples = frames.astype(np.float32)
+        rms = np.sqrt(np.mean(samples * samples, axis=1))
+        signs = np.signbit(frames)
+        zero_crossing_rate = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frame_size
+        threshold = max(self.energy_threshold, self.noise_floor * NOISE_FLOOR_RATIO)
+        loud = rms >= threshold
+        speech = loud & (zero_crossing_rate <= self.max_zero_crossing_rate)
+        # Loud frames rejected for their zero crossing rate may be fricatives, only
+        # quiet frames follow the noise floor
+        if adapt and not loud.all():
+            noise = float(np.median(rms[~loud]))
+            self.noise_floor = noise if self.noise_floor == 0 else 0.9 * self.noise_floor + 0.1 * noise
+        return speech
+
+
+class WebRtcVoiceActivityDetector(VoiceActivityDetector):
+    """Detector backed by the optional ``webrtcvad`` package."""
+
+    def __init__(self, aggressiveness: int = 2, frame_seconds: float = DEFAULT_FRAME_SECONDS):
+        import webrtcvad  # pylint: disable=import-outside-toplevel
+
+        self._vad = webrtcvad.Vad(int(aggressiveness))
+        # webrtcvad accepts 10, 20 or 30 ms frames
+        self.frame_seconds = frame_seconds if frame_seconds in (0.01, 0.02, 0.03) else DEFAULT_FRAME_SECONDS
+
+    def speech_frames(self, pcm, sample_rate, sample_width, channels, adapt=True):
+        frames = _frames(_mono_samples(pcm, sample_rate, sample_width, channels, VAD_SAMPLE_RATE),
+                         int(VAD_SAMPLE_RATE * self.frame_seconds))
+        return np.array([self._vad.is_speech(frame.tobytes(), VAD_SAMPLE_RATE) for frame in frames],
+                        dtype=bool)
+
+
+class SileroVoiceActivityDetector(VoiceActivityDetector):
+    """Detector backed by the optional ``silero-vad`` package."""
+
+    # Silero expects 512 sample frames at 16 kHz
+    frame_seconds = 512 / VAD_SAMPLE_RATE
+
+    def __init__(self, threshold: float = 0.5):
+        import torch  # pylint: disable=import-outside-toplevel
+        from silero_vad import load_silero_vad  # pylint: disable=import-outside-toplevel
+
+        self._torch = torch
+        self._model = load_silero_vad()
+        self.threshold = float(threshold)
+
+    def speech_frames(self, pcm, sample_rate, sample_width, channels, adapt=True):
+        frames = _frames(_mono_samples(pcm, sample_rate, sample_width, channels, VAD_SAMPLE_RATE), 512)
+        self._model.reset_states()
+        speech = np.zeros(len(frames), dtype=bool)
+        with self._torch.no_grad():
+            for index, frame in enumerate(frames):
+                audio = self._torch.from_numpy(frame.astype(np.float32) / 32768.0)
+                speech[index] = self._model(audio, VAD_SAMPLE_RATE).item() >= self.threshold
+        return speech
+
+
+class VoiceActivityGate:
+    """Drop audio chunks without speech and trim silence around transcription windows.
+
+    A detector is created for each audio source, so adaptive state such as the
+    noise floor of the microphone is not mixed with that of the speaker.
+    """
+
+    def __init__(self, detector_factory, hangover_seconds: float = DEFAULT_HANGOVER_SECONDS,
+                 padding_seconds: float = DEFAULT_PADDING_SECONDS):
+        self._detector_factory = detector_factory
+        self.hangover_seconds = max(float(hangover_seconds), 0.0)
+        self.padding_seconds = max(float(padding_seconds), 0.0)
+        self._detectors = {}
+        self._metrics = {}
+        # Seconds of non speech audio accepted since the last speech for each source
+        self._silence_seconds = {}
+        self._lock = threading.Lock()
+
+    def _state(self, who_spoke: str):
+        with self._lock:
+            if who_spoke not in self._detectors:
+                self._detectors[who_spoke] = self._detector_factory()
+                self._metrics[who_spoke] = VoiceActivityMetrics()
+                self._silence_seconds[who_spoke] = self.hangover_seconds
+            return self._detectors[who_spoke], self._metrics[who_spoke]
+
+    def accept_chunk(self, who_spoke: str, data, sample_rate: int, sample_width: int,
+                     channels: int) -> bool:
+        """Return False when the chunk contains no speech and is past the hangover after speech."""
+        detector, metrics = self._state(who_spoke)
+        speech = detector.speech_frames(data, sample_rate, sample_width, channels)
+        bytes_per_second = sample_rate * sample_width * channels
+        chunk_seconds = len(data) / bytes_per_second if bytes_per_second else 0.0
+        metrics.frames_processed += len(speech)
+        metrics.speech_frames += int(np.count_nonzero(speech))
+        if len(speech) == 0:
+            # Too short to classify
+            return True
+        if speech.any():
+            self._silence_seconds[who_spoke] = (len(speech) - 1 - np.flatnonzero(speech)[-1]) \
+                * detector.frame_seconds
+            return True
+        if self._silence_seconds[who_spoke] < self.hangover_seconds:
+            self._silence_seconds[who_spoke] += chunk_seconds
+            return True
+        metrics.chunks_dropped += 1
+        metrics.seconds_dropped += chunk_seconds
+        return False
+
+    def speech_bounds(self, who_spoke: str, pcm, sample_rate: int, sample_width: int,
+                      channels: int) -> tuple[int, int] | None:
+        """Byte range of ``pcm`` that holds speech plus padding. None when there is no speech."""
+        detector, metrics = self._state(who_spoke)
+        # The audio of the window already adapted the detector in accept_chunk
+        speech = detector.speech_frames(pcm, sample_rate, sample_width, channels, adapt=False)
+        frame_size = sample_width * channels
+        if len(speech) == 0:
+            return 0, len(pcm)
+        speech_indexes = np.flatnonzero(speech)
+        if len(speech_indexes) == 0:
+            metrics.windows_skipped += 1
+            return None
+        frame_bytes = int(detector.frame_seconds * sample_rate) * frame_size
+        padding_bytes = int(self.padding_seconds * sample_rate) * frame_size
+        start = max(int(speech_indexes[0]) * frame_bytes - padding_bytes, 0)
+        end = min((int(speech_indexes[-1]) + 1) * frame_bytes + padding_bytes, len(pcm))
+        if speech_indexes[-1] == len(speech) - 1:
+            # Audio after the last complete frame was not classified
+            end = len(pcm)
+        bytes_per_second = sample_rate * frame_size
+        metrics.seconds_trimmed += (start + len(pcm) - end) / bytes_per_second
+        return start, end
+
+    def reset(self, who_spoke: str | None = None):
+        """Forget the hangover state, e.g. after the transcript is cleared."""
+        with self._lock:
+            for source in [who_spoke] if who_spoke else list(self._silence_seconds):
+                if source in self._silence_seconds:
+                    self._silence_seconds[source] = self.hangover_seconds
+
+    def get_metrics(self) -> dict[str, VoiceActivityMetrics]:
+        """Snapshot of the voice activity counters for each audio source."""
+        with self._lock:
+            return {who_spoke: replace(metrics) for who_spoke, metrics in self._metrics.items()}
+
+
+def create_voice_activity_gate(config: dict) -> VoiceActivityGate | None:
+    """Create the gate selected by ``General.voice_activity_detection``. None disables gating.
+
+    The webrtc and silero detectors need optional packages. The energy detector
+    is used when they are not installed.
+    """
+    general = config.get("General", {})
+    name = str(general.get("voice_activity_detection", DEFAULT_VOICE_ACTIVITY_DETECTION)).lower()
+    if name in ("", "none", "false", "off"):
+        return None
+
+    energy_threshold = float(general.get("voice_activity_energy_threshold", DEFAULT_ENERGY_THRESHOLD))
+
+    def energy_detector():
+        return EnergyVoiceActivityDetector(energy_threshold=energy_threshold)
+
+    detector_factory = energy_detector
+    if name == "webrtc":
+        detector_factory = WebRtcVoiceActivityDetector
+    elif name == "silero":
+        detector_factory = SileroVoiceActivityDetector
+    elif name != "energy":
+        raise ValueError(f"Unknown voice activity detector: {name}")
+
+    if detector_factory is not energy_detector:
+        try:
+            detector_factory()
+        except ImportError as exception:
+            print(f'[INFO] {name} voice activity detection is not available ({exception}). '
+                  'Using energy based voice activity detection.')
+            detector_factory = energy_detector
+
+    return VoiceActivityGate(
+        detector_factory,
+        hangover_seconds=general.get("voice_activity_hangover_seconds", DEFAULT_HANGOVER_SECONDS),
+        padding_seconds=general.get("voice_activity_padding_seconds", DEFAULT_PADDING_SECONDS),
+    )
@@ -5,10 +5,12 @@ from __future__ import annotations
 import audioop
 import threading
 from abc import ABC, abstractmethod
-from array import array
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
+from typing import Sequence
+
+import numpy as np
 
 
 class TranscriptEventKind(Enum):
@@ -56,15 +58,25 @@ class StreamingSTTModelInterface(ABC):
 
 
 class PCM16MonoResampler:
-    """Incrementally convert arbitrary interleaved PCM into mono PCM16."""
+    """Incrementally convert arbitrary interleaved PCM into mono PCM16.
+
+    Channels are averaged by default. ``channel_weights`` gives one gain per
+    channel instead, e.g. to drop the LFE channel of a 5.1 loopback device.
+    """
 
-    def __init__(self, sample_rate: int, sample_width: int, channels: int, target_rate: int = 24000):
+    def __init__(self, sample_rate: int, sample_width: int, channels: int, target_rate: int = 24000,
+                 channel_weights: Sequence[float] | None = None):
         if sample_rate <= 0 or sample_width not in (1, 2, 3, 4) or channels <= 0:
             raise ValueError("Invalid PCM source format")
+        if channel_weights is not None and len(channel_weights) != channels:
+            raise ValueError("channel_weights must have one weight per channel")
         self.sample_rate = int(sample_rate)
         self.sample_width = int(sample_width)
         self.channels = int(channels)
         self.target_rate = int(target_rate)
+        self.channel_weights = (
+            None if channel_weights is None else np.asarray(channel_weights, dtype=np.float32)
+        )
         self._pending = b""
         self._rate_state = None
         self._lock = threading.Lock()
@@ -101,15 +113,16 @@ class PCM16MonoResampler:
             self._rate_state = None
 
     def _to_mono(self, pcm16: bytes) -> bytes:
-        if self.channels == 1:
-            return pcm16
-        if self.channels == 2:
-            return audioop.tomono(pcm16, 2, 0.5, 0.5)
-
-        samples = array("h")
-        samples.frombytes(pcm16)
-        mono = array("h")
-        for offset in range(0, len(samples), self.channels):
-            frame = samples[offset:offset + self.channels]
-            mono.append(int(sum(frame) / len(frame)))
-        return mono.tobytes()
+        if self.channel_weights is None:
+            if self.channels == 1:
+                return pcm16
+            if self.channels == 2:
+                return audioop.tomono(pcm16, 2, 0.5, 0.5)
+
+        frames = np.frombuffer(pcm16, dtype="<i2").reshape(-1, self.channels)
+        if self.channel_weights is None:
+            # Integer sum keeps the mean exact; astype truncates like int()
+            mono = frames.sum(axis=1, dtype=np.int32) / self.channels
+        else:
+            mono = np.rint(frames.astype(np.float32) @ self.channel_weights)
+        return np.clip(mono, -32768, 32767).astype("<i2").tobytes()
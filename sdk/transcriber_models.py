@@ -1,17 +1,25 @@
 import sys
 import os
+import io
 import datetime
 import json
 import re
 import subprocess
+import tempfile
+import threading
 import wave
 from enum import Enum
 from abc import abstractmethod
+import numpy as np
 import openai
 import whisper
 import torch
 from deepgram import (DeepgramClient, FileSource, PrerecordedOptions)
-from sdk.transcription_result import TranscriptSegment, TranscriptionHypothesis
+from sdk.streaming_transcriber_models import PCM16MonoResampler
+from sdk.transcription_result import TranscriptSegment, TranscriptWord, TranscriptionHypothesis
+from sdk.whisper_cpp_server import WhisperCppServer, find_server_binary
+from sdk.whisper_batching import WhisperBatchScheduler, decode_whisper_batch, fits_in_batch
+from sdk.whisper_model_registry import whisper_model_registry
 from tsutils import utilities
 # import pprint
 
@@ -27,6 +35,27 @@ class STTEnum(Enum):
 
 
 MODELS_DIR = f"{utilities.get_data_path(app_name='Transcribe')}/models/"
+# Sample rate expected by Whisper and SenseVoice for in-memory audio
+MODEL_SAMPLE_RATE = 16000
+
+
+def pcm_to_wav_bytes(pcm, sample_rate: int, width: int, channels: int) -> bytes:
+    """Wrap raw interleaved PCM audio in an in-memory WAV container."""
+    with io.BytesIO() as wav_buffer:
+        with wave.open(wav_buffer, "wb") as wav_writer:
+            wav_writer.setnchannels(int(channels))  # pylint: disable=E1101
+            wav_writer.setsampwidth(int(width))  # pylint: disable=E1101
+            wav_writer.setframerate(int(sample_rate))  # pylint: disable=E1101
+            wav_writer.writeframes(pcm)  # pylint: disable=E1101
+        return wav_buffer.getvalue()
+
+
+def pcm_to_float32(pcm, sample_rate: int, width: int, channels: int,
+                   target_rate: int = MODEL_SAMPLE_RATE) -> np.ndarray:
+    """Convert raw interleaved PCM audio to mono float32 samples in [-1.0, 1.0)."""
+    resampler = PCM16MonoResampler(sample_rate, width, channels, target_rate=target_rate)
+    mono = resampler.convert(pcm)
+    return np.frombuffer(mono, dtype=np.int16).astype(np.float32) / 32768.0
 
 
 class STTModelFactory:
@@ -60,6 +89,8 @@ class STTModelFactory:
 class STTModelInterface:
     """Interface all Speech To Text Models must adhere to
     """
+    # Whether get_transcription can be invoked from multiple threads at the same time
+    supports_concurrent_requests = False
 
     @abstractmethod
     def get_transcription(self, wav_file_path: str):
@@ -67,6 +98,20 @@ class STTModelInterface:
         """
         pass  # pylint: disable=W0107
 
+    def get_transcription_from_pcm(self, pcm: memoryview, sample_rate: int,
+                                   width: int, channels: int):
+        """Get transcription from raw interleaved PCM audio held in memory.
+        Models that can decode audio from memory override this method.
+        The default writes a temporary WAV file and uses get_transcription.
+        """
+        file_descriptor, wav_file_path = tempfile.mkstemp(suffix=".wav")
+        try:
+            with os.fdopen(file_descriptor, "wb") as wav_file:
+                wav_file.write(pcm_to_wav_bytes(pcm, sample_rate, width, channels))
+            return self.get_transcription(wav_file_path)
+        finally:
+            os.unlink(wav_file_path)
+
     @abstractmethod
     def get_sentences(self, wav_file_path: str):
         """Get transcription from the provided audio file
@@ -91,6 +136,28 @@ class STTModelInterface:
         pass  # pylint: disable=W0107
 
 
+def _value(item, key: str, default=None):
+    """Read a field of a provider response item that is either a dict or an object."""
+    if isinstance(item, dict):
+        return item.get(key, default)
+    return getattr(item, key, default)
+
+
+def _words_from_response(words, offset_seconds: float = 0.0) -> tuple[TranscriptWord, ...]:
+    """Normalize word timestamps of Whisper (word) or Deepgram (punctuated_word) responses."""
+    normalized = []
+    for word in words or []:
+        text = _value(word, "punctuated_word") or _value(word, "word") or _value(word, "text", "")
+        text = str(text).strip()
+        if text:
+            normalized.append(TranscriptWord(
+                start_seconds=offset_seconds + float(_value(word, "start", 0.0)),
+                end_seconds=offset_seconds + float(_value(word, "end", 0.0)),
+                text=text,
+            ))
+    return tuple(normalized)
+
+
 def _segment_from_mapping(segment_id: int, segment: dict, offset_seconds: float = 0.0) -> TranscriptSegment:
     return TranscriptSegment(
         id=int(segment.get("id", segment_id)),
@@ -98,6 +165,7 @@ def _segment_from_mapping(segment_id: int, segment: dict, offset_seconds: float
         end_seconds=offset_seconds + float(segment.get("end", 0.0)),
         text=str(segment.get("text", "")).strip(),
         confidence=segment.get("confidence"),
+        words=_words_from_response(segment.get("words"), offset_seconds),
     )
 
 
@@ -198,8 +266,17 @@ class SenseVoiceSTTModel(STTModelInterface):
 
     def get_transcription(self, wav_file_path: str) -> dict:
         """Transcribe a WAV file and normalize the result for the application."""
+        return self._transcribe(wav_file_path, self._audio_duration(wav_file_path))
+
+    def get_transcription_from_pcm(self, pcm: memoryview, sample_rate: int,
+                                   width: int, channels: int) -> dict:
+        """Transcribe in-memory PCM audio resampled to 16 kHz mono."""
+        audio = pcm_to_float32(pcm, sample_rate, width, channels)
+        return self._transcribe(audio, len(audio) / float(MODEL_SAMPLE_RATE))
+
+    def _transcribe(self, audio_input, duration_seconds: float) -> dict:
         raw_response = self.audio_model.generate(
-            input=wav_file_path,
+            input=audio_input,
             cache={},
             language=self.lang,
             use_itn=self.use_itn,
@@ -214,7 +291,7 @@ class SenseVoiceSTTModel(STTModelInterface):
         ).strip()
         return {
             "text": text,
-            "segments": self._sentence_segments(text, self._audio_duration(wav_file_path)),
+            "segments": self._sentence_segments(text, duration_seconds),
             "raw_response": raw_response,
         }
 
@@ -253,18 +330,51 @@ class SenseVoiceSTTModel(STTModelInterface):
 
 class WhisperSTTModel(STTModelInterface):
     """Speech to Text using the Whisper Local model
+
+    The loaded model is shared through the process wide model registry.
+    With a batch_size above 1, windows transcribed concurrently, e.g. of the
+    microphone and the speaker, are decoded together in a single batch.
     """
+    # Set when windows are decoded in batches
+    batch_scheduler = None
+
     def __init__(self, stt_model_config: dict):
         self.model = stt_model_config['local_transcripton_model_file']
         self.lang = stt_model_config['audio_lang']
         model_filename = MODELS_DIR + self.model + ".pt"
         self.model_name = self.model + ".pt"
         self.model_filename = os.path.join(MODELS_DIR, model_filename)
+        self.device = stt_model_config.get('device')
+        self._audio_model = None
         self.download_model()
-        self.audio_model: whisper.Whisper = whisper.load_model(self.model_filename)
+        if stt_model_config.get('preload', False):
+            # Load in the background. First transcription waits for the load to complete.
+            whisper_model_registry.preload(self.model_filename, self.device)
+        else:
+            self._load_model()
+        batch_size = int(stt_model_config.get('batch_size', 1))
+        if batch_size > 1:
+            # The scheduler serializes access to the model, so requests can be made concurrently
+            self._inference_lock = threading.Lock()
+            self.batch_scheduler = WhisperBatchScheduler(
+                self._decode_batch,
+                max_batch_size=batch_size,
+                max_wait_seconds=float(stt_model_config.get('batch_wait_ms', 50)) / 1000,
+            )
+            self.supports_concurrent_requests = True
         print(f'[INFO] Speech To Text - Whisper using GPU: {str(torch.cuda.is_available())}')
         openai.api_key = stt_model_config["api_key"]
 
+    @property
+    def audio_model(self) -> whisper.Whisper:
+        if self._audio_model is None:
+            self._load_model()
+        return self._audio_model
+
+    @audio_model.setter
+    def audio_model(self, value):
+        self._audio_model = value
+
     def download_model(self):
         """Download the appropriate OpenAI model if needed"""
 
@@ -335,17 +445,42 @@ class WhisperSTTModel(STTModelInterface):
         # return result['text'].strip()
         return result
 
+    def get_transcription_from_pcm(self, pcm: memoryview, sample_rate: int,
+                                   width: int, channels: int) -> dict:
+        """Get transcription from in-memory PCM audio without a WAV round trip
+        """
+        try:
+            audio = pcm_to_float32(pcm, sample_rate, width, channels)
+            if self.batch_scheduler is None:
+                return self.audio_model.transcribe(audio,
+                                                   fp16=False,
+                                                   language=self.lang,
+                                                   temperature=0)
+            if fits_in_batch(audio):
+                return self.batch_scheduler.transcribe(audio, self.lang)
+            with self._inference_lock:
+                return self.audio_model.transcribe(audio,
+                                                   fp16=False,
+                                                   language=self.lang,
+                                                   temperature=0)
+        except Exception as exception:
+            print('WhisperSTTModel:get_transcription_from_pcm - Encountered error')
+            print(exception)
+            return ''
+
+    def _decode_batch(self, audios: list, language: str) -> list[dict]:
+        with self._inference_lock:
+            return decode_whisper_batch(self.audio_model, audios, language)
+
     def set_lang(self, lang: str):
-        """Set Language for STT
+        """Set Language for STT. Language is a decode option, the loaded model is reused.
         """
         self.lang = lang
-        self.download_model()
-        self._load_model()
 
     def _load_model(self):
-        """Load Model for STT
+        """Get the shared model for STT, loading it if needed
         """
-        self.audio_model = whisper.load_model(self.model_filename)
+        self._audio_model = whisper_model_registry.get(self.model_filename, self.device)
 
     def process_response(self, response) -> str:
         """
@@ -390,6 +525,8 @@ class WhisperSTTModel(STTModelInterface):
 class APIWhisperSTTModel(STTModelInterface):
     """Speech to Text using the Whisper API
     """
+    supports_concurrent_requests = True
+
     def __init__(self, stt_model_config: dict):
         # Check for api_key
         if stt_model_config["api_key"] is None:
@@ -421,6 +558,21 @@ class APIWhisperSTTModel(STTModelInterface):
 
         return result
 
+    def get_transcription_from_pcm(self, pcm: memoryview, sample_rate: int,
+                                   width: int, channels: int) -> dict:
+        """Get transcription from in-memory PCM audio uploaded as a WAV buffer
+        """
+        try:
+            wav_data = pcm_to_wav_bytes(pcm, sample_rate, width, channels)
+            result = self.stt_client.audio.transcriptions.create(model='whisper-1',
+                                                                 file=('audio.wav', wav_data))
+        except Exception as exception:
+            print('Exception in transcribing audio using whisper API.')
+            print(exception)
+            return ''
+
+        return result
+
     def process_response(self, response) -> str:
         """
         Returns transcription from the response of transcription.
@@ -476,6 +628,8 @@ class WhisperCPPSTTModel(STTModelInterface):
     It primarily deals with interacting with the whisper CPP API model.
     This model works best when used with GPU
     """
+    supports_concurrent_requests = True
+
     def __init__(self, stt_model_config: dict):
         self.lang = stt_model_config['audio_lang']
         model = stt_model_config['local_transcripton_model_file']
@@ -490,14 +644,52 @@ class WhisperCPPSTTModel(STTModelInterface):
 
         print('[INFO] Using Whisper CPP for transcription.')
         self.model = 'base'
+        # The server keeps the model loaded between requests. Without it, main.exe
+        # is started for every transcription.
+        self.server = None
+        if stt_model_config.get('use_server', True):
+            server_binary = find_server_binary(stt_model_config.get('server_binary', ''))
+            if server_binary is None:
+                print('[INFO] whisper.cpp server binary not found. Using main.exe for every transcription.')
+            else:
+                log_file = f"{utilities.get_data_path(app_name='Transcribe')}/logs/whisper.cpp.txt"
+                self.server = WhisperCppServer(binary_path=server_binary,
+                                               model_filename=self.model_filename,
+                                               port=stt_model_config.get('server_port', 0),
+                                               log_file=log_file)
 
     def set_lang(self, lang: str):
         """Set STT Language"""
         self.lang = lang
 
+    def stop(self):
+        """Stop the whisper.cpp server process if one is running"""
+        if self.server is not None:
+            self.server.stop()
+
+    def get_transcription_from_pcm(self, pcm: memoryview, sample_rate: int,
+                                   width: int, channels: int):
+        """Get text using STT from in-memory PCM audio
+        """
+        if self.server is None:
+            return super().get_transcription_from_pcm(pcm, sample_rate, width, channels)
+        return self._server_transcription(pcm_to_wav_bytes(pcm, sample_rate, width, channels))
+
+    def _server_transcription(self, wav_data: bytes):
+        try:
+            return self.server.transcribe(wav_data, language=self.lang)
+        except Exception as exception:
+            print('ERROR: converting audio to text using the whisper.cpp server.')
+            print(exception)
+        return None
+
     def get_transcription(self, wav_file_path: str):
         """Get text using STT
         """
+        if self.server is not None:
+            with open(wav_file_path, 'rb') as wav_file:
+                return self._server_transcription(wav_file.read())
+
         mod_file_path = wav_file_path
         try:
             log_file = f"{utilities.get_data_path(app_name='Transcribe')}/logs/whisper.cpp.txt"
@@ -595,6 +787,8 @@ class DeepgramSTTModel(STTModelInterface):
     """Speech to Text using the Deepgram API.
     It primarily deals with interacting with the Deepgram API.
     """
+    supports_concurrent_requests = True
+
     def __init__(self, stt_model_config: dict):
         # Check for api_key
         if stt_model_config["api_key"] is None:
@@ -619,7 +813,20 @@ class DeepgramSTTModel(STTModelInterface):
         try:
             with open(wav_file_path, "rb") as audio_file:
                 buffer_data = audio_file.read()
+        except Exception as exception:
+            print(exception)
+            return None
 
+        return self._transcribe_buffer(buffer_data)
+
+    def get_transcription_from_pcm(self, pcm: memoryview, sample_rate: int,
+                                   width: int, channels: int):
+        """Get text using STT from in-memory PCM audio
+        """
+        return self._transcribe_buffer(pcm_to_wav_bytes(pcm, sample_rate, width, channels))
+
+    def _transcribe_buffer(self, buffer_data: bytes):
+        try:
             payload: FileSource = {
                 "buffer": buffer_data
                 }
@@ -711,19 +918,13 @@ class DeepgramSTTModel(STTModelInterface):
             utterances = []
 
         for index, utterance in enumerate(utterances or []):
-            start = utterance.get("start") if isinstance(utterance, dict) else getattr(utterance, "start", 0.0)
-            end = utterance.get("end") if isinstance(utterance, dict) else getattr(utterance, "end", 0.0)
-            transcript = (
-                utterance.get("transcript")
-                if isinstance(utterance, dict)
-                else getattr(utterance, "transcript", "")
-            )
             segments.append(
                 TranscriptSegment(
                     id=index,
-                    start_seconds=audio_start_seconds + float(start),
-                    end_seconds=audio_start_seconds + float(end),
-                    text=str(transcript).strip(),
+                    start_seconds=audio_start_seconds + float(_value(utterance, "start", 0.0)),
+                    end_seconds=audio_start_seconds + float(_value(utterance, "end", 0.0)),
+                    text=str(_value(utterance, "transcript", "")).strip(),
+                    words=_words_from_response(_value(utterance, "words"), audio_start_seconds),
                 )
             )
 
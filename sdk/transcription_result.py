@@ -5,6 +5,15 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 
 
+@dataclass(frozen=True)
+class TranscriptWord:
+    """A timestamped word of a transcript segment."""
+
+    start_seconds: float
+    end_seconds: float
+    text: str
+
+
 @dataclass(frozen=True)
 class TranscriptSegment:
     """A timestamped transcript segment normalized across STT providers."""
@@ -14,6 +23,8 @@ class TranscriptSegment:
     end_seconds: float
     text: str
     confidence: float | None = None
+    # Empty when the provider does not return word timestamps
+    words: tuple[TranscriptWord, ...] = ()
 
 
 @dataclass(frozen=True)
@@ -0,0 +1,138 @@
+"""Batched decoding of live audio windows with a local Whisper model."""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import torch
+import whisper
+from whisper.audio import N_SAMPLES
+from whisper.tokenizer import get_tokenizer
+
+
+DEFAULT_MAX_BATCH_SIZE = 1
+DEFAULT_MAX_WAIT_SECONDS = 0.05
+# Seconds per Whisper timestamp token
+TIME_PRECISION = 0.02
+# Same thresholds whisper.transcribe uses to drop windows without speech
+NO_SPEECH_THRESHOLD = 0.6
+LOGPROB_THRESHOLD = -1.0
+
+
+def fits_in_batch(audio: np.ndarray) -> bool:
+    """Whisper decodes at most 30 seconds of audio in a single pass."""
+    return len(audio) <= N_SAMPLES
+
+
+def _segments_from_tokens(tokenizer, tokens: list[int], duration_seconds: float) -> list[dict]:
+    segments = []
+    start = None
+    text_tokens = []
+    for token in tokens:
+        if token < tokenizer.timestamp_begin:
+            text_tokens.append(token)
+            continue
+        timestamp = (token - tokenizer.timestamp_begin) * TIME_PRECISION
+        if start is not None and text_tokens:
+            segments.append({"id": len(segments), "start": start, "end": timestamp,
+                             "text": tokenizer.decode(text_tokens)})
+            start = None
+            text_tokens = []
+        else:
+            start = timestamp
+    if text_tokens:
+        segments.append({"id": len(segments), "start": start or 0.0, "end": duration_seconds,
+                         "text": tokenizer.decode(text_tokens)})
+    return segments
+
+
+def decode_whisper_batch(model, audios: list[np.ndarray], language: str | None) -> list[dict]:
+    """Decode up to 30 second windows in one batched encoder and decoder pass.
+    Returns one ``whisper.transcribe`` style result per window."""
+    mel = torch.stack([
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), model.dims.n_mels)
+        for audio in audios
+    ]).to(model.device)
+    options = whisper.DecodingOptions(language=language, temperature=0.0, fp16=False,
+                                      without_timestamps=False)
+    decoded = whisper.decode(model, mel, options)
+
+    results = []
+    for audio, result in zip(audios, decoded):
+        if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+            results.append({"text": "", "segments": [], "language": result.language})
+            continue
+        tokenizer = get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                                  language=result.language, task="transcribe")
+        results.append({
+            "text": result.text,
+            "segments": _segments_from_tokens(tokenizer, result.tokens,
+                                              len(audio) / whisper.audio.SAMPLE_RATE),
+            "language": result.language,
+        })
+    return results
+
+
+class WhisperBatchScheduler:
+    """Collect windows submitted from several threads and decode them together.
+
+    A window waits at most ``max_wait_seconds`` for other windows before its
+    batch is decoded. Windows are batched only with windows of the same
+    language. All decoding runs on a single worker thread.
+    """
+
+    def __init__(self, run_batch, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_seconds: float = DEFAULT_MAX_WAIT_SECONDS):
+        self._run_batch = run_batch
+        self.max_batch_size = max(int(max_batch_size), 1)
+        self.max_wait_seconds = max(float(max_wait_seconds), 0.0)
+        self._requests = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        self.batches_run = 0
+
+    def transcribe(self, audio: np.ndarray, language: str | None) -> dict:
+        """Decode a window and block until its result is available."""
+        future = Future()
+        self._ensure_worker()
+        self._requests.put((audio, language, future))
+        return future.result()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="WhisperBatch", daemon=True)
+                self._worker.start()
+
+    def _collect(self) -> list:
+        batch = [self._requests.get()]
+        deadline = time.monotonic() + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            by_language = {}
+            for request in batch:
+                by_language.setdefault(request[1], []).append(request)
+            for language, requests in by_language.items():
+                try:
+                    results = self._run_batch([audio for audio, _, _ in requests], language)
+                    self.batches_run += 1
+                    for (_, _, future), result in zip(requests, results):
+                        future.set_result(result)
+                except Exception as exception:
+                    for _, _, future in requests:
+                        future.set_exception(exception)
@@ -0,0 +1,204 @@
+"""Long lived whisper.cpp server process used for low latency transcription."""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import shutil
+import socket
+import subprocess  # nosec
+import threading
+import time
+import uuid
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+
+SERVER_BINARY_NAMES = ("whisper-server.exe", "server.exe", "whisper-server", "server")
+SERVER_BINARY_DIRS = ("../../bin", "./bin")
+
+
+def find_server_binary(configured_path: str = "") -> str | None:
+    """Locate the whisper.cpp server binary next to main.exe or on PATH."""
+    if configured_path:
+        return configured_path if os.path.isfile(configured_path) else None
+    for directory in SERVER_BINARY_DIRS:
+        for name in SERVER_BINARY_NAMES:
+            path = os.path.join(directory, name)
+            if os.path.isfile(path):
+                return path
+    return shutil.which("whisper-server")
+
+
+def _free_port(host: str) -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def _encode_multipart(fields: dict, file_name: str, file_data: bytes) -> tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{file_name}"\r\n'
+        f'Content-Type: audio/wav\r\n\r\n'.encode()
+    )
+    parts.append(bytes(file_data))
+    parts.append(f'\r\n--{boundary}--\r\n'.encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def to_transcription_json(response: dict) -> dict:
+    """Convert a server verbose_json response to the ``main.exe -oj`` JSON format."""
+    segments = response.get("segments")
+    if segments is None:
+        segments = [{"start": 0.0, "end": float(response.get("duration", 0.0)),
+                     "text": response.get("text", "")}]
+    return {
+        "transcription": [
+            {
+                "offsets": {
+                    "from": int(round(float(segment.get("start", 0.0)) * 1000)),
+                    "to": int(round(float(segment.get("end", 0.0)) * 1000)),
+                },
+                "text": segment.get("text", ""),
+            }
+            for segment in segments
+        ]
+    }
+
+
+class WhisperCppServer:
+    """Keep a whisper.cpp server process running so the model is loaded only once.
+
+    Audio is posted as an in-memory WAV file to the server on localhost. The
+    process is started on first use and restarted when it exits or stops
+    responding.
+    """
+
+    def __init__(self, binary_path: str, model_filename: str,
+                 host: str = "127.0.0.1", port: int = 0,
+                 startup_timeout_seconds: float = 60,
+                 request_timeout_seconds: float = 120,
+                 log_file: str | None = None,
+                 process_factory=subprocess.Popen):
+        self.binary_path = binary_path
+        self.model_filename = model_filename
+        self.host = host
+        self.configured_port = int(port)
+        self.port = None
+        self.startup_timeout_seconds = float(startup_timeout_seconds)
+        self.request_timeout_seconds = float(request_timeout_seconds)
+        self.log_file = log_file
+        self.restarts = 0
+        self._process_factory = process_factory
+        self._process = None
+        self._log_handle = None
+        self._lock = threading.Lock()
+        atexit.register(self.stop)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def is_running(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self):
+        """Start the server process if it is not running and wait until it accepts requests."""
+        with self._lock:
+            if self.is_running():
+                return
+            if self._process is not None:
+                print(f'[INFO] whisper.cpp server exited with code {self._process.returncode}. '
+                      'Restarting the server.')
+                self._stop_locked()
+                self.restarts += 1
+            self._start_locked()
+
+    def stop(self):
+        """Terminate the server process."""
+        with self._lock:
+            self._stop_locked()
+
+    def transcribe(self, wav_data: bytes, language: str = "auto") -> dict:
+        """Transcribe WAV audio. Returns the ``main.exe -oj`` JSON format."""
+        self.start()
+        restarts_seen = self.restarts
+        try:
+            return self._post_inference(wav_data, language)
+        except HTTPError:
+            # The server is up and rejected the request
+            raise
+        except (URLError, ConnectionError, TimeoutError, OSError) as exception:
+            print(f'[INFO] whisper.cpp server request failed: {exception}')
+            # Requests of other lanes failing at the same time retry on the restarted server
+            self.restart(restarts_seen=restarts_seen)
+            return self._post_inference(wav_data, language)
+
+    def restart(self, restarts_seen: int | None = None):
+        """Restart the server. When restarts_seen is given, a running server is only
+        restarted if it was not restarted since restarts was restarts_seen."""
+        with self._lock:
+            if restarts_seen is not None and self.restarts != restarts_seen and self.is_running():
+                return
+            print('[INFO] Restarting the whisper.cpp server.')
+            self._stop_locked()
+            self.restarts += 1
+            self._start_locked()
+
+    def _start_locked(self):
+        self.port = self.configured_port or _free_port(self.host)
+        args = [self.binary_path, "-m", self.model_filename,
+                "--host", self.host, "--port", str(self.port)]
+        if self.log_file:
+            self._log_handle = open(self.log_file, mode="a", encoding="utf-8")  # pylint: disable=R1732
+            output = self._log_handle
+        else:
+            output = subprocess.DEVNULL
+        self._process = self._process_factory(args, stdout=output, stderr=subprocess.STDOUT)
+        self._wait_until_ready()
+
+    def _stop_locked(self):
+        if self._process is not None:
+            if self._process.poll() is None:
+                self._process.terminate()
+                try:
+                    self._process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    self._process.kill()
+            self._process = None
+        if self._log_handle is not None:
+            self._log_handle.close()
+            self._log_handle = None
+
+    def _wait_until_ready(self):
+        deadline = time.monotonic() + self.startup_timeout_seconds
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                return_code = self._process.returncode
+                self._stop_locked()
+                raise RuntimeError(f"whisper.cpp server exited with code {return_code}")
+            try:
+                with socket.create_connection((self.host, self.port), timeout=1):
+                    return
+            except OSError:
+                time.sleep(0.1)
+        self._stop_locked()
+        raise RuntimeError("Timed out waiting for the whisper.cpp server to start")
+
+    def _post_inference(self, wav_data: bytes, language: str) -> dict:
+        body, content_type = _encode_multipart(
+            {"response_format": "verbose_json", "temperature": "0.0", "language": language},
+            "audio.wav",
+            wav_data,
+        )
+        request = Request(f"{self.url}/inference", data=body,
+                          headers={"Content-Type": content_type}, method="POST")
+        with urlopen(request, timeout=self.request_timeout_seconds) as response:  # nosec
+            return to_transcription_json(json.loads(response.read().decode("utf-8")))
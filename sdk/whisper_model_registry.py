@@ -0,0 +1,77 @@
+"""Process wide cache of loaded local Whisper models."""
+
+from __future__ import annotations
+
+import os
+import threading
+
+import torch
+import whisper
+
+
+def resolve_device(device: str | None = None) -> str:
+    """Device a model is loaded on when none is specified."""
+    if device:
+        return device
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+class WhisperModelRegistry:
+    """Load each Whisper checkpoint once per device and share it.
+
+    The live transcriber and the batch transcription path get the same model
+    object for the same model file and device. Language is a decode option,
+    so switching languages reuses the loaded model.
+    """
+
+    def __init__(self, loader=whisper.load_model):
+        self._loader = loader
+        self._models = {}
+        self._load_locks = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(model_filename: str, device: str | None) -> tuple[str, str]:
+        return os.path.abspath(model_filename), resolve_device(device)
+
+    def get(self, model_filename: str, device: str | None = None):
+        """Return the loaded model, loading it if needed. Concurrent callers wait for one load."""
+        key = self._key(model_filename, device)
+        with self._lock:
+            if key in self._models:
+                return self._models[key]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            with self._lock:
+                if key in self._models:
+                    return self._models[key]
+            model = self._loader(key[0], device=key[1])
+            with self._lock:
+                self._models[key] = model
+                self._load_locks.pop(key, None)
+            return model
+
+    def is_loaded(self, model_filename: str, device: str | None = None) -> bool:
+        with self._lock:
+            return self._key(model_filename, device) in self._models
+
+    def preload(self, model_filename: str, device: str | None = None) -> threading.Thread:
+        """Load the model in a background thread so the first transcription is not delayed."""
+        def load():
+            try:
+                self.get(model_filename, device)
+            except Exception as exception:
+                print(f'[ERROR] Failed to preload transcription model {model_filename}: {exception}')
+
+        thread = threading.Thread(target=load, name="WhisperModelPreload", daemon=True)
+        thread.start()
+        return thread
+
+    def clear(self):
+        """Release all loaded models."""
+        with self._lock:
+            self._models.clear()
+
+
+# Shared by all WhisperSTTModel instances in the process
+whisper_model_registry = WhisperModelRegistry()
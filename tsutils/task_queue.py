@@ -13,17 +13,27 @@ class TaskQueueEnum(Enum):
 
 
 # Add a task to clean log files at regular intervals
-# Add a task to purge DB at regular intervals
 class TaskQueue:
 
     def __init__(self):
         self.mutex = threading.Lock()
         self.task_list = queue.Queue()
+        # Task type to function called with the task parameters
+        self.handlers = {
+            TaskQueueEnum.ZIP_TASK: utilities.zip_files_in_folder_with_params
+        }
 
     def add(self, **params):
         with self.mutex:
             self.task_list.put(params)
 
+    def set_handler(self, task_type: TaskQueueEnum, handler):
+        """Set the function that executes tasks of a type.
+        Used for tasks implemented outside of tsutils, e.g. DB_CLEAN.
+        """
+        with self.mutex:
+            self.handlers[task_type] = handler
+
     def task_exec_thread(self):
         while True:
             # Wait atleast 20s between two tasks
@@ -31,8 +41,14 @@ class TaskQueue:
             queue_item = self.task_list.get()
             try:
                 task_type = queue_item['task_type']
-                if task_type == TaskQueueEnum.ZIP_TASK:
-                    utilities.zip_files_in_folder_with_params(**queue_item)
+                with self.mutex:
+                    handler = self.handlers.get(task_type)
+                if handler is None:
+                    print(f'No handler for task {task_type} in task queue.')
+                    continue
+                handler(**queue_item)
             except KeyError as ke:
                 print('Caught exception executing tasks in task queue.')
                 print(f'Mandatory input argument {ke} not found.')
+            except Exception as ex:
+                print(f'Caught exception executing task {queue_item.get("task_type")} in task queue: {ex}')